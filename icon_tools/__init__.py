@@ -0,0 +1,9 @@
+"""
+わせラボアイコン加工ツール群
+
+ルート直下の各スクリプト（swap_colors.py など）から共通で利用する。
+依存するパッケージは requirements.txt（pip install -r icon_tools/requirements.txt）。
+"""
+
+# 変換結果が変わる修正を入れたら上げる（派生画像のキャッシュが無効になる）
+__version__ = '1.2'
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+内容アドレス方式のバックアップと取り消し履歴
+
+スクリプトが上書きする前のファイルを、デコード・再エンコードせずに元のバイト列のまま
+.icon_backups/objects/<SHA-256> に保存し、.icon_backups/history.jsonl に順番に記録する。
+同じ内容は一度しか保存せず、保存はリフリンク（コピーオンライト）→ ハードリンク →
+コピーの順に試すので、スナップショットは通常ファイルのリンク1回で済む。
+ハッシュはマニフェストのサイズ・更新時刻のキャッシュを使うため、変わっていないファイルは読まない。
+
+ハードリンクで保存したバックアップは作業中のファイルと中身を共有する。このリポジトリの
+書き込み（cache.write_if_changed）は一時ファイルからの置き換えなので共有は自然に切れるが、
+外部のエディタでその場で上書きされた場合に備え、復元の前に内容のハッシュを確かめる。
+
+使い方:
+    python -m icon_tools.backup list                  # 履歴の一覧
+    python -m icon_tools.backup undo                  # 最後の変更を取り消す（繰り返すとさらに戻る）
+    python -m icon_tools.backup restore 3             # 履歴の 3 番の内容に戻す
+    python -m icon_tools.backup snapshot waselab_icon.png --label before_edit
+
+    from icon_tools.backup import snapshot
+    snapshot('waselab_icon.png', 'before_swap')       # 上書きする前に呼ぶ
+"""
+
+import argparse
+import datetime
+import errno
+import json
+import os
+import shutil
+
+from icon_tools import profiling
+from icon_tools.cache import Manifest, hash_bytes
+
+DEFAULT_STORE = '.icon_backups'
+
+# Linux の FICLONE（ファイルのリフリンク）
+_FICLONE = 0x40049409
+
+# 取り消し・復元の直前に自動で保存したスナップショットのラベル
+AUTO_LABEL = 'before_restore'
+
+
+class BackupError(Exception):
+    """バックアップの履歴が見つからない・内容が壊れている場合のエラー"""
+
+
+def object_path(digest, store=DEFAULT_STORE):
+    return os.path.join(store, 'objects', digest)
+
+
+def history_path(store=DEFAULT_STORE):
+    return os.path.join(store, 'history.jsonl')
+
+
+def _clone(source, destination):
+    """リフリンクでコピーする（対応していないファイルシステムでは False）"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(destination)
+    return False
+
+
+def _store_object(path, destination):
+    """path をバックアップの保存先に置く。使った方法（'reflink' / 'link' / 'copy'）を返す"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temporary = f'{destination}.{os.getpid()}.tmp'
+    if _clone(path, temporary):
+        method = 'reflink'
+    else:
+        try:
+            os.link(path, temporary)
+            method = 'link'
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+                raise
+            shutil.copyfile(path, temporary)
+            method = 'copy'
+    os.replace(temporary, destination)
+    return method
+
+
+def history(store=DEFAULT_STORE):
+    """記録の一覧（古い順、各要素は id / time / path / sha256 / size / label の辞書）"""
+    try:
+        with open(history_path(store), encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _append(entry, store):
+    os.makedirs(store, exist_ok=True)
+    with open(history_path(store), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+@profiling.profiled('snapshot')
+def snapshot(path, label=None, manifest=None, store=DEFAULT_STORE, undo_of=None):
+    """path の現在の内容を保存して履歴に追加し、その記録を返す（path がなければ None）
+
+    manifest を渡すとそのマニフェストでハッシュを求める（保存は呼び出し側で行う）。
+    undo_of は取り消しの直前に自動で保存する場合に、戻す先の記録の番号を入れる。
+    """
+    if not os.path.exists(path):
+        return None
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = Manifest()
+    digest = manifest.file_hash(path)
+    if own_manifest:
+        manifest.save()
+
+    destination = object_path(digest, store)
+    method = 'existing' if os.path.exists(destination) else _store_object(path, destination)
+    entries = history(store)
+    entry = {
+        'id': entries[-1]['id'] + 1 if entries else 1,
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'path': os.path.normpath(path),
+        'sha256': digest,
+        'size': os.path.getsize(destination),
+        'label': label,
+        'method': method,
+    }
+    if undo_of is not None:
+        entry['undo_of'] = undo_of
+    _append(entry, store)
+    return entry
+
+
+def _verified(entry, store):
+    """保存した内容を読み、ハッシュが一致することを確かめて返す"""
+    try:
+        with open(object_path(entry['sha256'], store), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        raise BackupError(f"履歴 {entry['id']} の内容が見つかりません: {entry['sha256']}")
+    if hash_bytes(data) != entry['sha256']:
+        raise BackupError(f"履歴 {entry['id']} の内容が変更されています（ハードリンク先がその場で上書きされた可能性があります）")
+    return data
+
+
+def restore(number, store=DEFAULT_STORE, undo=False):
+    """履歴の number 番の内容を元のパスに戻し、その記録を返す
+
+    戻す前の内容もスナップショットとして保存するので、restore 自体も取り消せる。
+    undo から呼ぶ場合は、そのスナップショットに戻した記録の番号（undo_of）を付ける。
+    """
+    entry = next((e for e in history(store) if e['id'] == number), None)
+    if entry is None:
+        raise BackupError(f"履歴 {number} はありません")
+    data = _verified(entry, store)
+    snapshot(entry['path'], AUTO_LABEL, store=store, undo_of=number if undo else None)
+    path = entry['path']
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+    return entry
+
+
+def undo(path=None, store=DEFAULT_STORE):
+    """最後の変更を取り消し、戻した記録を返す
+
+    新しい記録から順に、今の内容と異なる最初のものに戻す。直前の操作が取り消しで、
+    その後に内容が変わっていなければ、前回戻した記録より前から探すので、続けて呼ぶと
+    さらに前の状態に戻る。取り消しの直前に自動保存した記録は戻り先にしない
+    （restore の直前に自動保存したものは戻り先になり、restore を取り消せる）。
+    path を省略すると最後に記録したファイルを対象にする。
+    """
+    entries = history(store)
+    if path is None:
+        candidates = [e for e in entries if 'undo_of' not in e]
+        if not candidates:
+            raise BackupError('取り消せる履歴がありません')
+        path = candidates[-1]['path']
+    path = os.path.normpath(path)
+    entries = [e for e in entries if e['path'] == path]
+    if not entries:
+        raise BackupError('取り消せる履歴がありません')
+    current = None
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            current = hash_bytes(f.read())
+
+    end = len(entries)
+    last = entries[-1]
+    if 'undo_of' in last:
+        # 続けて取り消す場合: 前回戻した記録の内容のままなら、それより前から探す
+        restored = next((i for i, e in enumerate(entries) if e['id'] == last['undo_of']), None)
+        if restored is not None and entries[restored]['sha256'] == current:
+            end = restored
+    for entry in reversed(entries[:end]):
+        if 'undo_of' not in entry and entry['sha256'] != current:
+            return restore(entry['id'], store, undo=True)
+    raise BackupError(f"{path} にはこれ以上取り消せる履歴がありません")
+
+
+def _describe(entry):
+    label = f" [{entry['label']}]" if entry['label'] else ''
+    return (f"{entry['id']:>4}  {entry['time']}  {entry['path']}{label}  "
+            f"{entry['sha256'][:12]}  {entry['size'] / 1024:.0f} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='アイコンのバックアップと取り消し')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='バックアップの保存先')
+    profiling.add_argument(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+    listing = commands.add_parser('list', help='履歴の一覧')
+    listing.add_argument('path', nargs='?', help='このファイルの履歴だけを表示')
+    saving = commands.add_parser('snapshot', help='現在の内容を保存')
+    saving.add_argument('path', help='保存するファイル')
+    saving.add_argument('--label', help='履歴に付けるラベル')
+    undoing = commands.add_parser('undo', help='最後の変更を取り消す')
+    undoing.add_argument('path', nargs='?', help='取り消すファイル（既定: 最後に記録したファイル）')
+    restoring = commands.add_parser('restore', help='履歴の番号の内容に戻す')
+    restoring.add_argument('number', type=int, help='履歴の番号（list で確認）')
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'backup'):
+        try:
+            if args.command == 'list':
+                entries = history(args.store)
+                if args.path:
+                    entries = [e for e in entries if e['path'] == os.path.normpath(args.path)]
+                for entry in entries:
+                    print(_describe(entry))
+                if not entries:
+                    print("履歴はありません。")
+            elif args.command == 'snapshot':
+                entry = snapshot(args.path, args.label, store=args.store)
+                if entry is None:
+                    parser.error(f"ファイルがありません: {args.path}")
+                print(f"保存しました: {_describe(entry)}")
+            elif args.command == 'undo':
+                entry = undo(args.path, args.store)
+                print(f"元に戻しました: {_describe(entry)}")
+            else:
+                entry = restore(args.number, args.store)
+                print(f"復元しました: {_describe(entry)}")
+        except BackupError as e:
+            print(f"エラー: {e}")
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
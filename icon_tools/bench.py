@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+アイコン変換のベンチマークとゴールデン画像による回帰チェック
+
+各変換（invert / swap / swap_hq / shift / resample）を
+  - 合成したアイコン（512x512, 1024x1024, 4096x4096）
+  - 実際のアイコン（weselab_icon.png）
+に対して実行し、実行時間とピーク時のメモリ使用量を計測する。
+出力は icon_tools/golden/ に保存したゴールデン画像とチャンネルごとの許容誤差で比較し、
+結果を JSON のレポートに書き出す（レビューで差分として確認できるようにする）。
+ゴールデン画像は新しい実装ではなく、元のスクリプトのループを写した参照実装
+（reference.py）の出力から作る。swap / swap_hq は、えんじ色の検出を palette.analyze に
+変えたことによる色の違いが比較に混ざらないよう、swap_colors_hq.py と同じ色を指定して実行する。
+
+計測はケースごとに新しく起動したプロセスで行う。入力はあらかじめ .npy に書き出しておき、
+メモリはそれを読み込んだ後からの最大常駐メモリ（ru_maxrss）の増分とする（PIL 内部の確保も含まれる）。
+4096x4096 は計測のみで、ゴールデン画像は保存しない（同じ処理を 1024x1024 までで確認する）。
+
+使い方:
+    python -m icon_tools.bench                       # 計測とゴールデン画像との比較
+    python -m icon_tools.bench --sizes 512 --repeat 5
+    python -m icon_tools.bench --update-golden       # 参照実装の出力でゴールデン画像を作り直す
+    python -m icon_tools.bench --baseline old.json   # 以前のレポートより遅くなった変換を表示
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import PIL
+import numpy as np
+
+from icon_tools import __version__, optimize, pipeline, profiling, recolor, reference
+from icon_tools.cache import encode_png, write_if_changed
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden')
+DEFAULT_REPORT = os.path.join('build', 'icon_bench.json')
+REAL_ICON = 'weselab_icon.png'
+
+# 変換名とパイプラインのステージ
+TRANSFORMS = {
+    'invert': ['invert'],
+    'swap': ['swap:enji=140/34/51'],
+    'swap_hq': ['blend:enji=140/34/51'],
+    'shift': ['shift:dx=1'],
+    'resample': ['resample:scale=2'],
+}
+
+SYNTHETIC_SIZES = (512, 1024, 4096)
+
+# ゴールデン画像を保存する合成アイコンの最大サイズ
+GOLDEN_MAX_SIZE = 1024
+
+# チャンネルごと（R/G/B/A）の許容誤差（Pillow のバージョン差による丸めを見込む）
+DEFAULT_TOLERANCE = (1, 1, 1, 1)
+
+# --baseline との比較で遅くなったとみなす割合
+SLOWDOWN_THRESHOLD = 1.2
+
+
+def synthetic_icon(size):
+    """えんじ色の角丸の背景に白い円と首を描いた、アンチエイリアス付きの合成アイコン"""
+    y, x = (np.mgrid[0:size, 0:size].astype(np.float32) + 0.5) / size
+
+    def coverage(distance):
+        # 境界からの距離（ピクセル単位）を 1px 幅の被覆率にする
+        return np.clip(0.5 - distance * size, 0, 1)
+
+    # 角丸の正方形（半径 0.18）
+    qx, qy = np.abs(x - 0.5) - 0.32, np.abs(y - 0.5) - 0.32
+    outside = np.hypot(np.maximum(qx, 0), np.maximum(qy, 0))
+    background = coverage(outside + np.minimum(np.maximum(qx, qy), 0) - 0.18)
+
+    # フラスコの胴（円）と首（長方形）
+    body = np.hypot(x - 0.5, y - 0.6) - 0.22
+    neck = np.maximum(np.abs(x - 0.5) - 0.07, np.abs(y - 0.33) - 0.14)
+    flask = coverage(np.minimum(body, neck))
+
+    # 背景は上から下へ少しだけ暗くして、中間色を含める
+    enji = np.array(recolor.ENJI_COLOR, dtype=np.float32)
+    shade = (1 - 0.25 * y)[..., None]
+    white = np.array(recolor.WHITE_COLOR, dtype=np.float32)
+    rgb = enji * shade * (1 - flask[..., None]) + white * flask[..., None]
+
+    pixels = np.empty((size, size, 4), dtype=np.uint8)
+    pixels[..., :3] = np.rint(rgb)
+    pixels[..., 3] = np.rint(background * 255)
+    return pixels
+
+
+def cases(sizes=SYNTHETIC_SIZES, real_icon=REAL_ICON):
+    """計測する入力の (名前, 合成アイコンのサイズまたは画像のパス) の一覧"""
+    inputs = [(f'synthetic-{size}', size) for size in sizes]
+    if real_icon and os.path.exists(real_icon):
+        inputs.append((os.path.splitext(os.path.basename(real_icon))[0], real_icon))
+    return inputs
+
+
+def load_input(source):
+    return synthetic_icon(source) if isinstance(source, int) else recolor.load_rgba(source)
+
+
+def prepare_inputs(inputs, directory):
+    """入力をデコード済みの .npy に書き出し、(名前, 元の指定, .npy のパス) を返す"""
+    prepared = []
+    for name, source in inputs:
+        path = os.path.join(directory, f'{name}.npy')
+        np.save(path, load_input(source))
+        prepared.append((name, source, path))
+    return prepared
+
+
+def has_golden(source):
+    return not isinstance(source, int) or source <= GOLDEN_MAX_SIZE
+
+
+def golden_path(input_name, transform, golden_dir=GOLDEN_DIR):
+    return os.path.join(golden_dir, f'{input_name}-{transform}.png')
+
+
+def compare(actual, expected, tolerance=DEFAULT_TOLERANCE):
+    """チャンネルごとの最大誤差と、許容誤差を超えたピクセル数を返す"""
+    if actual.shape != expected.shape:
+        return {'passed': False, 'reason': f'大きさが異なります: {actual.shape} != {expected.shape}'}
+    diff = np.abs(actual.astype(np.int16) - expected.astype(np.int16))
+    over = diff > np.asarray(tolerance, dtype=np.int16)
+    mismatched = int(over.any(axis=-1).sum())
+    return {
+        'passed': mismatched == 0,
+        'max_diff': diff.reshape(-1, diff.shape[-1]).max(axis=0).tolist(),
+        'mismatched': mismatched,
+    }
+
+
+def _max_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト、Linux は KB 単位
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _measure(job):
+    """1つの入力と変換を計測する（新しいワーカープロセスで呼ばれる）"""
+    input_name, source, raster, transform, repeat, tolerance, golden_dir, update = job
+    pixels = np.load(raster)
+    baseline = _max_rss_mb()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = pipeline.run(pixels, TRANSFORMS[transform])
+        times.append(time.perf_counter() - start)
+    peak = _max_rss_mb() - baseline
+
+    result = {
+        'input': input_name,
+        'size': list(pixels.shape[:2]),
+        'transform': transform,
+        'wall_ms': round(min(times) * 1000, 2),
+        'mean_ms': round(sum(times) / len(times) * 1000, 2),
+        'peak_mb': round(peak, 1),
+        'golden': 'skipped',
+    }
+    if not has_golden(source):
+        return result
+
+    path = golden_path(input_name, transform, golden_dir)
+    if update:
+        expected = reference.run(pixels, transform)
+        data, _ = optimize.optimize_bytes(encode_png(recolor.to_image(expected)))
+        write_if_changed(path, data)
+    elif not os.path.exists(path):
+        result['golden'] = 'missing'
+        return result
+    else:
+        expected = recolor.load_rgba(path)
+    check = compare(out, expected, tolerance)
+    passed = check.pop('passed')
+    result['golden'] = 'updated' if update and passed else 'passed' if passed else 'failed'
+    result.update(check)
+    return result
+
+
+def run(inputs, transforms, repeat=3, tolerance=DEFAULT_TOLERANCE, golden_dir=GOLDEN_DIR, update=False):
+    """全ケースを計測し、結果のリストを返す
+
+    ケースごとにワーカープロセスを起動し直し（fork ではなく spawn）、
+    親プロセスや前のケースのメモリ使用量が計測に混ざらないようにする。
+    """
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        # 合成アイコンの生成は大きな一時配列を使うため、これも別プロセスで行う
+        # （ru_maxrss は起動したプロセスに引き継がれるため、親のメモリを増やさない）
+        with context.Pool(1) as pool:
+            prepared = pool.apply(prepare_inputs, (inputs, directory))
+        jobs = [(name, source, raster, transform, repeat, tuple(tolerance), golden_dir, update)
+                for name, source, raster in prepared
+                for transform in transforms]
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            return pool.map(_measure, jobs, chunksize=1)
+
+
+def report_data(results):
+    """レポートの JSON に書き出す内容"""
+    return {
+        'icon_tools': __version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+
+
+def slowdowns(results, baseline, threshold=SLOWDOWN_THRESHOLD):
+    """以前のレポートより threshold 倍以上遅くなったケースを (結果, 以前の時間) で返す"""
+    before = {(r['input'], r['transform']): r['wall_ms'] for r in baseline.get('results', [])}
+    slower = []
+    for result in results:
+        previous = before.get((result['input'], result['transform']))
+        if previous and result['wall_ms'] > previous * threshold:
+            slower.append((result, previous))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='アイコン変換のベンチマークと回帰チェック')
+    parser.add_argument('--sizes', type=int, nargs='*', default=list(SYNTHETIC_SIZES),
+                        help='合成アイコンの一辺のピクセル数')
+    parser.add_argument('--icon', default=REAL_ICON, help="実際のアイコン（'' で省略）")
+    parser.add_argument('-t', '--transform', action='append', choices=list(TRANSFORMS),
+                        help='計測する変換（既定: すべて）')
+    parser.add_argument('--repeat', type=int, default=3, help='ケースごとの実行回数（最小値を記録）')
+    parser.add_argument('--tolerance', default='/'.join(str(t) for t in DEFAULT_TOLERANCE),
+                        help='チャンネルごとの許容誤差（R/G/B/A）')
+    parser.add_argument('--golden-dir', default=GOLDEN_DIR, help='ゴールデン画像のディレクトリ')
+    parser.add_argument('--update-golden', action='store_true',
+                        help='参照実装（reference.py）の出力でゴールデン画像を作り直す')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help='レポートの出力先（JSON）')
+    parser.add_argument('--baseline', help='比較する以前のレポート（JSON）')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'bench'):
+        tolerance = tuple(int(t) for t in args.tolerance.split('/'))
+        if len(tolerance) != 4:
+            parser.error('--tolerance は R/G/B/A の4つの値で指定してください')
+
+        results = run(cases(args.sizes, args.icon), args.transform or list(TRANSFORMS), args.repeat,
+                      tolerance, args.golden_dir, args.update_golden)
+
+        print(f"{'入力':<16} {'変換':<10} {'時間(ms)':>10} {'メモリ(MB)':>10}  ゴールデン")
+        for r in results:
+            detail = f" 最大誤差 {r['max_diff']}, {r['mismatched']} px" if r['golden'] == 'failed' else ''
+            print(f"{r['input']:<16} {r['transform']:<10} {r['wall_ms']:>10.1f} {r['peak_mb']:>10.1f}  "
+                  f"{r['golden']}{detail}")
+
+        data = json.dumps(report_data(results), indent=2, ensure_ascii=False) + '\n'
+        write_if_changed(args.report, data.encode('utf-8'))
+        print(f"レポートを保存しました: {args.report}")
+
+        failed = [r for r in results if r['golden'] in ('failed', 'missing')]
+        if args.baseline:
+            with open(args.baseline) as f:
+                slower = slowdowns(results, json.load(f))
+            for result, previous in slower:
+                print(f"遅くなりました: {result['input']} {result['transform']} "
+                      f"{previous:.1f} → {result['wall_ms']:.1f} ms")
+        if failed:
+            print(f"{len(failed)} 件がゴールデン画像と一致しません（または未作成です）")
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
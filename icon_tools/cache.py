@@ -0,0 +1,145 @@
+"""
+派生アイコンのインクリメンタルキャッシュ
+
+出力ごとに「元画像のハッシュ・変換パラメータ・ツールのバージョン」から
+キーを作ってマニフェストに記録し、キーが変わらない出力は作り直さない。
+作り直す場合も、バイト列が既存のファイルと同じなら書き込まない。
+
+ファイルのハッシュはサイズと更新時刻が変わらない限りマニフェストの値を使うため、
+何も変わっていない実行はファイルを読まずに終わる。
+"""
+
+import hashlib
+import io
+import json
+import os
+
+from icon_tools import __version__, profiling
+
+DEFAULT_MANIFEST = '.icon_cache.json'
+
+
+def _stat_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@profiling.profiled('write')
+def write_if_changed(path, data):
+    """内容が異なる場合だけ書き込む（書き込んだら True）"""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 一時ファイルに書いてから置き換える（バックアップとハードリンクで共有している
+    # 元のファイルの中身を書き換えず、途中で中断しても壊れたファイルを残さない）
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+    return True
+
+
+@profiling.profiled('encode')
+def encode_png(img, **params):
+    """PIL画像をPNGのバイト列にエンコード"""
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG', **params)
+    return buffer.getvalue()
+
+
+class Manifest:
+    """出力ファイルごとのキャッシュキーを記録するマニフェスト"""
+
+    def __init__(self, path=DEFAULT_MANIFEST):
+        self.path = path
+        self.outputs = {}
+        self.hashes = {}
+        self.optimized = set()
+        self._dirty = False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get('version') == __version__:
+            self.outputs = data.get('outputs', {})
+            self.hashes = data.get('hashes', {})
+            self.optimized = set(data.get('optimized', []))
+
+    def file_hash(self, path):
+        """ファイルのSHA-256（サイズと更新時刻が同じならマニフェストの値を使う）"""
+        path = os.path.normpath(path)
+        signature = _stat_signature(path)
+        cached = self.hashes.get(path)
+        if cached and cached['stat'] == signature:
+            return cached['sha256']
+        with open(path, 'rb') as f:
+            digest = hash_bytes(f.read())
+        self.hashes[path] = {'stat': signature, 'sha256': digest}
+        self._dirty = True
+        return digest
+
+    def key(self, source, params):
+        """元画像・パラメータ・ツールのバージョンから出力のキーを作る"""
+        payload = json.dumps({
+            'source': self.file_hash(source),
+            'params': params,
+            'version': __version__,
+        }, sort_keys=True, ensure_ascii=False)
+        return hash_bytes(payload.encode('utf-8'))
+
+    def is_fresh(self, output, key):
+        """出力が同じキーで作られ、その後変更されていなければ True"""
+        entry = self.outputs.get(os.path.normpath(output))
+        if not entry or entry['key'] != key:
+            return False
+        try:
+            return self.file_hash(output) == entry['sha256']
+        except FileNotFoundError:
+            return False
+
+    def record(self, output, key):
+        """出力を作成したキーを記録"""
+        output = os.path.normpath(output)
+        self.outputs[output] = {'key': key, 'sha256': self.file_hash(output)}
+        self._dirty = True
+
+    def is_optimized(self, path):
+        """ファイルが最適化済みの内容のままなら True"""
+        try:
+            return self.file_hash(path) in self.optimized
+        except FileNotFoundError:
+            return False
+
+    def mark_optimized(self, path):
+        """最適化済みとして記録（出力として記録済みならハッシュも更新する）"""
+        path = os.path.normpath(path)
+        digest = self.file_hash(path)
+        self.optimized.add(digest)
+        if path in self.outputs:
+            self.outputs[path]['sha256'] = digest
+        self._dirty = True
+
+    def save(self):
+        """変更があればマニフェストを書き出す"""
+        if not self._dirty:
+            return
+        data = {
+            'version': __version__,
+            'outputs': self.outputs,
+            'hashes': self.hashes,
+            'optimized': sorted(self.optimized),
+        }
+        write_if_changed(self.path, json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        self._dirty = False
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+アイコンの自動センタリングとセーフゾーンへのフィット
+
+shift_icon.py や adjust_icon.py のように移動量を手で決める代わりに、
+絵柄（フラスコ）の重心と外接矩形を配列の集計で求め、
+  - 通常のアイコン: 絵柄の光学的な中心がキャンバスの中心に来るように移動する
+  - マスカブル（Web）/ アダプティブ（Android）アイコン:
+    絵柄がセーフゾーン（中心からの円）に収まるように拡大・縮小し、余白を背景色で塗る
+を1回の計測から全サイズについて行う。
+
+絵柄の重みは、外周が透明なアイコンではアルファ、背景が塗られたアイコンでは
+背景色→前景色の線分上の位置（フラスコらしさ）にアルファを掛けたものを使う。
+光学的な中心は外接矩形の中心と重心の中間とする（重心だけに合わせると
+フラスコのように下が重い形は上に寄って見える）。
+
+使い方:
+    python -m icon_tools.fit waselab_icon.png                   # 計測結果を表示
+    python -m icon_tools.fit waselab_icon.png --size 512 --mode maskable -o Icon-maskable-512.png
+"""
+
+import argparse
+
+import numpy as np
+
+from icon_tools import geometry, palette, profiling, pyramid as linear_pyramid, raster, recolor
+from icon_tools.cache import encode_png, write_if_changed
+from icon_tools.themes import blend_levels
+
+# セーフゾーンの半径（アイコンの一辺に対する割合）。None は拡大・縮小しない
+SAFE_ZONES = {
+    'normal': None,
+    # W3C の maskable アイコン: 中心から半径 40% の円
+    'maskable': 0.40,
+    # Android のアダプティブアイコン: 108dp のうち直径 66dp の円
+    'adaptive': 33 / 108,
+}
+
+# 光学的な中心での重心の割合（0 なら外接矩形の中心、1 なら重心）
+OPTICAL_WEIGHT = 0.5
+
+# 絵柄とみなす重みのしきい値
+DEFAULT_THRESHOLD = 0.5
+
+
+class Measurement:
+    """絵柄の重心・外接矩形・中心からの広がり（座標はマスターのピクセル単位）"""
+
+    def __init__(self, size, centroid, bounds, extent, background):
+        self.size = size
+        self.centroid = centroid
+        self.bounds = bounds
+        self.extent = extent
+        self.background = background
+
+    @property
+    def optical_center(self):
+        x0, y0, x1, y1 = self.bounds
+        box = ((x0 + x1) / 2, (y0 + y1) / 2)
+        return tuple(b + OPTICAL_WEIGHT * (c - b) for b, c in zip(box, self.centroid))
+
+    @property
+    def offset(self):
+        """光学的な中心をキャンバスの中心に合わせるための移動量 (dx, dy)"""
+        width, height = self.size
+        cx, cy = self.optical_center
+        return width / 2 - cx, height / 2 - cy
+
+    def __repr__(self):
+        return (f"Measurement(centroid={self.centroid}, bounds={self.bounds}, "
+                f"extent={self.extent:.1f}, background={self.background})")
+
+
+def artwork_weight(pixels):
+    """各ピクセルが絵柄である度合い（0〜1）と背景色（外周が透明なら None）"""
+    alpha = pixels[..., 3].astype(np.float32) / 255
+    analysis = palette.analyze(pixels)
+    border = np.concatenate([alpha[0], alpha[-1], alpha[:, 0], alpha[:, -1]])
+    if border.mean() < 0.5 or analysis.background is None:
+        return alpha, None
+    foreground = analysis.foreground or recolor.WHITE_COLOR
+    level = blend_levels(pixels, analysis.background, foreground).astype(np.float32) / 255
+    return level * alpha, analysis.background
+
+
+@profiling.profiled('measure')
+def measure(pixels, threshold=DEFAULT_THRESHOLD):
+    """絵柄の重心・外接矩形・光学的な中心から最も遠い点までの距離を求める"""
+    height, width = pixels.shape[:2]
+    weight, background = artwork_weight(pixels)
+    total = float(weight.sum())
+    if total == 0:
+        return Measurement((width, height), (width / 2, height / 2), (0, 0, width, height),
+                           float(np.hypot(width, height) / 2), background)
+
+    # 重心は行・列ごとの合計との内積で求める（画素の中心は +0.5）
+    centroid = (float(weight.sum(axis=0) @ (np.arange(width) + 0.5) / total),
+                float(weight.sum(axis=1) @ (np.arange(height) + 0.5) / total))
+    mask = weight >= threshold
+    if not mask.any():
+        mask = weight > 0
+    cols = np.flatnonzero(mask.any(axis=0))
+    rows = np.flatnonzero(mask.any(axis=1))
+    bounds = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+    measurement = Measurement((width, height), centroid, bounds, 0.0, background)
+    cx, cy = measurement.optical_center
+    ys, xs = np.nonzero(mask)
+    # 画素の四隅まで含めるため、中心までの距離に半画素の対角を足す
+    measurement.extent = float(np.hypot(xs + 0.5 - cx, ys + 0.5 - cy).max() + np.sqrt(0.5))
+    return measurement
+
+
+def _composite(pixels, fill):
+    """fill の色の上に重ねる（fill が None なら透明のまま）"""
+    if fill is None:
+        return pixels
+    alpha = pixels[..., 3:].astype(np.float32) / 255
+    out = np.empty_like(pixels)
+    out[..., :3] = np.rint(pixels[..., :3] * alpha + np.array(fill, np.float32) * (1 - alpha))
+    out[..., 3] = 255
+    return out
+
+
+@profiling.profiled('fit')
+def fit(pixels, size, mode='normal', measurement=None, fill='auto', pyramid=None):
+    """size x size のキャンバスに、絵柄を中心に合わせて（必要ならセーフゾーンに収めて）配置する
+
+    fill は余白の色。'auto' なら背景色（外周が透明なアイコンでは、通常は透明・
+    マスカブル/アダプティブは白）で塗る。
+    縮小はリニア光で行う。pixels から作った pyramid.Pyramid を渡すと複数のサイズで使い回す。
+    """
+    if mode not in SAFE_ZONES:
+        raise ValueError(f"不明なモードです: {mode}（{', '.join(SAFE_ZONES)} から選択）")
+    measurement = measurement or measure(pixels)
+    height, width = pixels.shape[:2]
+    if fill == 'auto':
+        fill = measurement.background
+        if fill is None and SAFE_ZONES[mode]:
+            fill = recolor.WHITE_COLOR
+
+    scale = size / max(width, height)
+    if SAFE_ZONES[mode]:
+        scale = SAFE_ZONES[mode] * size / measurement.extent
+    scaled_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if scaled_size != (width, height):
+        scaled = (pyramid or linear_pyramid.Pyramid(pixels)).resize(*scaled_size)
+    else:
+        scaled = np.asarray(pixels)
+    sx, sy = scaled_size[0] / width, scaled_size[1] / height
+
+    # 光学的な中心が出力の中心に来る位置（整数部分は配置、端数はサブピクセル移動）
+    cx, cy = measurement.optical_center
+    ox, oy = size / 2 - cx * sx, size / 2 - cy * sy
+    ix, iy = int(np.floor(ox)), int(np.floor(oy))
+    pad = geometry.LANCZOS_RADIUS
+    padded = np.zeros((scaled.shape[0] + 2 * pad, scaled.shape[1] + 2 * pad, 4), dtype=np.uint8)
+    padded[pad:-pad, pad:-pad] = scaled
+    if (ox - ix) or (oy - iy):
+        padded = geometry.translate(padded, ox - ix, oy - iy, fill='transparent')
+
+    canvas = np.zeros((size, size, 4), dtype=np.uint8)
+    left, top = ix - pad, iy - pad
+    src_x0, src_y0 = max(-left, 0), max(-top, 0)
+    dst_x0, dst_y0 = max(left, 0), max(top, 0)
+    w = min(padded.shape[1] - src_x0, size - dst_x0)
+    h = min(padded.shape[0] - src_y0, size - dst_y0)
+    if w > 0 and h > 0:
+        canvas[dst_y0:dst_y0 + h, dst_x0:dst_x0 + w] = padded[src_y0:src_y0 + h, src_x0:src_x0 + w]
+    return _composite(canvas, fill)
+
+
+def fit_all(pixels, requests):
+    """[(サイズ, モード), ...] のすべてを1回の計測から作り、{(サイズ, モード): 配列} を返す"""
+    measurement = measure(pixels)
+    chain = linear_pyramid.Pyramid(pixels)
+    return {(size, mode): fit(pixels, size, mode, measurement, pyramid=chain) for size, mode in requests}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='アイコンの自動センタリングとセーフゾーンへのフィット')
+    parser.add_argument('master', nargs='?', default='waselab_icon.png', help='マスター画像')
+    parser.add_argument('--size', type=int, help='出力の一辺のピクセル数（既定: マスターと同じ）')
+    parser.add_argument('--mode', default='normal', choices=list(SAFE_ZONES), help='配置の方法')
+    parser.add_argument('-o', '--output', help='出力先（省略時は計測結果の表示のみ）')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'fit'):
+        pixels = raster.load(args.master)
+        measurement = measure(pixels)
+        dx, dy = measurement.offset
+        print(f"重心: ({measurement.centroid[0]:.1f}, {measurement.centroid[1]:.1f})")
+        print(f"外接矩形: {measurement.bounds}")
+        print(f"光学的な中心: ({measurement.optical_center[0]:.1f}, {measurement.optical_center[1]:.1f})"
+              f" → 中心までの移動量 ({dx:+.1f}, {dy:+.1f}) px")
+        print(f"中心からの広がり: {measurement.extent:.1f} px（一辺の {measurement.extent / max(pixels.shape[:2]):.0%}）")
+        if args.output:
+            out = fit(pixels, args.size or max(pixels.shape[:2]), args.mode, measurement)
+            write_if_changed(args.output, encode_png(recolor.to_image(out)))
+            print(f"保存しました: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+アイコンの平行移動（サブピクセル対応）
+
+整数ピクセルの移動はスライスのコピー1回で行い、
+0.5px のような小数の移動は分離可能な Lanczos カーネルで縦横それぞれ再サンプリングする。
+"""
+
+import math
+
+import numpy as np
+
+# Lanczos カーネルの半径（タップ数は 2 * LANCZOS_RADIUS）
+LANCZOS_RADIUS = 3
+
+FILL_MODES = ('auto', 'transparent', 'edge')
+
+
+def _resolve_fill(pixels, fill):
+    """'auto' の場合、RGBAなら透明・それ以外なら端の色の複製にする"""
+    if fill not in FILL_MODES:
+        raise ValueError(f"不明な塗りつぶし方法です: {fill}（{', '.join(FILL_MODES)} から選択）")
+    if fill == 'auto':
+        return 'transparent' if pixels.ndim == 3 and pixels.shape[2] == 4 else 'edge'
+    return fill
+
+
+def _lanczos(x):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.sinc(x) * np.sinc(x / LANCZOS_RADIUS)
+    return np.where(np.abs(x) < LANCZOS_RADIUS, out, 0.0)
+
+
+def _along(ndim, axis, start, stop):
+    """axis 方向だけを start:stop で切り出すインデックス"""
+    key = [slice(None)] * ndim
+    key[axis] = slice(start, stop)
+    return tuple(key)
+
+
+def _shift_integer(pixels, offset, axis, fill):
+    """axis 方向に整数 offset だけ移動（空いた部分は fill で埋める）"""
+    size = pixels.shape[axis]
+    if offset == 0:
+        return pixels.copy()
+    out = np.zeros_like(pixels) if fill == 'transparent' else np.empty_like(pixels)
+
+    def index(start, stop):
+        return _along(pixels.ndim, axis, start, stop)
+
+    if abs(offset) >= size:
+        if fill == 'edge':
+            out[...] = pixels[index(0, 1)] if offset > 0 else pixels[index(size - 1, size)]
+        return out
+
+    if offset > 0:
+        out[index(offset, None)] = pixels[index(None, size - offset)]
+        if fill == 'edge':
+            out[index(None, offset)] = pixels[index(0, 1)]
+    else:
+        out[index(None, offset)] = pixels[index(-offset, None)]
+        if fill == 'edge':
+            out[index(offset, None)] = pixels[index(size - 1, size)]
+    return out
+
+
+def _shift_fractional(values, offset, axis, fill):
+    """axis 方向に小数 offset だけ移動（values は float の配列）"""
+    size = values.shape[axis]
+    # 出力 x は入力の x - offset の位置をサンプリングする
+    base = math.floor(-offset)
+    frac = -offset - base
+    taps = np.arange(1 - LANCZOS_RADIUS, LANCZOS_RADIUS + 1)
+    weights = _lanczos(frac - taps)
+    weights = (weights / weights.sum()).astype(values.dtype)
+
+    pad = abs(base) + LANCZOS_RADIUS
+    widths = [(0, 0)] * values.ndim
+    widths[axis] = (pad, pad)
+    padded = np.pad(values, widths, mode='constant' if fill == 'transparent' else 'edge')
+
+    out = np.zeros_like(values)
+    for tap, weight in zip(taps, weights):
+        start = pad + base + tap
+        out += weight * padded[_along(values.ndim, axis, start, start + size)]
+    return out
+
+
+def translate(pixels, dx, dy=0, fill='auto'):
+    """画像を (dx, dy) ピクセル移動した配列を返す
+
+    dx, dy は小数も指定できる（正の値で右・下に移動）。
+    fill は画像の外から入ってくる部分の扱い:
+      - 'transparent': 透明（0）で埋める
+      - 'edge': 端の色を複製する
+      - 'auto': RGBAなら 'transparent'、それ以外なら 'edge'
+    """
+    fill = _resolve_fill(pixels, fill)
+    int_dx, int_dy = float(dx).is_integer(), float(dy).is_integer()
+    if int_dx and int_dy:
+        out = _shift_integer(pixels, int(dx), 1, fill)
+        return _shift_integer(out, int(dy), 0, fill)
+
+    has_alpha = pixels.ndim == 3 and pixels.shape[2] == 4
+    values = pixels.astype(np.float32)
+    if has_alpha:
+        # 透明な部分の色が混ざらないよう、乗算済みアルファで補間する
+        values[..., :3] *= values[..., 3:] / 255
+
+    for offset, axis, is_int in ((dx, 1, int_dx), (dy, 0, int_dy)):
+        if is_int:
+            values = _shift_integer(values, int(offset), axis, fill)
+        else:
+            values = _shift_fractional(values, offset, axis, fill)
+
+    if has_alpha:
+        alpha = values[..., 3:]
+        values[..., :3] = np.divide(values[..., :3] * 255, alpha,
+                                    out=np.zeros_like(values[..., :3]), where=alpha > 0)
+    return np.clip(np.rint(values), 0, 255).astype(pixels.dtype)
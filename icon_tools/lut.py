@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+3D カラー LUT（ルックアップテーブル）による色変換
+
+色の対応を「アンカー（元の色 → 変換後の色）」の組で一度だけ記述し、
+OKLab 空間で補間して 33x33x33 の LUT にコンパイルする。
+コンパイル結果はディスクにキャッシュする。さらに LUT ごとに、24 ビットの全色を
+三線形補間した変換結果の表（2^24 要素）を一度だけ作ってキャッシュし、画像への適用は
+表からの1回の取り出しで済ませる（タイル処理で何度呼ばれても補間し直さない）。
+表の代償は、マッピング1つにつきメモリ 64 MB（プロセス内に MAX_TABLES 個まで）と
+ディスク 64 MB（.icon_cache/luts/<ハッシュ>.table.npy）で、初回の作成に約 0.8 秒かかる。
+
+swap_colors_hq.py のような分岐（明度 > 200、r > g かつ r > b など）を
+ピクセルごとに評価する代わりに、どのアイコン・どのサイズにも同じ LUT を使い回せる。
+
+マッピングの定義（JSON）:
+    {
+      "space": "oklab",
+      "power": 2,
+      "radius": 0.25,
+      "anchors": [
+        [[255, 255, 255], [140, 34, 51]],
+        [[140, 34, 51], [255, 255, 255]]
+      ]
+    }
+
+使い方:
+    python -m icon_tools.lut mapping.json waselab_icon_original.png -o waselab_icon.png
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from icon_tools import __version__, profiling, raster, recolor
+from icon_tools.cache import encode_png, write_if_changed
+
+DEFAULT_SIZE = 33
+DEFAULT_CACHE_DIR = os.path.join('.icon_cache', 'luts')
+SPACES = ('oklab', 'srgb')
+
+# アンカーの影響が及ぶ目安の距離（色空間ごとの単位）
+DEFAULT_RADIUS = {'oklab': 0.25, 'srgb': 64.0}
+
+# 同じプロセス内でコンパイル済みの LUT（タイル処理で何度も呼ばれるため）
+_compiled = {}
+
+# 同じプロセス内で使った全色の表（LUT の内容のハッシュ → 表）。1つ 64 MB なので新しいものだけ残す
+_tables = {}
+MAX_TABLES = 2
+
+
+def srgb_to_oklab(rgb):
+    """sRGB（0〜255）を OKLab に変換"""
+    c = np.asarray(rgb, dtype=np.float64) / 255
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    lms = linear @ np.array([
+        [0.4122214708, 0.2119034982, 0.0883024619],
+        [0.5363325363, 0.6806995451, 0.2817188376],
+        [0.0514459929, 0.1073969566, 0.6299787005],
+    ])
+    return np.cbrt(lms) @ np.array([
+        [0.2104542553, 1.9779984951, 0.0259040371],
+        [0.7936177850, -2.4285922050, 0.7827717662],
+        [-0.0040720468, 0.4505937099, -0.8086757660],
+    ])
+
+
+def oklab_to_srgb(lab):
+    """OKLab を sRGB（0〜255 の float）に変換"""
+    lms = np.asarray(lab, dtype=np.float64) @ np.array([
+        [1.0, 1.0, 1.0],
+        [0.3963377774, -0.1055613458, -0.0894841775],
+        [0.2158037573, -0.0638541728, -1.2914855480],
+    ])
+    linear = (lms ** 3) @ np.array([
+        [4.0767416621, -1.2684380046, -0.0041960863],
+        [-3.3077115913, 2.6097574011, -0.7034186147],
+        [0.2309699292, -0.3413193965, 1.7076147010],
+    ])
+    linear = np.clip(linear, 0, 1)
+    c = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return c * 255
+
+
+def _to_space(rgb, space):
+    return srgb_to_oklab(rgb) if space == 'oklab' else np.asarray(rgb, dtype=np.float64)
+
+
+def _from_space(values, space):
+    return oklab_to_srgb(values) if space == 'oklab' else values
+
+
+def swap_mapping(enji_color=recolor.ENJI_COLOR):
+    """白とえんじ色を入れ替えるマッピング（swap_colors_hq.py 相当）"""
+    enji = [int(c) for c in enji_color[:3]]
+    return {
+        'space': 'oklab',
+        'power': 2,
+        'anchors': [
+            [list(recolor.WHITE_COLOR), enji],
+            [enji, list(recolor.WHITE_COLOR)],
+        ],
+    }
+
+
+def load_mapping(path):
+    """JSON のマッピング定義を読み込む"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _validate(mapping):
+    space = mapping.get('space', 'oklab')
+    if space not in SPACES:
+        raise ValueError(f"不明な色空間です: {space}（{', '.join(SPACES)} から選択）")
+    anchors = mapping.get('anchors') or []
+    if not anchors:
+        raise ValueError("anchors に1組以上の色の対応を指定してください")
+    for pair in anchors:
+        if len(pair) != 2 or any(len(color) != 3 for color in pair):
+            raise ValueError(f"アンカーは [[R, G, B], [R, G, B]] の形式で指定してください: {pair}")
+    radius = float(mapping.get('radius', DEFAULT_RADIUS[space]))
+    return space, np.array(anchors, dtype=np.float64), float(mapping.get('power', 2)), radius
+
+
+def mapping_key(mapping, size=DEFAULT_SIZE):
+    """マッピング定義・LUTのサイズ・ツールのバージョンから決まるキー"""
+    payload = json.dumps({'mapping': mapping, 'size': size, 'version': __version__}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+@profiling.profiled('compile_lut')
+def compile_mapping(mapping, size=DEFAULT_SIZE):
+    """マッピングを (size, size, size, 3) の LUT にコンパイル
+
+    格子点の色を指定の色空間に変換し、各アンカーでの色の移動量を
+    距離の power 乗の逆数で重み付けして平均する（Shepard 補間）。
+    アンカーの色そのものは必ず指定した色に変換され、
+    どのアンカーからも radius より遠い色はあまり動かない。
+    """
+    space, anchors, power, radius = _validate(mapping)
+    src = _to_space(anchors[:, 0], space)
+    dst = _to_space(anchors[:, 1], space)
+
+    axis = np.linspace(0, 255, size)
+    grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+    points = _to_space(grid, space)
+
+    distances = np.linalg.norm(points[:, None, :] - src[None, :, :], axis=2)
+    exact = distances < 1e-9
+    weights = 1 / np.maximum(distances, 1e-9) ** power
+    # アンカーと一致する格子点はそのアンカーだけを使う
+    weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+    # 「動かさない」重みを加え、どのアンカーからも遠い色はほぼそのまま残す
+    keep = np.where(exact.any(axis=1), 0.0, 1 / radius ** power)
+    weights /= (weights.sum(axis=1) + keep)[:, None]
+
+    mapped = points + weights @ (dst - src)
+    rgb = np.clip(_from_space(mapped, space), 0, 255)
+    return rgb.reshape(size, size, size, 3).astype(np.float32)
+
+
+def get_lut(mapping, size=DEFAULT_SIZE, cache_dir=DEFAULT_CACHE_DIR):
+    """コンパイル済みの LUT を返す（プロセス内とディスクにキャッシュする）"""
+    key = mapping_key(mapping, size)
+    if key in _compiled:
+        return _compiled[key]
+    path = os.path.join(cache_dir, f'{key}.npy') if cache_dir else None
+    if path and os.path.exists(path):
+        lut = np.load(path)
+    else:
+        lut = compile_mapping(mapping, size)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, lut)
+    _compiled[key] = lut
+    return lut
+
+
+def _axis(size):
+    """0〜255 の値を格子の座標に変換した、下側の格子点と端数"""
+    position = np.arange(256, dtype=np.float32) * np.float32((size - 1) / 255)
+    base = np.minimum(position.astype(np.intp), size - 2)
+    return base, (position - base)[:, None]
+
+
+@profiling.profiled('lut_table')
+def build_table(lut, chunk=16):
+    """24 ビットの全色（pack した値の下位 24 ビット）を添字にした、変換後の色の表
+
+    三線形補間は軸ごとに分けられるので、R・G の軸は格子のまま補間しておき、
+    B の値 chunk 個ごとに 256x256 色をまとめて計算する。値は pack した RGB（アルファは 0）。
+    """
+    size = lut.shape[0]
+    base, frac = _axis(size)
+    # R 軸 → G 軸の順に補間し、表と同じ [B 格子, g, r] の並びにする
+    weight = frac[:, :, None, None]
+    along_r = lut[base] * (1 - weight) + lut[base + 1] * weight
+    along_g = along_r[:, base] * (1 - frac)[:, None] + along_r[:, base + 1] * frac[:, None]
+    along_g = np.ascontiguousarray(along_g.transpose(2, 1, 0, 3))
+
+    table = np.empty(1 << 24, dtype=recolor.pack_color((0, 0, 0, 0)).dtype)
+    # pack した値はバイト順に R・G・B・A なので、添字は [b, g, r]
+    channels = table.view(np.uint8).reshape(256, 256, 256, 4)
+    channels[..., 3] = 0
+    for start in range(0, 256, chunk):
+        b = slice(start, start + chunk)
+        weight = frac[b][:, :, None, None]
+        channels[b, :, :, :3] = np.rint(along_g[base[b]] * (1 - weight) + along_g[base[b] + 1] * weight)
+    return table
+
+
+def get_table(lut, cache_dir=DEFAULT_CACHE_DIR):
+    """lut の全色の表（プロセス内とディスクにキャッシュする）
+
+    ディスクのキャッシュはメモリマップで開くので、小さな画像では使う色のページしか読まない。
+    """
+    key = hashlib.sha256(np.ascontiguousarray(lut).tobytes()).hexdigest()[:16]
+    table = _tables.pop(key, None)
+    if table is None:
+        path = os.path.join(cache_dir, f'{key}.table.npy') if cache_dir else None
+        if path and os.path.exists(path):
+            table = np.load(path, mmap_mode='r')
+        else:
+            table = build_table(lut)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                temporary = f'{path}.{os.getpid()}.tmp.npy'
+                np.save(temporary, table)
+                os.replace(temporary, path)
+    _tables[key] = table
+    while len(_tables) > MAX_TABLES:
+        _tables.pop(next(iter(_tables)))
+    return table
+
+
+@profiling.profiled('apply_lut')
+def apply(pixels, lut):
+    """LUT を適用（アルファは保持し、透明なピクセルはそのまま）
+
+    全色の表（get_table）から1回の取り出しで変換するので、ピクセル数に比例した時間で済む。
+    """
+    packed = recolor.pack(pixels)
+    table = get_table(lut)
+    out = table[packed & recolor.pack_color((255, 255, 255, 0))] | (packed & recolor.pack_color((0, 0, 0, 255)))
+    out = np.where(packed > 0x00FFFFFF, out, packed)
+    return recolor.unpack(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='3D LUT による色変換')
+    parser.add_argument('mapping', help="マッピング定義の JSON（'swap' で白とえんじ色の入れ替え）")
+    parser.add_argument('source', help='元画像')
+    parser.add_argument('-o', '--output', required=True, help='出力先')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='LUT の格子数')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'lut'):
+        mapping = swap_mapping() if args.mapping == 'swap' else load_mapping(args.mapping)
+        try:
+            lut = get_lut(mapping, args.size)
+        except ValueError as e:
+            parser.error(str(e))
+        # その場で上書きせず一時ファイルから置き換える（ハードリンクしたバックアップを壊さない）
+        write_if_changed(args.output, encode_png(recolor.to_image(apply(raster.load(args.source), lut))))
+        print(f"保存しました: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
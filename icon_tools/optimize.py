@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+PNG のファイルサイズの最適化（可逆）
+
+ピクセルを変えずにファイルを小さくするため、1ファイルにつき次の組み合わせを試す。
+  - 表現: RGB（すべて不透明な場合）/ グレースケール / RGBA のうち最小のものと、
+    256色以下ならパレット
+  - 行フィルタ: None, Sub, Up, Average, Paeth と行ごとの自動選択
+  - zlib: 戦略（標準・Z_FILTERED・Z_RLE・Z_HUFFMAN_ONLY）、圧縮レベル、memLevel
+フィルタは NumPy で画像全体に一度に掛け、高速な圧縮で絞った候補についてだけ zlib の
+設定を探す（すべての組み合わせは試さず、1つずつ変えて小さくなった方を残す）。
+最も小さい候補をデコードして元と同じピクセルになることを確かめてから置き換え、
+元より小さくならなければファイルはそのままにする。
+
+複数のファイルはプロセスプールで並列に処理する。
+最適化済みのファイルはハッシュをマニフェストに記録し、次回からは読み飛ばす。
+
+使い方:
+    python -m icon_tools.optimize                 # iOS / Android / Web のアイコン一式
+    python -m icon_tools.optimize web/favicon.png assets/icons/app_icon.png
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import io
+import os
+import struct
+import time
+import zlib
+
+from PIL import Image
+import numpy as np
+
+from icon_tools import profiling, recolor
+from icon_tools.cache import DEFAULT_MANIFEST, Manifest, write_if_changed
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 色の解釈に関わるため、最適化後も残す補助チャンク
+KEEP_CHUNKS = (b'iCCP', b'sRGB', b'gAMA', b'cHRM')
+
+FILTER_NAMES = ('none', 'sub', 'up', 'average', 'paeth', 'adaptive')
+
+# zlib の設定を探すフィルタの数（残りは高速な圧縮の比較で落とす）
+_FINALISTS = 2
+
+_STRATEGIES = {
+    'default': zlib.Z_DEFAULT_STRATEGY,
+    'filtered': zlib.Z_FILTERED,
+    'rle': zlib.Z_RLE,
+    'huffman': zlib.Z_HUFFMAN_ONLY,
+}
+
+# 最良の設定から1つずつ変えて試す圧縮レベルと memLevel（9 が最初に試す値）
+_LEVELS = (8, 7, 6)
+_MEM_LEVELS = (8,)
+
+
+def _chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def read_chunks(data):
+    """PNG のバイト列を (種類, 内容) のリストに分解"""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("PNG ファイルではありません")
+    chunks = []
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        length, = struct.unpack('>I', data[offset:offset + 4])
+        kind = data[offset + 4:offset + 8]
+        chunks.append((kind, data[offset + 8:offset + 8 + length]))
+        offset += length + 12
+    return chunks
+
+
+def filter_rows(rows, bpp, method):
+    """(高さ, 行のバイト数) の配列に PNG の行フィルタを掛け、先頭にフィルタ番号を付ける
+
+    method は 0〜4（None, Sub, Up, Average, Paeth）か 5（行ごとに最適なものを選ぶ）。
+    """
+    rows = rows.astype(np.int16)
+    up = np.zeros_like(rows)
+    up[1:] = rows[:-1]
+    left = np.zeros_like(rows)
+    left[:, bpp:] = rows[:, :-bpp]
+    upper_left = np.zeros_like(rows)
+    upper_left[:, bpp:] = up[:, :-bpp]
+
+    def paeth():
+        p = left + up - upper_left
+        pa, pb, pc = np.abs(p - left), np.abs(p - up), np.abs(p - upper_left)
+        return np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upper_left))
+
+    predictors = {
+        0: lambda: 0,
+        1: lambda: left,
+        2: lambda: up,
+        3: lambda: (left + up) >> 1,
+        4: paeth,
+    }
+
+    if method < 5:
+        filtered = (rows - predictors[method]()).astype(np.uint8)
+        kinds = np.full(len(rows), method, dtype=np.uint8)
+    else:
+        # 符号付きで見た絶対値の和が最小のフィルタを行ごとに選ぶ（libpng と同じ目安）
+        candidates = np.stack([(rows - predictors[m]()).astype(np.uint8) for m in range(5)])
+        cost = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+        kinds = cost.argmin(axis=0).astype(np.uint8)
+        filtered = candidates[kinds, np.arange(len(rows))]
+    return np.concatenate([kinds[:, None], filtered], axis=1)
+
+
+def _pack_bits(indices, depth):
+    """パレット番号を 1/2/4 ビットに詰める"""
+    if depth == 8:
+        return indices
+    per_byte = 8 // depth
+    height, width = indices.shape
+    padded = np.zeros((height, -(-width // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :width] = indices
+    groups = padded.reshape(height, -1, per_byte)
+    shifts = (8 - depth * (np.arange(per_byte) + 1)).astype(np.uint8)
+    return np.bitwise_or.reduce(groups << shifts, axis=2).astype(np.uint8)
+
+
+def representations(pixels):
+    """同じピクセルを表せる PNG の表現を (名前, IHDR の色の型, ビット深度, 行データ, bpp, 追加チャンク) で返す"""
+    height, width = pixels.shape[:2]
+    rgb, alpha = pixels[..., :3], pixels[..., 3]
+    opaque = bool((alpha == 255).all())
+    gray = bool(((rgb[..., 0] == rgb[..., 1]) & (rgb[..., 1] == rgb[..., 2])).all())
+
+    # 情報を落とさずに済む最も小さい形式だけを使う（RGB で足りるなら RGBA は試さない）
+    found = []
+    if gray and opaque:
+        found.append(('gray', 0, 8, rgb[..., 0], 1, []))
+    elif gray:
+        found.append(('gray+alpha', 4, 8, np.stack([rgb[..., 0], alpha], axis=-1).reshape(height, -1), 2, []))
+    elif opaque:
+        found.append(('rgb', 2, 8, rgb.reshape(height, -1), 3, []))
+    else:
+        found.append(('rgba', 6, 8, pixels.reshape(height, -1), 4, []))
+
+    packed = recolor.pack(pixels)
+    colors, inverse = np.unique(packed, return_inverse=True)
+    if len(colors) <= 256:
+        # 半透明な色を先頭に並べ、tRNS を最後の半透明な色までで打ち切る
+        order = np.argsort(colors >> 24 == 255, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        entries = recolor.unpack(colors[order])
+        indices = rank[inverse.reshape(height, width)].astype(np.uint8)
+        depth = next(d for d in (1, 2, 4, 8) if len(colors) <= 1 << d)
+        extra = [(b'PLTE', entries[:, :3].tobytes())]
+        translucent = int((entries[:, 3] < 255).sum())
+        if translucent:
+            extra.append((b'tRNS', entries[:translucent, 3].tobytes()))
+        found.append((f'palette{len(colors)}', 3, depth, _pack_bits(indices, depth), 1, extra))
+    return found
+
+
+def _deflate(data, level, mem_level, strategy):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, mem_level, _STRATEGIES[strategy])
+    return compressor.compress(data) + compressor.flush()
+
+
+def search_deflate(filtered, trial):
+    """フィルタ済みの行データ {フィルタ番号: bytes} について zlib の設定を探す
+
+    trial は有望な順のフィルタ番号。最も有望なフィルタで各戦略を比べ、残りのフィルタ・
+    memLevel・圧縮レベルを1つずつ変えて小さくなったものを残す。
+    {(フィルタ番号, レベル, memLevel, 戦略): 圧縮結果} を返す。
+    """
+    tried = {}
+
+    def attempt(method, level, mem_level, strategy):
+        key = (method, level, mem_level, strategy)
+        if key not in tried:
+            tried[key] = _deflate(filtered[method], level, mem_level, strategy)
+        return key
+
+    def best():
+        return min(tried, key=lambda key: len(tried[key]))
+
+    for strategy in _STRATEGIES:
+        attempt(trial[0], 9, 9, strategy)
+    method, level, mem_level, strategy = best()
+    for other in trial[1:_FINALISTS]:
+        attempt(other, level, mem_level, strategy)
+    # ハフマン符号だけの圧縮は一致を探さないので、レベルと memLevel では変わらない
+    if strategy != 'huffman':
+        method, level, mem_level, strategy = best()
+        for candidate in _MEM_LEVELS:
+            attempt(method, level, candidate, strategy)
+        method, level, mem_level, strategy = best()
+        for candidate in _LEVELS:
+            attempt(method, candidate, mem_level, strategy)
+    return tried
+
+
+def _encode(width, height, color_type, depth, idat, extra, keep):
+    header = struct.pack('>IIBBBBB', width, height, depth, color_type, 0, 0, 0)
+    parts = [PNG_SIGNATURE, _chunk(b'IHDR', header)]
+    parts += [_chunk(kind, body) for kind, body in keep]
+    parts += [_chunk(kind, body) for kind, body in extra]
+    parts += [_chunk(b'IDAT', idat), _chunk(b'IEND', b'')]
+    return b''.join(parts)
+
+
+@profiling.profiled('candidates')
+def candidates(pixels, keep=()):
+    """(PNGのバイト列, 説明) の候補を列挙
+
+    zlib の高いレベルは遅いため、フィルタは高速な圧縮での大きさで上位に絞り、
+    zlib の設定はその中で search_deflate で探す。
+    """
+    height, width = pixels.shape[:2]
+    for name, color_type, depth, rows, bpp, extra in representations(pixels):
+        filtered = {m: filter_rows(rows, bpp, m).tobytes() for m in range(len(FILTER_NAMES))}
+        trial = sorted(filtered, key=lambda m: len(zlib.compress(filtered[m], 1)))
+        for (method, level, mem_level, strategy), idat in search_deflate(filtered, trial).items():
+            data = _encode(width, height, color_type, depth, idat, extra, keep)
+            memory = f'/mem{mem_level}' if mem_level != 9 else ''
+            yield data, f'{name}, {FILTER_NAMES[method]}, zlib{level}/{strategy}{memory}'
+
+
+@profiling.profiled('decode')
+def decode(data):
+    """PNG のバイト列を RGBA の配列にデコード"""
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert('RGBA'))
+
+
+@profiling.profiled('optimize_png')
+def optimize_bytes(data):
+    """PNG を最適化し、(バイト列, 説明) を返す（小さくならなければ元のバイト列と None）"""
+    chunks = read_chunks(data)
+    header = chunks[0][1]
+    if header[8] == 16:
+        # 16ビットの PNG は RGBA に変換すると情報が落ちるため対象外
+        return data, None
+    keep = [(kind, body) for kind, body in chunks if kind in KEEP_CHUNKS]
+    pixels = decode(data)
+
+    for candidate, method in sorted(candidates(pixels, keep), key=lambda c: len(c[0])):
+        if len(candidate) >= len(data):
+            break
+        if np.array_equal(decode(candidate), pixels):
+            return candidate, method
+    return data, None
+
+
+def optimize_file(path):
+    """ファイルを最適化して (パス, 元のバイト数, 最適化後のバイト数, 説明) を返す"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    optimized, method = optimize_bytes(data)
+    if method:
+        write_if_changed(path, optimized)
+    return path, len(data), len(optimized), method
+
+
+def optimize_files(paths, jobs=None):
+    """複数のファイルを並列に最適化（大きいファイルから先に投入する）"""
+    paths = sorted(paths, key=os.path.getsize, reverse=True)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return [optimize_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(optimize_file, paths))
+
+
+@profiling.profiled('optimize')
+def optimize_outputs(paths, manifest, jobs=None, force=False):
+    """マニフェストで最適化済みでないファイルだけを最適化し、マニフェストを更新する"""
+    if not force:
+        paths = [path for path in paths if not manifest.is_optimized(path)]
+    results = optimize_files(paths, jobs)
+    for path, _, _, _ in results:
+        manifest.mark_optimized(path)
+    return results
+
+
+def _format_size(size):
+    return f"{size / 1024:.1f} KB"
+
+
+def report(results):
+    """ファイルごとの削減量と合計を表示"""
+    for path, before, after, method in results:
+        if method:
+            print(f"  {path}: {_format_size(before)} → {_format_size(after)}"
+                  f"（-{before - after} バイト, {1 - after / before:.0%} 減, {method}）")
+        else:
+            print(f"  {path}: {_format_size(before)}（これ以上小さくなりませんでした）")
+    before = sum(r[1] for r in results)
+    after = sum(r[2] for r in results)
+    if before:
+        print(f"合計: {_format_size(before)} → {_format_size(after)}"
+              f"（{before - after} バイト削減, {1 - after / before:.0%} 減）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PNG を可逆に最適化してファイルサイズを減らす')
+    parser.add_argument('paths', nargs='*', help='最適化する PNG（省略時は各プラットフォームのアイコン一式）')
+    parser.add_argument('--root', default='.', help='Flutter プロジェクトのルート')
+    parser.add_argument('-j', '--jobs', type=int, help='並列数（既定: CPU数）')
+    parser.add_argument('--force', action='store_true', help='最適化済みのファイルも試し直す')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'optimize'):
+        paths = args.paths
+        if not paths:
+            from icon_tools.platforms import all_targets
+            paths = [target.path for target in all_targets(args.root) if os.path.exists(target.path)]
+
+        start = time.perf_counter()
+        manifest = Manifest(os.path.join(args.root, DEFAULT_MANIFEST))
+        results = optimize_outputs(paths, manifest, args.jobs, args.force)
+        manifest.save()
+
+        report(results)
+        print(f"{len(paths)} 件のうち {len(results)} 件を処理しました（{time.perf_counter() - start:.2f} 秒）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+アイコンの配色の分析（ヒストグラム方式）
+
+不透明なピクセルを RGBA を詰めた uint32 から RGB 各5ビットに量子化したビンに振り分け、
+np.bincount でピクセル数と色の合計を1パスで集計する。
+ピクセル数の多いビンから主要な色をまとめ（クラスタリング）、
+背景色・前景色・エッジ（中間色）とそれぞれの面積比を求める。
+
+走査順に依存しないので、swap_colors.py の「最初に見つかったえんじ色」のように
+結果が画像の向きや1ピクセルのノイズで変わることがない。
+
+使い方:
+    python -m icon_tools.palette waselab_icon.png
+"""
+
+import argparse
+
+import numpy as np
+
+from icon_tools import profiling, recolor
+
+_BITS = 5
+_BINS = 1 << (3 * _BITS)
+
+# 同じ色とみなす RGB のユークリッド距離
+DEFAULT_TOLERANCE = 40.0
+
+# クラスタの中心の候補にするビンの数
+_SEED_BINS = 64
+
+
+def _bin_key(packed):
+    """RGBA を詰めた uint32 から、各チャンネルの上位5ビットを並べたビン番号を作る"""
+    return (((packed >> 3) & 0x1F) | ((packed >> 6) & 0x3E0) | ((packed >> 9) & 0x7C00)).astype(np.intp)
+
+
+class Histogram:
+    """量子化した色ごとのピクセル数と色の合計（帯ごとに足し合わせられる）"""
+
+    def __init__(self):
+        self.counts = np.zeros(_BINS, dtype=np.int64)
+        self.sums = np.zeros((_BINS, 3), dtype=np.float64)
+        self.border = np.zeros(_BINS, dtype=np.int64)
+        self.transparent = 0
+        self.total = 0
+
+    def add(self, pixels, border_rows=(), border_cols=True):
+        """pixels を集計に加える
+
+        border_rows は画像の上端・下端にあたる行（pixels 内の行番号）、
+        border_cols が True なら左右の列も画像の外周として数える。
+        """
+        packed = recolor.pack(pixels)
+        opaque = packed > 0x00FFFFFF
+        key = _bin_key(packed)
+        rgb = pixels[..., :3]
+
+        selected = key[opaque]
+        self.counts += np.bincount(selected, minlength=_BINS)
+        for c in range(3):
+            self.sums[:, c] += np.bincount(selected, weights=rgb[..., c][opaque], minlength=_BINS)
+        self.transparent += int(opaque.size - selected.size)
+        self.total += int(opaque.size)
+
+        edge = np.zeros(opaque.shape, dtype=bool)
+        edge[list(border_rows)] = True
+        if border_cols:
+            edge[:, [0, -1]] = True
+        edge &= opaque
+        self.border += np.bincount(key[edge], minlength=_BINS)
+        return self
+
+
+class Palette:
+    """配色の分析結果"""
+
+    def __init__(self, background, foreground, edge, shares, clusters, accent=None):
+        self.background = background
+        self.foreground = foreground
+        self.edge = edge
+        self.shares = shares
+        self.clusters = clusters
+        self._accent = accent
+
+    def _brand(self):
+        """背景色と前景色（クラスタの平均）のうち白から遠い方"""
+        colors = [c for c in (self.background, self.foreground) if c is not None]
+        if not colors:
+            return None
+        return max(colors, key=lambda c: sum((255 - v) ** 2 for v in c))
+
+    @property
+    def accent(self):
+        """ブランドカラー（背景色と前景色のうち白から遠い方のクラスタで、最も多い (R, G, B, A)）
+
+        クラスタの平均は画像にない色になりうるので、実際のピクセルの色を返す。
+        swap_colors.py が見つけたピクセルの色を使っていたのと同じく、アルファも含む。
+        """
+        if self._accent is not None:
+            return self._accent
+        return self._brand() or recolor.ENJI_COLOR
+
+    @property
+    def base(self):
+        """背景色と前景色のうちブランドカラーでない方（白地など）"""
+        brand = self._brand()
+        return self.foreground if brand == self.background else self.background
+
+    def __repr__(self):
+        return (f"Palette(background={self.background}, foreground={self.foreground}, "
+                f"edge={self.edge}, shares={self.shares})")
+
+
+def histogram(pixels, tile=None):
+    """ヒストグラムを作成（tile を指定すると tile 行ずつの帯に分けて集計する）"""
+    height = pixels.shape[0]
+    step = tile or height
+    hist = Histogram()
+    for y0 in range(0, height, step):
+        y1 = min(y0 + step, height)
+        rows = [r for r in (0, height - 1) if y0 <= r < y1]
+        hist.add(pixels[y0:y1], [r - y0 for r in rows])
+    return hist
+
+
+def _mode(pixels, bin_labels, label, tile=None):
+    """クラスタ label に属するピクセルのうち最も多い (R, G, B, A)（同数なら値の小さい方）"""
+    height = pixels.shape[0]
+    step = tile or height
+    totals = {}
+    for y0 in range(0, height, step):
+        packed = recolor.pack(pixels[y0:y0 + step])
+        selected = packed[(packed > 0x00FFFFFF) & (bin_labels[_bin_key(packed)] == label)]
+        values, counts = np.unique(selected, return_counts=True)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            totals[value] = totals.get(value, 0) + count
+    value = max(totals, key=lambda v: (totals[v], -v))
+    return tuple((value >> shift) & 0xFF for shift in (0, 8, 16, 24))
+
+
+def _cluster(hist, tolerance):
+    """ピクセル数の多いビンから順に、近い色をまとめてクラスタの中心を決める"""
+    nonzero = np.flatnonzero(hist.counts)
+    if nonzero.size == 0:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.intp), nonzero
+    means = hist.sums[nonzero] / hist.counts[nonzero, None]
+    order = np.argsort(hist.counts[nonzero])[::-1]
+
+    centers = []
+    for i in order[:_SEED_BINS]:
+        color = means[i]
+        if all(np.linalg.norm(color - c) > tolerance for c in centers):
+            centers.append(color)
+    centers = np.array(centers)
+
+    # 全ビンを最も近い中心に割り当て、重み付き平均で中心を更新する
+    distances = np.linalg.norm(means[:, None, :] - centers[None, :, :], axis=2)
+    labels = distances.argmin(axis=1)
+    weights = hist.counts[nonzero]
+    totals = np.bincount(labels, weights=weights, minlength=len(centers))
+    for c in range(3):
+        centers[:, c] = np.bincount(labels, weights=hist.sums[nonzero, c],
+                                    minlength=len(centers)) / np.maximum(totals, 1)
+    return centers, labels, nonzero
+
+
+@profiling.profiled('analyze')
+def analyze(pixels, tolerance=DEFAULT_TOLERANCE, tile=None):
+    """背景色・前景色・エッジの色と面積比を求める"""
+    hist = histogram(pixels, tile)
+    centers, labels, nonzero = _cluster(hist, tolerance)
+    if len(centers) == 0:
+        return Palette(None, None, None, {'transparent': 1.0}, [])
+
+    counts = np.bincount(labels, weights=hist.counts[nonzero], minlength=len(centers))
+    border = np.bincount(labels, weights=hist.border[nonzero], minlength=len(centers))
+    ranked = list(np.argsort(counts)[::-1])
+
+    # 主要な2色のうち、画像の外周に多く現れる方を背景とする
+    main = ranked[:2]
+    background_index = max(main, key=lambda i: (border[i], counts[i]))
+    foreground_index = next((i for i in main if i != background_index), None)
+
+    def rgb(index):
+        return None if index is None else tuple(int(round(v)) for v in centers[index])
+
+    # 背景色・前景色のどちらにも近くない色をエッジ（中間色）とする
+    means = hist.sums[nonzero] / hist.counts[nonzero, None]
+    solid = [centers[i] for i in main]
+    near = np.zeros(len(nonzero), dtype=bool)
+    for color in solid:
+        near |= np.linalg.norm(means - color, axis=1) <= tolerance
+    edge_counts = hist.counts[nonzero][~near]
+    edge_color = None
+    if edge_counts.sum():
+        edge_color = tuple(int(round(v)) for v in
+                           hist.sums[nonzero][~near].sum(axis=0) / edge_counts.sum())
+
+    near_bg = np.linalg.norm(means - centers[background_index], axis=1) <= tolerance
+    total = hist.total
+    shares = {
+        'background': float(hist.counts[nonzero][near_bg].sum() / total),
+        'foreground': float(hist.counts[nonzero][near & ~near_bg].sum() / total),
+        'edge': float(edge_counts.sum() / total),
+        'transparent': hist.transparent / total,
+    }
+    clusters = [(rgb(i), float(counts[i] / total)) for i in ranked]
+    result = Palette(rgb(background_index), rgb(foreground_index), edge_color, shares, clusters)
+
+    # ブランドカラーは、そのクラスタで最も多い実際の色にする
+    brand = background_index if result._brand() == result.background else foreground_index
+    bin_labels = np.full(_BINS, -1, dtype=np.intp)
+    bin_labels[nonzero] = labels
+    result._accent = _mode(pixels, bin_labels, brand, tile)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='アイコンの配色を分析')
+    parser.add_argument('image', help='分析する画像')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='同じ色とみなす距離')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'palette'):
+        palette = analyze(recolor.load_rgba(args.image), args.tolerance)
+        print(f"背景: {palette.background}（{palette.shares.get('background', 0):.1%}）")
+        print(f"前景: {palette.foreground}（{palette.shares.get('foreground', 0):.1%}）")
+        print(f"エッジ: {palette.edge}（{palette.shares.get('edge', 0):.1%}）")
+        print(f"透明: {palette.shares['transparent']:.1%}")
+        print("主要な色:")
+        for color, share in palette.clusters[:8]:
+            print(f"  {color}: {share:.1%}")
+
+
+if __name__ == '__main__':
+    main()
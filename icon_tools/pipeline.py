@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+アイコン変換パイプライン
+
+元画像を一度だけデコードし、メモリ上の配列に対して
+shift / invert / swap / blend / lut / sdf / resample / downscale の各ステージを順番に適用する。
+PNGへのエンコードは出力ごとに最後の1回だけ行う。
+
+使い方:
+    python -m icon_tools.pipeline waselab_icon_original.png \\
+        -s blend -s shift:dx=0.5 -s resample:scale=2 -o waselab_icon.png
+
+    # 1回のデコードから複数の配色を書き出す
+    python -m icon_tools.pipeline waselab_icon_original.png \\
+        --variant enji_bg=waselab_icon.png --variant inverted=waselab_icon_inverted.png
+"""
+
+import argparse
+
+from PIL import Image
+import numpy as np
+
+from icon_tools import (
+    geometry, lut as color_lut, palette, profiling, pyramid, raster, recolor, sdf as distance_field, tiled,
+)
+from icon_tools.cache import Manifest, encode_png, write_if_changed
+
+
+def shift(pixels, dx=1, dy=0, fill='transparent'):
+    """画像を (dx, dy) ピクセル移動する（小数も可、既定では空いた部分を透明にする）"""
+    return geometry.translate(pixels, dx, dy, fill)
+
+
+def invert(pixels, out=None):
+    """不透明なピクセルの色を反転"""
+    return recolor.invert(pixels, out)
+
+
+def swap(pixels, enji=None, out=None):
+    """白とえんじ色を入れ替える（swap_colors.py 相当）
+
+    enji を省略すると配色の分析結果（palette.analyze）のブランドカラーを使う。
+    """
+    if enji is None:
+        enji = palette.analyze(pixels).accent
+    return recolor.swap(pixels, enji, out)
+
+
+def blend(pixels, enji=None, out=None):
+    """エッジを補間しながら色を入れ替える（swap_colors_hq.py 相当）
+
+    enji を省略すると配色の分析結果（palette.analyze）のブランドカラーを使う。
+    """
+    if enji is None:
+        enji = palette.analyze(pixels).accent
+    return recolor.swap_hq(pixels, enji, out)
+
+
+def lut(pixels, path=None, enji=None, size=color_lut.DEFAULT_SIZE):
+    """3D LUT で色を変換
+
+    path にマッピング定義の JSON を指定する。省略すると白とえんじ色を入れ替える
+    マッピングを使い、enji も省略した場合は配色の分析結果のブランドカラーを使う。
+    """
+    if path:
+        mapping = color_lut.load_mapping(path)
+    else:
+        if enji is None:
+            enji = palette.analyze(pixels).accent
+        mapping = color_lut.swap_mapping(enji)
+    return color_lut.apply(pixels, color_lut.get_lut(mapping, size))
+
+
+def resample(pixels, scale=2, size=None):
+    """LANCZOSで再サンプリング
+
+    size を指定するとそのサイズ（正方形）に縮小・拡大する。
+    省略時は scale 倍に拡大してから元のサイズに戻すアンチエイリアス処理。
+    """
+    if size is None:
+        return tiled.supersample(pixels, scale)
+    img = recolor.to_image(pixels).resize((size, size), Image.Resampling.LANCZOS)
+    return np.asarray(img)
+
+
+def downscale(pixels, size):
+    """リニア光で size x size に縮小（半分ずつのピラミッドを経由するのでガンマによる暗化がない）"""
+    return pyramid.resize(pixels, size)
+
+
+def sdf(pixels, background=recolor.ENJI_COLOR, foreground=recolor.WHITE_COLOR, size=None):
+    """距離場から配色とサイズを指定して描き直す（フラスコを foreground、それ以外を background）
+
+    距離場はマスターごとに一度だけ求めてキャッシュするので、
+    サイズや配色を変えて何度呼んでも再サンプリングは行わない。
+    """
+    size = size or max(pixels.shape[:2])
+    return distance_field.render(distance_field.field(pixels), size, background, foreground)
+
+
+STAGES = {
+    'shift': shift,
+    'invert': invert,
+    'swap': swap,
+    'blend': blend,
+    'lut': lut,
+    'sdf': sdf,
+    'resample': resample,
+    'downscale': downscale,
+}
+
+# 1回のデコードから書き出せる配色のバリエーション
+VARIANTS = {
+    # えんじ背景・白フラスコ（swap_colors_hq.py と同じ処理）
+    'enji_bg': ['blend:enji=140/34/51', 'shift:dx=1', 'resample:scale=2'],
+    # 白背景・えんじフラスコ（revert_colors.py と同じ処理）
+    'white_bg': ['shift:dx=1'],
+    # 色反転（invert_icon.py と同じ処理）
+    'inverted': ['invert'],
+}
+
+
+def _parse_value(text):
+    """ステージ引数の値を解釈（'140/34/51' はタプル）"""
+    if '/' in text:
+        return tuple(_parse_value(part) for part in text.split('/'))
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_stage(spec):
+    """'name' または 'name:key=value,key=value' 形式のステージ指定を解釈"""
+    name, _, args = spec.partition(':')
+    if name not in STAGES:
+        raise ValueError(f"不明なステージです: {name}（{', '.join(STAGES)} から選択）")
+    params = {}
+    for arg in filter(None, args.split(',')):
+        key, sep, value = arg.partition('=')
+        if not sep:
+            raise ValueError(f"ステージ引数は key=value 形式で指定してください: {arg}")
+        params[key] = _parse_value(value)
+    return name, params
+
+
+# ピクセルごとに独立した処理で、タイルに分けてもそのまま適用できるステージ
+POINTWISE_STAGES = ('invert', 'swap', 'blend', 'lut')
+
+# 結果を確保済みの配列（入力自身も可）に書き込めるステージ
+IN_PLACE_STAGES = ('invert', 'swap', 'blend')
+
+
+def _writable(pixels, owned):
+    """中間結果をその場で書き換えてよいか"""
+    return owned and pixels.flags.writeable and pixels.flags.c_contiguous
+
+
+def _run_tiled(pixels, name, params, tile, owned):
+    """1ステージをタイル分割で実行
+
+    owned が True の場合、pixels はパイプライン内で作った中間結果なので
+    ピクセルごとの処理はその場で書き換えて新しい配列を確保しない。
+    """
+    if name in POINTWISE_STAGES:
+        if name in ('swap', 'blend', 'lut') and params.get('enji') is None and not params.get('path'):
+            # 色の分析は画像全体で行う必要があるので、帯ごとに集計して先に済ませる
+            params = dict(params, enji=palette.analyze(pixels, tile=tile).accent)
+        func = STAGES[name]
+        return tiled.apply(pixels, lambda block: func(block, **params), tile,
+                           out=pixels if owned else None)
+    if name == 'resample' and params.get('size') is None:
+        return tiled.antialias(pixels, params.get('scale', 2), tile)
+    return STAGES[name](pixels, **params)
+
+
+def run(pixels, stages, tile=None):
+    """ステージの列を順番に適用した配列を返す（入力の配列は変更しない）
+
+    入力は読み取り専用の配列（raster.load のメモリマップなど）でもよい。
+    色変換のステージは、前のステージの結果（パイプライン内で確保した配列）に
+    その場で書き込み、ステージごとに新しい配列を確保しない。
+
+    tile を指定すると、ピクセルごとの色変換とアンチエイリアスを
+    tile x tile のタイルに分けて処理し、作業用メモリをタイルの大きさに抑える。
+    """
+    owned = False
+    for stage in stages:
+        if isinstance(stage, str):
+            stage = parse_stage(stage)
+        name, params = stage
+        with profiling.stage(name):
+            if tile:
+                pixels = _run_tiled(pixels, name, params, tile, _writable(pixels, owned))
+            elif name in IN_PLACE_STAGES and _writable(pixels, owned):
+                pixels = STAGES[name](pixels, **params, out=pixels)
+            else:
+                pixels = STAGES[name](pixels, **params)
+        owned = True
+    return pixels
+
+
+def run_variants(pixels, variants, tile=None):
+    """同じデコード結果から複数のバリエーションを作成
+
+    variants は {名前: ステージの列} の辞書。
+    """
+    return {name: run(pixels, stages, tile) for name, stages in variants.items()}
+
+
+def save(pixels, path):
+    """配列をPNGとして1回だけエンコードして保存（内容が同じなら書き込まない）"""
+    return write_if_changed(path, encode_png(recolor.to_image(pixels)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='アイコン変換パイプライン')
+    parser.add_argument('source', help='元画像のパス')
+    parser.add_argument('-s', '--stage', action='append', default=[],
+                        help="適用するステージ（例: blend, shift:dx=1, resample:scale=2）")
+    parser.add_argument('-o', '--output', help='--stage の結果の出力先')
+    parser.add_argument('--variant', action='append', default=[], metavar='NAME=PATH',
+                        help=f"バリエーションの出力（{', '.join(VARIANTS)}）")
+    parser.add_argument('--force', action='store_true', help='キャッシュを無視して作り直す')
+    parser.add_argument('--tile', type=int, metavar='N',
+                        help='N x N のタイルに分けて処理する（大きなマスター画像向け）')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'pipeline'):
+        if not args.output and not args.variant:
+            parser.error('--output または --variant を指定してください')
+        if args.stage and not args.output:
+            parser.error('--stage を使う場合は --output を指定してください')
+
+        jobs = {}
+        if args.output:
+            try:
+                jobs[args.output] = [parse_stage(spec) for spec in args.stage]
+            except ValueError as e:
+                parser.error(str(e))
+        for spec in args.variant:
+            name, sep, path = spec.partition('=')
+            if not sep or name not in VARIANTS:
+                parser.error(f"バリエーションは NAME=PATH 形式で指定してください（{', '.join(VARIANTS)}）")
+            jobs[path] = [parse_stage(stage) for stage in VARIANTS[name]]
+
+        # 元画像とステージが前回と同じ出力は作り直さない
+        manifest = Manifest()
+        keys = {path: manifest.key(args.source, {'stages': stages}) for path, stages in jobs.items()}
+        if not args.force:
+            for path in [path for path in jobs if manifest.is_fresh(path, keys[path])]:
+                print(f"最新のためスキップ: {path}")
+                del jobs[path]
+
+        if jobs:
+            pixels = raster.load(args.source, manifest)
+            for path, pixels_out in run_variants(pixels, jobs, args.tile).items():
+                changed = save(pixels_out, path)
+                manifest.record(path, keys[path])
+                print(f"保存しました: {path}" if changed else f"内容が同じため書き込みを省略: {path}")
+        manifest.save()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+iOS / Android / Web 向けアイコン一式の生成
+
+1024x1024 のマスター画像を一度だけデコードし、
+  - ios/Runner/Assets.xcassets/AppIcon.appiconset/Contents.json
+  - Android の mipmap 密度ごとのサイズ表（アダプティブアイコンの前景を含む）
+  - web/manifest.json の icons とファビコン
+から求めた全サイズをプロセスプールで並列に書き出す。
+縮小はリニア光のピラミッド（pyramid.py）で行い、小さいサイズでも白い縁が暗くならないようにする。
+
+使い方:
+    python -m icon_tools.platforms waselab_icon.png
+    python -m icon_tools.platforms --check   # サイズ違いのファイルを検出するだけ
+    python -m icon_tools.platforms --optimize  # 書き出した PNG を可逆に圧縮し直す
+    python -m icon_tools.platforms --svg assets/icons/flask_icon.svg  # SVG から各サイズを直接描く
+    python -m icon_tools.platforms --center  # 通常のアイコンも絵柄を自動で中央に合わせる
+
+マスカブル（Web）とアダプティブ（Android）のアイコンは、常に絵柄をセーフゾーンに収める（fit.py）。
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+
+from PIL import Image
+
+from icon_tools import fit, optimize, profiling, pyramid, raster, recolor, svg
+from icon_tools.cache import DEFAULT_MANIFEST, Manifest, encode_png, write_if_changed
+
+IOS_ICONSET = 'ios/Runner/Assets.xcassets/AppIcon.appiconset'
+WEB_MANIFEST = 'web/manifest.json'
+
+# Android のランチャーアイコン（48dp）の密度ごとのサイズ
+ANDROID_MIPMAPS = {
+    'mdpi': 48,
+    'hdpi': 72,
+    'xhdpi': 96,
+    'xxhdpi': 144,
+    'xxxhdpi': 192,
+}
+
+# アダプティブアイコンの前景（108dp）の密度ごとのサイズ
+ANDROID_ADAPTIVE = {
+    'mdpi': 108,
+    'hdpi': 162,
+    'xhdpi': 216,
+    'xxhdpi': 324,
+    'xxxhdpi': 432,
+}
+
+# ファビコン（高解像度ディスプレイのタブ表示を考慮）
+FAVICON = ('web/favicon.png', 32)
+
+# iOS のアイコンにはアルファチャンネルを含められないため、この色で塗りつぶす
+DEFAULT_BACKGROUND = (255, 255, 255)
+
+
+class Target:
+    """書き出し先1件（パス・一辺のピクセル数・不透明にするか・配置の方法）
+
+    mode は fit.SAFE_ZONES のキー（'normal', 'maskable', 'adaptive'）。
+    """
+
+    def __init__(self, platform, path, size, opaque=False, mode='normal'):
+        self.platform = platform
+        self.path = path
+        self.size = size
+        self.opaque = opaque
+        self.mode = mode
+
+    def __repr__(self):
+        return f"Target({self.platform!r}, {self.path!r}, {self.size})"
+
+    def params(self, background, center=False):
+        """キャッシュのキーに含めるパラメータ"""
+        return {
+            'platform': self.platform,
+            'size': self.size,
+            'opaque': self.opaque,
+            'mode': self.mode,
+            'center': center,
+            'background': list(background),
+        }
+
+
+def ios_targets(root='.'):
+    """Contents.json に記載された iOS アイコンの一覧"""
+    iconset = os.path.join(root, IOS_ICONSET)
+    with open(os.path.join(iconset, 'Contents.json')) as f:
+        contents = json.load(f)
+
+    targets = {}
+    for image in contents['images']:
+        filename = image.get('filename')
+        if not filename:
+            continue
+        points = float(image['size'].split('x')[0])
+        scale = float(image['scale'].rstrip('x'))
+        path = os.path.join(iconset, filename)
+        # iPhone と iPad で同じファイルを共有している場合がある
+        targets[path] = Target('ios', path, round(points * scale), opaque=True)
+    return list(targets.values())
+
+
+def android_targets(root='.'):
+    """mipmap の各密度のランチャーアイコンと、アダプティブアイコンの前景"""
+    res = os.path.join(root, 'android/app/src/main/res')
+    return [
+        Target('android', os.path.join(res, f'mipmap-{density}/ic_launcher.png'), size)
+        for density, size in ANDROID_MIPMAPS.items()
+    ] + [
+        Target('android', os.path.join(res, f'drawable-{density}/ic_launcher_foreground.png'), size,
+               mode='adaptive')
+        for density, size in ANDROID_ADAPTIVE.items()
+    ]
+
+
+def web_targets(root='.'):
+    """manifest.json の icons とファビコン"""
+    with open(os.path.join(root, WEB_MANIFEST)) as f:
+        manifest = json.load(f)
+
+    targets = []
+    for icon in manifest.get('icons', []):
+        width, height = (int(v) for v in icon['sizes'].split('x'))
+        if width != height:
+            raise ValueError(f"正方形でないアイコンには対応していません: {icon['src']} ({icon['sizes']})")
+        mode = 'maskable' if 'maskable' in icon.get('purpose', '').split() else 'normal'
+        targets.append(Target('web', os.path.join(root, 'web', icon['src']), width, mode=mode))
+    path, size = FAVICON
+    targets.append(Target('web', os.path.join(root, path), size))
+    return targets
+
+
+def all_targets(root='.'):
+    """全プラットフォームの書き出し先"""
+    return ios_targets(root) + android_targets(root) + web_targets(root)
+
+
+def check_sizes(targets):
+    """既存ファイルのサイズが想定と異なるものを (Target, 実際のサイズ) で返す"""
+    problems = []
+    for target in targets:
+        if not os.path.exists(target.path):
+            problems.append((target, None))
+            continue
+        with Image.open(target.path) as img:
+            if img.size != (target.size, target.size):
+                problems.append((target, img.size))
+    return problems
+
+
+def unreferenced_ios_icons(root='.'):
+    """AppIcon.appiconset 内で Contents.json から参照されていないPNG"""
+    iconset = os.path.join(root, IOS_ICONSET)
+    referenced = {os.path.basename(target.path) for target in ios_targets(root)}
+    return sorted(
+        os.path.join(iconset, name) for name in os.listdir(iconset)
+        if name.endswith('.png') and name not in referenced
+    )
+
+
+def render(master, size, opaque=False, background=DEFAULT_BACKGROUND):
+    """マスター画像（RGBAのPIL画像）を指定サイズに縮小"""
+    img = master if master.size == (size, size) else master.resize((size, size), Image.Resampling.LANCZOS)
+    if opaque:
+        flat = Image.new('RGB', img.size, tuple(background))
+        flat.paste(img, mask=img.getchannel('A'))
+        img = flat
+    return img
+
+
+def _reusable_source(path, pixels):
+    """マスターと同じサイズの出力にファイルをそのままコピーできるか
+
+    不透明なRGBのPNGであれば、再エンコードしても同じピクセルになるだけなので
+    1024x1024 のような大きな出力はコピーで済ませる。
+    """
+    if path is None or not (pixels[..., 3] == 255).all():
+        return False
+    with Image.open(path) as img:
+        return img.format == 'PNG' and img.mode == 'RGB'
+
+
+# ワーカープロセスごとに一度だけ受け取るマスター画像（または SVG）と絵柄の計測結果
+_pixels = None
+_pyramid = None
+_master = None
+_master_opaque = False
+_measurement = None
+_document = None
+_colors = None
+
+
+def _init_worker(pixels, measurement=None, document=None, colors=None):
+    global _pixels, _pyramid, _master, _master_opaque, _measurement, _document, _colors
+    if pixels is not None:
+        _pixels = pixels
+        # リニア光への変換と縮小の段は、このワーカーが受け持つ全サイズで共有する
+        _pyramid = pyramid.Pyramid(pixels)
+        _master = recolor.to_image(pixels)
+        _master_opaque = bool((pixels[..., 3] == 255).all())
+    _measurement = measurement
+    _document, _colors = document, colors
+
+
+@profiling.profiled('render')
+def _render_target(target, background, source=None, center=False):
+    fitted = center or target.mode != 'normal'
+    if _document is not None:
+        pixels = svg.render(_document, target.size, _colors)
+        if fitted:
+            pixels = fit.fit(pixels, target.size, target.mode)
+        data = encode_png(render(recolor.to_image(pixels), target.size, target.opaque, background))
+    elif fitted:
+        img = recolor.to_image(fit.fit(_pixels, target.size, target.mode, _measurement, pyramid=_pyramid))
+        data = encode_png(render(img, target.size, target.opaque or _master_opaque, background))
+    elif source and _master.size == (target.size, target.size):
+        with open(source, 'rb') as f:
+            data = f.read()
+    else:
+        img = recolor.to_image(_pyramid.resize(target.size))
+        data = encode_png(render(img, target.size, target.opaque or _master_opaque, background))
+    written = write_if_changed(target.path, data)
+    return target.path, len(data), written
+
+
+@profiling.profiled('generate')
+def generate(pixels, targets, jobs=None, background=DEFAULT_BACKGROUND, source=None,
+             document=None, colors=None, center=False):
+    """全ターゲットを並列に書き出し、(パス, バイト数, 書き込んだか) のリストを返す
+
+    source にマスター画像のパスを渡すと、同じサイズの出力はファイルのコピーで済ませる。
+    document に SVG（svg.load の結果）を渡すと、pixels の代わりに各サイズへ直接描く。
+    center が True なら通常のアイコンも絵柄を中央に合わせる（マスカブル・アダプティブは常に合わせる）。
+    内容が既存のファイルと同じ出力は書き込まない。
+    """
+    jobs = jobs or os.cpu_count() or 1
+    source = source if pixels is not None and not center and _reusable_source(source, pixels) else None
+    # 絵柄の計測は全ターゲットで共通なので、ここで一度だけ行う
+    measurement = None
+    if pixels is not None and (center or any(target.mode != 'normal' for target in targets)):
+        measurement = fit.measure(pixels)
+    # 時間のかかる大きなサイズから先に投入する
+    order = sorted(range(len(targets)), key=lambda i: -targets[i].size)
+    queued = [targets[i] for i in order]
+
+    if jobs == 1:
+        _init_worker(pixels, measurement, document, colors)
+        done = [_render_target(target, background, source, center) for target in queued]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(pixels, measurement, document, colors)) as pool:
+            done = list(pool.map(_render_target, queued, [background] * len(queued),
+                                 [source] * len(queued), [center] * len(queued)))
+
+    results = [None] * len(targets)
+    for i, result in zip(order, done):
+        results[i] = result
+    return results
+
+
+def _describe(problems):
+    for target, actual in problems:
+        if actual is None:
+            print(f"  未作成: {target.path}（{target.size}x{target.size}）")
+        else:
+            print(f"  サイズ違い: {target.path} は {actual[0]}x{actual[1]}（想定 {target.size}x{target.size}）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='iOS / Android / Web 向けアイコン一式を生成')
+    parser.add_argument('master', nargs='?', default='waselab_icon.png', help='1024x1024 のマスター画像')
+    parser.add_argument('--root', default='.', help='Flutter プロジェクトのルート')
+    parser.add_argument('--check', action='store_true', help='書き出さずにサイズ違いを検出する')
+    parser.add_argument('-j', '--jobs', type=int, help='並列数（既定: CPU数）')
+    parser.add_argument('--background', default='255/255/255',
+                        help='iOS 用に透明部分を塗りつぶす色（R/G/B）')
+    parser.add_argument('--force', action='store_true', help='キャッシュを無視してすべて作り直す')
+    parser.add_argument('--optimize', action='store_true', help='書き出した PNG のファイルサイズを最適化する')
+    parser.add_argument('--svg', metavar='PATH',
+                        help='マスター画像の代わりに SVG から各サイズを直接描く（例: assets/icons/flask_icon.svg）')
+    parser.add_argument('--scheme', default='enji_bg', help=f"--svg の配色（{', '.join(svg.SCHEMES)}）")
+    parser.add_argument('--center', action='store_true', help='通常のアイコンも絵柄を自動で中央に合わせる')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'platforms'):
+        targets = all_targets(args.root)
+
+        if args.check:
+            problems = check_sizes(targets)
+            unreferenced = unreferenced_ios_icons(args.root)
+            if unreferenced:
+                print("Contents.json から参照されていないファイル:")
+                for path in unreferenced:
+                    print(f"  {path}")
+            if problems:
+                print(f"{len(problems)} 件のアイコンが想定と異なります:")
+                _describe(problems)
+                raise SystemExit(1)
+            print(f"{len(targets)} 件のアイコンはすべて正しいサイズです。")
+            return
+
+        start = time.perf_counter()
+        background = tuple(int(c) for c in args.background.split('/'))
+        manifest = Manifest(os.path.join(args.root, DEFAULT_MANIFEST))
+        source = args.svg or args.master
+        extra = {'svg_scheme': args.scheme} if args.svg else {}
+        keys = {target.path: manifest.key(source, dict(target.params(background, args.center), **extra))
+                for target in targets}
+        if not args.force:
+            targets = [target for target in targets if not manifest.is_fresh(target.path, keys[target.path])]
+        if not targets:
+            manifest.save()
+            print(f"すべてのアイコンは最新です（{time.perf_counter() - start:.3f} 秒）")
+            return
+
+        problems = check_sizes(targets)
+        if problems:
+            print("以下のアイコンを正しいサイズで作り直します:")
+            _describe(problems)
+
+        if args.svg:
+            try:
+                document = svg.load(args.svg)
+                colors = svg.scheme_colors(document, args.scheme)
+            except ValueError as e:
+                parser.error(str(e))
+            results = generate(None, targets, args.jobs, background, document=document, colors=colors,
+                               center=args.center)
+        else:
+            pixels = raster.load(args.master, manifest, os.path.join(args.root, raster.DEFAULT_CACHE_DIR))
+            if pixels.shape[0] != pixels.shape[1]:
+                parser.error(f"マスター画像は正方形である必要があります: {pixels.shape[1]}x{pixels.shape[0]}")
+            results = generate(pixels, targets, args.jobs, background, source=args.master, center=args.center)
+        for path, _, _ in results:
+            manifest.record(path, keys[path])
+        optimized = []
+        if args.optimize:
+            optimized = optimize.optimize_outputs([path for path, _, _ in results], manifest, args.jobs)
+        manifest.save()
+        elapsed = time.perf_counter() - start
+
+        if optimized:
+            print("PNG の最適化:")
+            optimize.report(optimized)
+        total = sum(os.path.getsize(path) for path, _, _ in results)
+        written = sum(1 for _, _, changed in results if changed)
+        print(f"{len(results)} 件のアイコンを生成しました（書き込み {written} 件, "
+              f"{total / 1024:.0f} KB, {elapsed:.2f} 秒）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+アイコン用ツールのプロファイリング（scripts/ のフォーム用スクリプトは同じ形式の scripts/profiling.py を使う）
+
+各エントリポイントの --profile で有効にし、stage() で囲んだ区間ごとに
+  - 実時間（wall）と CPU 時間
+  - tracemalloc による区間内のピークメモリ（区間の開始時からの増分）
+  - 呼ばれた回数
+を記録する。区間は入れ子にでき、"platforms/generate/render" のように
+親からのパスごとに集計する。子の区間を除いた時間（self）も求めるので、
+どの処理が時間を占めているかがそのまま分かる。
+
+結果は JSON のトレース（パスごとの集計と、chrome://tracing や Perfetto で
+開ける traceEvents）に書き出し、標準出力には1行の要約を表示する。
+
+有効にしていない間の stage() は何もしない共通のコンテキストマネージャを返すだけなので、
+ライブラリの関数に埋め込んだままでも処理は遅くならない。
+プロセスプールのワーカー内の区間は記録されない（内訳を見るときは -j 1 で実行する）。
+
+使い方:
+    python -m icon_tools.platforms --profile            # build/profile/platforms.json
+    python -m icon_tools.pipeline in.png -s blend -o out.png --profile trace.json
+
+    from icon_tools import profiling
+    with profiling.stage('decode'):
+        pixels = recolor.load_rgba(path)
+"""
+
+import contextlib
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+DEFAULT_TRACE_DIR = os.path.join('build', 'profile')
+
+# 要約の1行に表示する区間の数
+SUMMARY_STAGES = 3
+
+_NULL = contextlib.nullcontext()
+
+# 有効な間だけ Profiler が入る
+_active = None
+
+
+class _Frame:
+    """実行中の1区間"""
+
+    def __init__(self, path):
+        self.path = path
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.memory, self.peak = tracemalloc.get_traced_memory()
+        # 子の区間で reset_peak した後も、この区間のピークを失わないように持っておく
+        self.child_peak = 0
+        self.child_wall = 0.0
+
+
+class Profiler:
+    """区間ごとの集計と、トレース用のイベントを記録する"""
+
+    def __init__(self, name):
+        self.name = name
+        self.stats = {}
+        self.events = []
+        self.stack = []
+        self.origin = time.perf_counter()
+
+    def enter(self, name):
+        path = f'{self.stack[-1].path}/{name}' if self.stack else name
+        frame = _Frame(path)
+        if self.stack:
+            self.stack[-1].child_peak = max(self.stack[-1].child_peak, frame.peak)
+        tracemalloc.reset_peak()
+        self.stack.append(frame)
+
+    def exit(self):
+        frame = self.stack.pop()
+        wall = time.perf_counter() - frame.wall
+        cpu = time.process_time() - frame.cpu
+        peak = max(tracemalloc.get_traced_memory()[1], frame.child_peak)
+        if self.stack:
+            self.stack[-1].child_peak = max(self.stack[-1].child_peak, peak)
+            self.stack[-1].child_wall += wall
+
+        stat = self.stats.setdefault(frame.path, {'calls': 0, 'wall_s': 0.0, 'self_s': 0.0, 'cpu_s': 0.0,
+                                                  'peak_mb': 0.0})
+        stat['calls'] += 1
+        stat['wall_s'] += wall
+        stat['self_s'] += wall - frame.child_wall
+        stat['cpu_s'] += cpu
+        stat['peak_mb'] = max(stat['peak_mb'], (peak - frame.memory) / (1024 * 1024))
+        self.events.append({
+            'name': frame.path.rsplit('/', 1)[-1],
+            'cat': frame.path,
+            'ph': 'X',
+            'ts': round((frame.wall - self.origin) * 1e6, 1),
+            'dur': round(wall * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {'cpu_ms': round(cpu * 1000, 3)},
+        })
+
+    def data(self):
+        stages = {
+            path: {
+                'calls': stat['calls'],
+                'wall_s': round(stat['wall_s'], 6),
+                'self_s': round(stat['self_s'], 6),
+                'cpu_s': round(stat['cpu_s'], 6),
+                'peak_mb': round(stat['peak_mb'], 3),
+            }
+            for path, stat in self.stats.items()
+        }
+        return {'name': self.name, 'stages': stages, 'traceEvents': self.events}
+
+    def summary(self):
+        """「合計と、子の区間を除いた時間が長い区間の上位」の1行"""
+        total = self.stats.get(self.name)
+        if total is None:
+            return f"プロファイル: {self.name}（記録なし）"
+        children = sorted(
+            ((path, stat) for path, stat in self.stats.items() if path != self.name),
+            key=lambda item: -item[1]['self_s'],
+        )
+        parts = [f"{path.split('/', 1)[-1]} {stat['self_s']:.2f}s×{stat['calls']}"
+                 for path, stat in children[:SUMMARY_STAGES]]
+        head = (f"プロファイル: {self.name} {total['wall_s']:.2f}s"
+                f"（CPU {total['cpu_s']:.2f}s, ピーク {total['peak_mb']:.1f} MB）")
+        return ' | '.join([head] + parts)
+
+
+def enabled():
+    return _active is not None
+
+
+@contextlib.contextmanager
+def _stage(name):
+    _active.enter(name)
+    try:
+        yield
+    finally:
+        _active.exit()
+
+
+def stage(name):
+    """name の区間を記録するコンテキストマネージャ（無効な間は何もしない）"""
+    if _active is None:
+        return _NULL
+    return _stage(name)
+
+
+def profiled(name=None):
+    """関数の呼び出しを1つの区間として記録するデコレータ"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def default_trace(name):
+    return os.path.join(DEFAULT_TRACE_DIR, f'{name}.json')
+
+
+def add_argument(parser):
+    """--profile [PATH] をパーサに追加する"""
+    parser.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                        help=f'区間ごとの時間・メモリを記録する（既定の出力先: {DEFAULT_TRACE_DIR}/<名前>.json）')
+
+
+@contextlib.contextmanager
+def session(path, name):
+    """path が None でなければ、ブロック全体を name の区間として記録して書き出す
+
+    path が '' の場合は build/profile/<name>.json に書き出す。
+    """
+    global _active
+    if path is None:
+        yield None
+        return
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    profiler = _active = Profiler(name)
+    try:
+        with _stage(name):
+            yield profiler
+    finally:
+        _active = None
+        if started:
+            tracemalloc.stop()
+        path = path or default_trace(name)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profiler.data(), f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"{profiler.summary()} → {path}")
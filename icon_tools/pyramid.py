@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+リニア光でのガンマ補正つき縮小ピラミッド
+
+1024x1024 のマスターから 16〜1024px の全サイズをそれぞれ独立に LANCZOS で縮小すると、
+大きな縮小率ほどカーネルが広がり、同じフィルタ処理を何度も繰り返すことになる。
+また PIL の resize は sRGB（ガンマ補正済み）の値のまま平均するため、
+小さいサイズほどフラスコの細い白い縁が暗く沈む。
+
+ここでは
+  1. マスターを一度だけリニア光（乗算済みアルファ）の float32 に変換し、
+  2. 2x2 の平均で半分ずつ縮小したピラミッドを必要な段まで作り、
+  3. 各サイズは「そのサイズ以上で最も小さい段」から分離可能な Lanczos で縮小する
+という手順で全サイズを作る。最後の縮小は常に2倍以内なのでカーネルは狭く、
+カーネルの重み（縮小前後のサイズごとの行列）はキャッシュして使い回す。
+
+使い方:
+    python -m icon_tools.pyramid waselab_icon.png --size 16 --size 180 -o build/pyramid
+"""
+
+import argparse
+import functools
+import os
+
+import numpy as np
+
+from icon_tools import profiling, raster, recolor
+from icon_tools.cache import encode_png, write_if_changed
+from icon_tools.geometry import LANCZOS_RADIUS, _lanczos
+
+# sRGB の 0〜255 からリニア光（0〜1）への変換表
+_TO_LINEAR = np.where(
+    np.arange(256) / 255 <= 0.04045,
+    np.arange(256) / 255 / 12.92,
+    ((np.arange(256) / 255 + 0.055) / 1.055) ** 2.4,
+).astype(np.float32)
+
+
+@profiling.profiled('to_linear')
+def to_linear(pixels):
+    """RGBA（uint8, sRGB）を乗算済みアルファのリニア光（float32, 0〜1）に変換"""
+    out = _TO_LINEAR[pixels]
+    out[..., 3] = pixels[..., 3] * np.float32(1 / 255)
+    out[..., :3] *= out[..., 3:]
+    return out
+
+
+def to_srgb(values):
+    """乗算済みアルファのリニア光を RGBA（uint8, sRGB）に戻す"""
+    alpha = values[..., 3:]
+    rgb = np.divide(values[..., :3], alpha, out=np.zeros_like(values[..., :3]), where=alpha > 0)
+    np.clip(rgb, 0, 1, out=rgb)
+    rgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * rgb ** (1 / 2.4) - 0.055)
+    out = np.empty(values.shape, dtype=np.uint8)
+    out[..., :3] = np.rint(rgb * 255)
+    out[..., 3] = np.rint(np.clip(alpha[..., 0], 0, 1) * 255)
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def kernel(source, target):
+    """長さ source から target への1次元 Lanczos の重み（target x source の行列）
+
+    縮小では PIL と同じくカーネルを縮小率だけ広げ、各行の合計を 1 にする。
+    """
+    scale = source / target
+    support = LANCZOS_RADIUS * max(scale, 1.0)
+    # 出力の画素の中心に対応する入力上の座標
+    centers = (np.arange(target) + 0.5) * scale
+    positions = np.arange(source) + 0.5
+    weights = _lanczos((positions[None, :] - centers[:, None]) / max(scale, 1.0))
+    weights[np.abs(positions[None, :] - centers[:, None]) >= support] = 0
+    weights /= weights.sum(axis=1, keepdims=True)
+    weights = weights.astype(np.float32)
+    weights.flags.writeable = False
+    return weights
+
+
+def halve(values):
+    """縦横とも半分に縮小（2x2 の平均）。奇数の端の1行・1列は捨てる"""
+    height, width = values.shape[0] // 2 * 2, values.shape[1] // 2 * 2
+    out = values[0:height:2, 0:width:2] + values[1:height:2, 0:width:2]
+    out += values[0:height:2, 1:width:2]
+    out += values[1:height:2, 1:width:2]
+    out *= np.float32(0.25)
+    return out
+
+
+def _resample(values, width, height):
+    """分離可能なカーネルで縦・横の順に (height, width) へ縮小・拡大"""
+    rows, cols = values.shape[:2]
+    if rows != height:
+        values = (kernel(rows, height) @ values.reshape(rows, -1)).reshape(height, cols, -1)
+    if cols != width:
+        # 横方向も1回の行列積で済むよう、列を先頭の軸に移してから掛ける
+        columns = np.ascontiguousarray(values.transpose(1, 0, 2)).reshape(cols, -1)
+        values = (kernel(cols, width) @ columns).reshape(width, height, -1).transpose(1, 0, 2)
+    return values
+
+
+class Pyramid:
+    """マスターのリニア光への変換と、半分ずつ縮小した段を一度だけ作って保持する"""
+
+    def __init__(self, pixels):
+        self.levels = [to_linear(np.asarray(pixels))]
+
+    def level(self, width, height):
+        """縦横とも (width, height) 以上の段のうち最も小さいもの（必要なら作る）"""
+        index = 0
+        while True:
+            current = self.levels[index]
+            rows, cols = current.shape[:2]
+            # 半分にしても足りる間は次の段へ（奇数の段では端が欠けるので止める）
+            if rows // 2 < height or cols // 2 < width or rows % 2 or cols % 2:
+                return current
+            index += 1
+            if index == len(self.levels):
+                self.levels.append(halve(current))
+
+    def resize_linear(self, width, height=None):
+        """(height, width) のリニア光の配列を返す"""
+        height = height or width
+        return _resample(self.level(width, height), width, height)
+
+    @profiling.profiled('resize')
+    def resize(self, width, height=None):
+        """(height, width, 4) の RGBA（uint8）を返す"""
+        return to_srgb(self.resize_linear(width, height))
+
+
+def resize(pixels, size):
+    """1枚だけ size x size に縮小・拡大（複数のサイズを作る場合は Pyramid を使う）"""
+    return Pyramid(pixels).resize(size)
+
+
+def resize_all(pixels, sizes):
+    """1回のリニア光への変換と1本のピラミッドから {サイズ: 配列} を作る"""
+    chain = Pyramid(pixels)
+    return {size: chain.resize(size) for size in sizes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='リニア光のピラミッドで各サイズに縮小')
+    parser.add_argument('master', nargs='?', default='waselab_icon.png', help='マスター画像')
+    parser.add_argument('--size', type=int, action='append', required=True, help='一辺のピクセル数（複数指定可）')
+    parser.add_argument('-o', '--output-dir', required=True, help='出力先のディレクトリ')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'pyramid'):
+        pixels = raster.load(args.master)
+        for size, out in resize_all(pixels, args.size).items():
+            path = os.path.join(args.output_dir, f'icon_{size}.png')
+            write_if_changed(path, encode_png(recolor.to_image(out)))
+            print(f"保存しました: {path}")
+
+
+if __name__ == '__main__':
+    main()
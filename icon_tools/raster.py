@@ -0,0 +1,53 @@
+"""
+デコード済みのラスター画像のキャッシュ
+
+PNG を RGBA の配列にデコードした結果を、元ファイルの内容のハッシュをキーにした
+.npy ファイルとして .icon_cache/rasters/ に保存し、2回目以降は np.memmap で開く。
+パラメータを変えて何度も実行する場合でも、同じ画像のデコードは最初の1回だけになる。
+
+返す配列は読み取り専用のメモリマップで、変換はこれを直接読む（コピーしない）。
+元ファイルのハッシュはマニフェストにサイズと更新時刻と一緒に記録されるため、
+元ファイルが変わっていなければ PNG を読むこと自体もない。
+"""
+
+import os
+
+import numpy as np
+
+from icon_tools import profiling, recolor
+from icon_tools.cache import Manifest
+
+DEFAULT_CACHE_DIR = os.path.join('.icon_cache', 'rasters')
+
+
+def cache_path(digest, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, f'{digest}.rgba.npy')
+
+
+def _store(pixels, path):
+    """途中で中断しても壊れたファイルが残らないよう、一時ファイルに書いてから置き換える"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        np.save(f, np.ascontiguousarray(pixels, dtype=np.uint8))
+    os.replace(temporary, path)
+
+
+@profiling.profiled('load')
+def load(path, manifest=None, cache_dir=DEFAULT_CACHE_DIR):
+    """画像を RGBA の読み取り専用の配列（np.memmap）として開く
+
+    manifest を渡すとそのマニフェストでファイルのハッシュを求める（保存は呼び出し側で行う）。
+    省略した場合は既定のマニフェストを使い、ここで保存する。
+    """
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = Manifest()
+    raster = cache_path(manifest.file_hash(path), cache_dir)
+    if own_manifest:
+        manifest.save()
+
+    if not os.path.exists(raster):
+        _store(recolor.load_rgba(path), raster)
+    return np.load(raster, mmap_mode='r')
+
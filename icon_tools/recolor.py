@@ -0,0 +1,139 @@
+"""
+アイコンの色変換（NumPyによるベクトル化版）
+
+画像を一度だけ (高さ, 幅, 4) の uint8 配列として読み込み、
+各スクリプトのしきい値ルールをブールマスクでまとめて適用する。
+ピクセルは RGBA を1つの uint32 として扱い、チャンネルごとのループを避ける。
+各変換は out に確保済みの配列（入力自身も可）を渡すと、結果をそこに書き込む。
+"""
+
+from PIL import Image
+import numpy as np
+
+from icon_tools import profiling
+
+# 早稲田のえんじ色
+ENJI_COLOR = (140, 34, 51)
+WHITE_COLOR = (255, 255, 255)
+
+# RGBAを詰めたuint32（リトルエンディアンでRが最下位バイト）
+_PACKED = np.dtype('<u4')
+_ALPHA_BITS = 0xFF000000
+
+
+@profiling.profiled('decode')
+def load_rgba(path):
+    """画像を読み込み、RGBAの配列として返す"""
+    with Image.open(path) as img:
+        return np.asarray(img.convert('RGBA'))
+
+
+def to_image(pixels):
+    """RGBA配列をPILの画像に変換"""
+    height, width = pixels.shape[:2]
+    data = np.ascontiguousarray(pixels, dtype=np.uint8).tobytes()
+    return Image.frombytes('RGBA', (width, height), data)
+
+
+def pack(pixels):
+    """(高さ, 幅, 4) の配列を (高さ, 幅) の uint32 に詰める"""
+    return np.ascontiguousarray(pixels, dtype=np.uint8).view(_PACKED)[..., 0]
+
+
+def unpack(packed):
+    """pack() の逆変換"""
+    packed = np.ascontiguousarray(packed, dtype=_PACKED)
+    return packed[..., None].view(np.uint8)
+
+
+def pack_color(color):
+    """(R, G, B[, A]) のタプルを uint32 の値に変換"""
+    r, g, b = color[:3]
+    a = color[3] if len(color) > 3 else 255
+    return _PACKED.type(r | (g << 8) | (b << 16) | (a << 24))
+
+
+def _enji_like_mask(r, g, b):
+    """えんじ色っぽい色（swap_colors.py の判定条件）
+
+    100 < r < 200 は uint8 の桁あふれを利用して1回の比較で判定する。
+    """
+    return ((r - np.uint8(101)) < 99) & (np.maximum(g, b) < 100)
+
+
+def _output(pixels, out):
+    """結果を書き込む uint32 の配列（out を省略すると新しく確保する）
+
+    out には pixels 自身を渡してその場で書き換えることもできる。
+    """
+    if out is None:
+        out = np.empty_like(pixels, dtype=np.uint8)
+    elif out.shape != pixels.shape or out.dtype != np.uint8 or not out.flags.c_contiguous:
+        raise ValueError("out は入力と同じ大きさの C 連続な uint8 の配列にしてください")
+    return out, out.view(_PACKED)[..., 0]
+
+
+def invert(pixels, out=None):
+    """不透明なピクセルのRGBを反転（アルファは保持）"""
+    packed = pack(pixels)
+    out, result = _output(pixels, out)
+    # 255 - c は c ^ 0xFF と等しいので、不透明なピクセルだけRGBのビットを反転する
+    flip = np.where(packed > 0x00FFFFFF, _PACKED.type(0x00FFFFFF), _PACKED.type(0))
+    np.bitwise_xor(packed, flip, out=result)
+    return out
+
+
+def swap(pixels, enji_color=ENJI_COLOR, out=None):
+    """白背景をえんじ色に、えんじ色のフラスコを白に入れ替える
+
+    画像から色を決める場合は palette.analyze() の accent を渡す。
+    """
+    r, g, b, a = np.moveaxis(pixels, -1, 0)
+    white = np.minimum(np.minimum(r, g), b) > 240
+    enji = _enji_like_mask(r, g, b)
+    transparent = a == 0
+
+    out, result = _output(pixels, out)
+    np.copyto(result, pack(pixels))
+    np.copyto(result, pack_color(enji_color), where=white)
+    np.copyto(result, pack_color(WHITE_COLOR), where=enji)
+    np.copyto(result, 0, where=transparent)
+    return out
+
+
+def _hq_table(enji_color):
+    """R+G+B の合計値ごとの変換後の色（アルファなし）"""
+    enji = np.array(enji_color[:3], dtype=np.float64)
+    gray = np.arange(256 * 3) / 3
+    ratio = (gray - 128) / 127
+    mixed = (enji + (255 - enji) * ratio[:, None]).clip(0, 255)
+    rgb = np.where((gray > 128)[:, None], mixed, 255.0)
+    rgb = np.where((gray > 200)[:, None], enji, rgb)
+    table = np.zeros((len(gray), 4), dtype=np.uint8)
+    table[:, :3] = rgb.astype(np.uint8)
+    return pack(table)
+
+
+def swap_hq(pixels, enji_color=ENJI_COLOR, out=None):
+    """明度に応じてエッジを白とえんじ色で補間しながら色を入れ替える
+
+    swap_colors_hq.py のルール:
+      - 明度 > 200 → えんじ色
+      - 赤みがあり明度 < 200 → 白
+      - それ以外で明度 > 128 → えんじ色と白を (明度-128)/127 で補間
+      - それ以外 → 白
+    アルファ値は保持し、完全に透明なピクセルは (0, 0, 0, 0) にする。
+    明度は R+G+B の合計だけで決まるため、合計値ごとの色を表にして引く。
+    """
+    r, g, b, a = np.moveaxis(pixels, -1, 0)
+    total = r.astype(np.uint16) + g + b
+    reddish = (r > g) & (r > b) & (total < 600)
+    alpha = pack(pixels) & _PACKED.type(_ALPHA_BITS)
+    transparent = a == 0
+
+    out, result = _output(pixels, out)
+    np.take(_hq_table(enji_color), total, out=result)
+    np.copyto(result, pack_color(WHITE_COLOR + (0,)), where=reddish)
+    result |= alpha
+    np.copyto(result, 0, where=transparent)
+    return out
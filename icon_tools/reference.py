@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+元のスクリプト（ピクセルごとのループ）の処理をそのまま関数にした参照実装
+
+ゴールデン画像（icon_tools/golden/）を新しい実装の出力から作ると、誤りも含めて
+正解になってしまう。ここでは NumPy 化する前のスクリプト
+（invert_icon.py / swap_colors.py / swap_colors_hq.py / shift_icon.py）の
+ループと Pillow の呼び出しを、ファイルの読み書きだけ除いて写し、
+bench.py の変換ごとに同じ処理を行う。遅いので、ゴールデン画像の生成と
+小さな画像での一致の確認にだけ使う。
+
+新しい実装ではえんじ色の検出を palette.analyze のヒストグラムによる判定に変えたため、
+色の入れ替えは色を引数で受け取る。元の検出（最初に見つかったえんじ色っぽいピクセル）は
+find_enji に写してある。
+
+使い方:
+    python -m icon_tools.bench --update-golden   # この参照実装でゴールデン画像を作り直す
+
+    from icon_tools import reference
+    expected = reference.run(pixels, 'swap_hq')
+"""
+
+import numpy as np
+from PIL import Image
+
+# swap_colors.py のえんじ色が見つからなかった場合の色・swap_colors_hq.py の色
+ENJI_COLOR = (140, 34, 51, 255)
+
+
+def _image(pixels):
+    # fromarray の画像は配列とメモリを共有して書き換えられないので、複製する
+    return Image.fromarray(np.ascontiguousarray(pixels, dtype=np.uint8), 'RGBA').copy()
+
+
+def invert(pixels):
+    """invert_icon.py のループ"""
+    img = _image(pixels)
+    pixels = img.load()
+    width, height = img.size
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if a > 0:
+                pixels[x, y] = (255 - r, 255 - g, 255 - b, a)
+    return np.asarray(img)
+
+
+def find_enji(pixels):
+    """swap_colors.py のえんじ色の検出のループ（見つからなければ ENJI_COLOR）"""
+    img = _image(pixels)
+    pixels = img.load()
+    width, height = img.size
+    enji_color = None
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if a > 0 and r > 100 and r < 200 and g < 100 and b < 100:
+                enji_color = (r, g, b, a)
+                break
+        if enji_color:
+            break
+    return enji_color or ENJI_COLOR
+
+
+def swap(pixels, enji_color=ENJI_COLOR):
+    """swap_colors.py の色の入れ替えのループ（1px の移動は shift で行う）"""
+    img = _image(pixels)
+    pixels = img.load()
+    width, height = img.size
+    new_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    new_pixels = new_img.load()
+    white_color = (255, 255, 255, 255)
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if a > 0:
+                if r > 240 and g > 240 and b > 240:
+                    new_pixels[x, y] = tuple(enji_color)
+                elif r > 100 and r < 200 and g < 100 and b < 100:
+                    new_pixels[x, y] = white_color
+                else:
+                    new_pixels[x, y] = (r, g, b, a)
+            else:
+                new_pixels[x, y] = (0, 0, 0, 0)
+    return np.asarray(new_img)
+
+
+def swap_hq(pixels, enji_color=ENJI_COLOR):
+    """swap_colors_hq.py の色の入れ替えのループ（移動と再サンプリングは shift / resample で行う）"""
+    img = _image(pixels)
+    pixels = img.load()
+    width, height = img.size
+    new_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    new_pixels = new_img.load()
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if a == 0:
+                new_pixels[x, y] = (0, 0, 0, 0)
+            else:
+                gray = (r + g + b) / 3
+                if gray > 200:
+                    new_pixels[x, y] = (enji_color[0], enji_color[1], enji_color[2], a)
+                elif r > g and r > b and gray < 200:
+                    new_pixels[x, y] = (255, 255, 255, a)
+                else:
+                    if gray > 128:
+                        ratio = (gray - 128) / 127
+                        new_r = int(enji_color[0] + (255 - enji_color[0]) * ratio)
+                        new_g = int(enji_color[1] + (255 - enji_color[1]) * ratio)
+                        new_b = int(enji_color[2] + (255 - enji_color[2]) * ratio)
+                        new_pixels[x, y] = (new_r, new_g, new_b, a)
+                    else:
+                        new_pixels[x, y] = (255, 255, 255, a)
+    return np.asarray(new_img)
+
+
+def shift(pixels):
+    """shift_icon.py の右へ 1px の移動"""
+    img = _image(pixels)
+    width, height = img.size
+    new_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    new_img.paste(img, (1, 0))
+    return np.asarray(new_img)
+
+
+def resample(pixels):
+    """swap_colors_hq.py のアンチエイリアス（LANCZOS で 2 倍にしてから戻す）"""
+    img = _image(pixels)
+    width, height = img.size
+    img = img.resize((width * 2, height * 2), Image.Resampling.LANCZOS)
+    img = img.resize((width, height), Image.Resampling.LANCZOS)
+    return np.asarray(img)
+
+
+# bench.TRANSFORMS と同じ名前の変換
+TRANSFORMS = {
+    'invert': invert,
+    'swap': swap,
+    'swap_hq': swap_hq,
+    'shift': shift,
+    'resample': resample,
+}
+
+
+def run(pixels, transform):
+    """bench.py の transform に当たる元の処理の結果（RGBA の配列）"""
+    return np.array(TRANSFORMS[transform](pixels))
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+符号付き距離場（SDF）によるアイコンの再着色
+
+マスター画像から
+  - フラスコ（前景色の部分）の境界
+  - アイコン全体の輪郭（アルファ）
+までの符号付き距離（内側が負、マスターのピクセル単位）を一度だけ求めてキャッシュする。
+以降はどのサイズ・どの配色でも、距離場を縮小して被覆率 clip(0.5 - 距離, 0, 1) を
+計算するだけで、エッジが常に 1px 幅でアンチエイリアスされたアイコンになる。
+
+境界は隣り合うピクセルの間で被覆率が 0.5 をまたぐ位置を線形補間して求めるため、
+アンチエイリアス済みのマスターからもサブピクセルの精度で境界を取り出せる。
+距離は Jump Flooding で全ピクセルに伝える（各パスは配列全体のずらし比較だけ）。
+
+使い方:
+    python -m icon_tools.sdf waselab_icon.png --size 20 --size 1024 -o build/sdf
+    python -m icon_tools.sdf waselab_icon.png --background 255/255/255 --foreground 140/34/51 -o build/sdf
+"""
+
+import argparse
+import hashlib
+import os
+
+import numpy as np
+
+from icon_tools import __version__, palette, profiling, raster, recolor
+from icon_tools.cache import encode_png, write_if_changed
+from icon_tools.themes import blend_levels
+
+DEFAULT_CACHE_DIR = os.path.join('.icon_cache', 'sdf')
+
+# 同じプロセス内で求めた距離場（パイプラインで何度も呼ばれるため）
+_fields = {}
+
+
+def _crossings(coverage):
+    """被覆率が 0.5 をまたぐ隣接ピクセルの組から、各ピクセルに最も近い境界の点を求める
+
+    (高さ, 幅, 2) の配列で (x, y) を返し、隣に境界がないピクセルは inf にする。
+    """
+    height, width = coverage.shape
+    seeds = np.full((height, width, 2), np.inf, dtype=np.float32)
+    nearest = np.full((height, width), np.inf, dtype=np.float32)
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+
+    def offer(region, x, y, distance):
+        closer = distance < nearest[region]
+        nearest[region] = np.where(closer, distance, nearest[region])
+        seeds[region] = np.where(closer[..., None], np.stack([x, y], axis=-1), seeds[region])
+
+    # 縦に隣り合う組と横に隣り合う組
+    for first, second, vertical in (
+        ((slice(None, -1), slice(None)), (slice(1, None), slice(None)), True),
+        ((slice(None), slice(None, -1)), (slice(None), slice(1, None)), False),
+    ):
+        a, b = coverage[first], coverage[second]
+        straddle = (a >= 0.5) != (b >= 0.5)
+        # first から second へ向かって被覆率が 0.5 になる位置（0〜1）
+        t = np.divide(a - 0.5, a - b, out=np.full(a.shape, 0.5, np.float32), where=straddle)
+        x = xs[first] + (0 if vertical else t)
+        y = ys[first] + (t if vertical else 0)
+        offer(first, x, y, np.where(straddle, t, np.inf))
+        offer(second, x, y, np.where(straddle, 1 - t, np.inf))
+    return seeds
+
+
+def _jump_flood(seeds):
+    """各ピクセルに最も近い境界の点を伝え、その点までの距離を返す
+
+    Jump Flooding（ずらし幅を半分ずつにしながら8近傍の候補と比べる）の後、
+    誤差を減らすためにずらし幅 1 のパスをもう1回行う。比較は距離の2乗で行う。
+    """
+    height, width = seeds.shape[:2]
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    sx, sy = seeds[..., 0].copy(), seeds[..., 1].copy()
+    current = (sx - xs) ** 2 + (sy - ys) ** 2
+
+    steps = []
+    step = 1 << (max(height, width) - 1).bit_length()
+    while step > 1:
+        step //= 2
+        steps.append(step)
+    for step in steps + [1]:
+        for dy in (-step, 0, step):
+            for dx in (-step, 0, step):
+                if dx == 0 and dy == 0:
+                    continue
+                # (dy, dx) だけ離れたピクセルの境界の点を候補にする
+                target = (slice(max(-dy, 0), height - max(dy, 0)), slice(max(-dx, 0), width - max(dx, 0)))
+                source = (slice(max(dy, 0), height - max(-dy, 0)), slice(max(dx, 0), width - max(-dx, 0)))
+                cx, cy = sx[source], sy[source]
+                d = (cx - xs[target]) ** 2 + (cy - ys[target]) ** 2
+                closer = d < current[target]
+                np.copyto(current[target], d, where=closer)
+                np.copyto(sx[target], cx, where=closer)
+                np.copyto(sy[target], cy, where=closer)
+    return np.sqrt(current)
+
+
+def signed_distance(coverage):
+    """被覆率（0〜1）の配列から、0.5 の等値線までの符号付き距離（内側が負）を求める"""
+    coverage = np.asarray(coverage, dtype=np.float32)
+    distance = _jump_flood(_crossings(coverage))
+    # 境界のない画像（すべて内側・外側）では十分に遠い距離にする
+    distance = np.minimum(distance, float(sum(coverage.shape)))
+    return np.where(coverage >= 0.5, -distance, distance).astype(np.float32)
+
+
+def coverages(pixels, background=None, foreground=None):
+    """(フラスコの被覆率, アイコン全体の被覆率) を求める
+
+    不透明なピクセルがなく背景色が決まらない場合は、フラスコもないものとする。
+    """
+    if background is None or foreground is None:
+        analysis = palette.analyze(pixels)
+        background = analysis.background if background is None else background
+        foreground = analysis.foreground if foreground is None else foreground
+    if foreground is None:
+        foreground = recolor.WHITE_COLOR
+    silhouette = pixels[..., 3].astype(np.float32) / 255
+    if background is None:
+        return np.zeros_like(silhouette), silhouette
+    flask = blend_levels(pixels, background, foreground).astype(np.float32) / 255
+    return flask, silhouette
+
+
+def _key(pixels):
+    digest = hashlib.sha256(np.ascontiguousarray(pixels).tobytes())
+    digest.update(f'{pixels.shape}:{__version__}'.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+@profiling.profiled('distance_field')
+def field(pixels, cache_dir=DEFAULT_CACHE_DIR):
+    """(高さ, 幅, 2) の距離場（フラスコ, アイコン全体）を返す（プロセス内とディスクにキャッシュする）"""
+    key = _key(pixels)
+    if key in _fields:
+        return _fields[key]
+    path = os.path.join(cache_dir, f'{key}.npy') if cache_dir else None
+    if path and os.path.exists(path):
+        distances = np.load(path)
+    else:
+        flask, silhouette = coverages(pixels)
+        distances = np.stack([signed_distance(flask), signed_distance(silhouette)], axis=-1)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, distances)
+    _fields[key] = distances
+    return distances
+
+
+def _resize(distances, size):
+    """距離場を size x size に双線形補間で縮小・拡大し、出力のピクセル単位に換算する"""
+    height, width = distances.shape[:2]
+    scale = size / max(height, width)
+    # 出力の画素の中心に対応するマスター上の座標
+    ys = np.clip((np.arange(size, dtype=np.float32) + 0.5) / scale - 0.5, 0, height - 1)
+    xs = np.clip((np.arange(size, dtype=np.float32) + 0.5) / scale - 0.5, 0, width - 1)
+    y0 = np.minimum(ys.astype(np.intp), height - 2)
+    x0 = np.minimum(xs.astype(np.intp), width - 2)
+    fy = (ys - y0)[:, None, None]
+    fx = (xs - x0)[None, :, None]
+
+    top = distances[y0][:, x0] * (1 - fx) + distances[y0][:, x0 + 1] * fx
+    bottom = distances[y0 + 1][:, x0] * (1 - fx) + distances[y0 + 1][:, x0 + 1] * fx
+    return (top * (1 - fy) + bottom * fy) * scale
+
+
+@profiling.profiled('sdf_render')
+def render(distances, size, background, foreground):
+    """距離場から size x size のアイコンを描く（フラスコを foreground、それ以外を background）"""
+    scaled = _resize(distances, size)
+    coverage = np.clip(0.5 - scaled, 0, 1)
+    flask = coverage[..., 0:1]
+    rgb = np.array(background, np.float32) * (1 - flask) + np.array(foreground, np.float32) * flask
+
+    out = np.empty((size, size, 4), dtype=np.uint8)
+    out[..., :3] = np.rint(rgb)
+    out[..., 3] = np.rint(coverage[..., 1] * 255)
+    out[out[..., 3] == 0] = 0
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='距離場から任意のサイズ・配色のアイコンを描く')
+    parser.add_argument('master', nargs='?', default='waselab_icon.png', help='マスター画像')
+    parser.add_argument('--size', type=int, action='append', help='一辺のピクセル数（複数指定可、既定: マスターと同じ）')
+    parser.add_argument('--background', default='/'.join(map(str, recolor.ENJI_COLOR)), help='背景色（R/G/B）')
+    parser.add_argument('--foreground', default='/'.join(map(str, recolor.WHITE_COLOR)), help='フラスコの色（R/G/B）')
+    parser.add_argument('-o', '--output-dir', required=True, help='出力先のディレクトリ')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'sdf'):
+        pixels = raster.load(args.master)
+        distances = field(pixels)
+        background = tuple(int(c) for c in args.background.split('/'))
+        foreground = tuple(int(c) for c in args.foreground.split('/'))
+        for size in args.size or [max(pixels.shape[:2])]:
+            path = os.path.join(args.output_dir, f'icon_{size}.png')
+            write_if_changed(path, encode_png(recolor.to_image(render(distances, size, background, foreground))))
+            print(f"保存しました: {path}")
+
+
+if __name__ == '__main__':
+    main()
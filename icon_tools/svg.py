@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+フラスコアイコンの SVG を任意のサイズに直接ラスタライズ
+
+assets/icons/flask_icon.svg で使っている範囲の SVG に対応する:
+  - 要素: <circle>, <rect>（角丸なし）, <path>（M/L/H/V/Z の直線のみ）, <g>
+  - transform: translate() と scale()（等倍率のみ）
+  - fill: #RGB / #RRGGBB / white / black / none、fill-rule（nonzero / evenodd）
+
+各図形は境界までの符号付き距離（ピクセル単位）を画素の中心で求め、
+1px 幅の被覆率 clip(0.5 - 距離, 0, 1) に変換してアンチエイリアスする。
+同じ色で連続する図形（フラスコの口・首・本体など）は距離の最小値で結合してから
+被覆率にするため、図形の継ぎ目に背景色がにじまない。
+
+1024x1024 のビットマップを縮小する代わりに各サイズへ直接描くので、
+20x20 のような小さなサイズでも輪郭がぼやけない。
+
+使い方:
+    python -m icon_tools.svg assets/icons/flask_icon.svg --size 1024 -o flask.png
+    python -m icon_tools.svg assets/icons/flask_icon.svg --size 40 --scheme white_bg -o flask_40.png
+"""
+
+import argparse
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from icon_tools import profiling, recolor
+from icon_tools.cache import encode_png, write_if_changed
+
+FLASK_SVG = 'assets/icons/flask_icon.svg'
+
+# 配色（背景, フラスコ）。None は SVG に書かれた色のまま描く
+SCHEMES = {
+    'enji_bg': (recolor.ENJI_COLOR, recolor.WHITE_COLOR),
+    'white_bg': (recolor.WHITE_COLOR, recolor.ENJI_COLOR),
+    'original': None,
+}
+
+_NAMED_COLORS = {
+    'white': (255, 255, 255),
+    'black': (0, 0, 0),
+}
+
+_PATH_TOKEN = re.compile(r'[MmLlHhVvZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[A-Za-z]')
+_TRANSFORM = re.compile(r'(\w+)\s*\(([^)]*)\)')
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _numbers(text):
+    return [float(v) for v in re.split(r'[\s,]+', text.strip()) if v]
+
+
+def parse_color(value):
+    """fill の値を RGB に変換（none は None）"""
+    value = value.strip()
+    if value == 'none':
+        return None
+    if value in _NAMED_COLORS:
+        return _NAMED_COLORS[value]
+    match = re.fullmatch(r'#([0-9A-Fa-f]{3}|[0-9A-Fa-f]{6})', value)
+    if not match:
+        raise ValueError(f"未対応の色の指定です: {value}")
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def parse_transform(text, scale=1.0, offset=(0.0, 0.0)):
+    """transform 属性を親の (倍率, (dx, dy)) に合成する"""
+    for name, args in _TRANSFORM.findall(text or ''):
+        values = _numbers(args)
+        if name == 'translate':
+            dx, dy = values[0], values[1] if len(values) > 1 else 0.0
+            offset = (offset[0] + scale * dx, offset[1] + scale * dy)
+        elif name == 'scale' and (len(values) == 1 or values[0] == values[1]):
+            scale *= values[0]
+        else:
+            raise ValueError(f"未対応の transform です: {name}({args})")
+    return scale, offset
+
+
+def parse_path(d):
+    """path の d 属性を輪郭（点の配列）のリストに変換"""
+    tokens = _PATH_TOKEN.findall(d)
+    contours, points = [], []
+    x = y = 0.0
+    command = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            command = token
+            i += 1
+            if command in 'Zz':
+                if points:
+                    contours.append(points)
+                    x, y = points[0]
+                points = []
+                continue
+            if command not in 'MmLlHhVv':
+                raise ValueError(f"未対応のパスコマンドです: {command}（直線のみ対応）")
+        elif command is None:
+            raise ValueError(f"パスがコマンドで始まっていません: {d.strip()[:20]}")
+
+        relative = command.islower()
+        if command in 'Hh':
+            x = float(tokens[i]) + (x if relative else 0)
+            i += 1
+        elif command in 'Vv':
+            y = float(tokens[i]) + (y if relative else 0)
+            i += 1
+        else:
+            dx, dy = float(tokens[i]), float(tokens[i + 1])
+            x, y = (x + dx, y + dy) if relative else (dx, dy)
+            i += 2
+
+        if command in 'Mm':
+            if points:
+                contours.append(points)
+            points = []
+            # M の後に続く座標は L として扱う
+            command = 'l' if relative else 'L'
+        points.append((x, y))
+    if points:
+        contours.append(points)
+    return [np.array(contour, dtype=np.float64) for contour in contours if len(contour) >= 3]
+
+
+class Circle:
+    """円（座標は SVG のユーザー座標）"""
+
+    def __init__(self, cx, cy, r, fill):
+        self.cx, self.cy, self.r = cx, cy, r
+        self.fill = fill
+
+    def bounds(self):
+        return self.cx - self.r, self.cy - self.r, self.cx + self.r, self.cy + self.r
+
+    def distance(self, x, y):
+        return np.hypot(x - self.cx, y - self.cy) - self.r
+
+
+class Polygon:
+    """直線で囲まれた図形（複数の輪郭を持てる）"""
+
+    def __init__(self, contours, fill, rule='nonzero'):
+        self.contours = contours
+        self.fill = fill
+        self.rule = rule
+
+    def bounds(self):
+        points = np.concatenate(self.contours)
+        return (*points.min(axis=0), *points.max(axis=0))
+
+    def distance(self, x, y):
+        nearest = np.full(x.shape, np.inf, dtype=x.dtype)
+        winding = np.zeros(x.shape, dtype=np.int32)
+        for contour in self.contours:
+            for (x0, y0), (x1, y1) in zip(contour, np.roll(contour, -1, axis=0)):
+                # 線分までの距離
+                ex, ey = x1 - x0, y1 - y0
+                length = ex * ex + ey * ey
+                t = np.clip(((x - x0) * ex + (y - y0) * ey) / length, 0, 1) if length else 0
+                np.minimum(nearest, np.hypot(x - x0 - t * ex, y - y0 - t * ey), out=nearest)
+                # 巻き数（点から右に伸ばした半直線と交わる向き）
+                side = ex * (y - y0) - ey * (x - x0)
+                winding += ((y0 <= y) & (y < y1) & (side > 0)).astype(np.int32)
+                winding -= ((y1 <= y) & (y < y0) & (side < 0)).astype(np.int32)
+        inside = (winding % 2 == 1) if self.rule == 'evenodd' else (winding != 0)
+        return np.where(inside, -nearest, nearest)
+
+
+class Document:
+    """ラスタライズ用に読み込んだ SVG"""
+
+    def __init__(self, view_box, shapes):
+        self.view_box = view_box
+        self.shapes = shapes
+
+    def fills(self):
+        """使われている塗りの色（描画順、重複なし）"""
+        return list(dict.fromkeys(shape.fill for shape in self.shapes))
+
+    def scheme(self, background, foreground):
+        """最初に描く図形の色を background に、それ以外の色を foreground に置き換える対応表"""
+        fills = self.fills()
+        return {fill: tuple(background if i == 0 else foreground) for i, fill in enumerate(fills)}
+
+
+def _collect(element, scale, offset, shapes):
+    scale, offset = parse_transform(element.get('transform'), scale, offset)
+    tag = _local_name(element.tag)
+    fill = element.get('fill')
+    color = parse_color(fill) if fill is not None else (0, 0, 0)
+
+    def point(px, py):
+        return offset[0] + scale * px, offset[1] + scale * py
+
+    if tag == 'circle' and color:
+        cx, cy = point(float(element.get('cx', 0)), float(element.get('cy', 0)))
+        shapes.append(Circle(cx, cy, scale * float(element.get('r')), color))
+    elif tag == 'rect' and color:
+        if element.get('rx') or element.get('ry'):
+            raise ValueError("角丸の rect には対応していません")
+        x, y = float(element.get('x', 0)), float(element.get('y', 0))
+        w, h = float(element.get('width')), float(element.get('height'))
+        corners = np.array([point(x, y), point(x + w, y), point(x + w, y + h), point(x, y + h)])
+        shapes.append(Polygon([corners], color))
+    elif tag == 'path' and color:
+        contours = [np.array([point(px, py) for px, py in contour])
+                    for contour in parse_path(element.get('d', ''))]
+        shapes.append(Polygon(contours, color, element.get('fill-rule', 'nonzero')))
+    elif tag in ('svg', 'g'):
+        for child in element:
+            _collect(child, scale, offset, shapes)
+
+
+def load(path=FLASK_SVG):
+    """SVG ファイルを読み込む"""
+    root = ET.parse(path).getroot()
+    if root.get('viewBox'):
+        view_box = tuple(_numbers(root.get('viewBox')))
+    else:
+        view_box = (0.0, 0.0, float(root.get('width')), float(root.get('height')))
+    shapes = []
+    _collect(root, 1.0, (0.0, 0.0), shapes)
+    return Document(view_box, shapes)
+
+
+def _groups(shapes):
+    """同じ色で連続する図形をまとめる"""
+    groups = []
+    for shape in shapes:
+        if groups and groups[-1][0] == shape.fill:
+            groups[-1][1].append(shape)
+        else:
+            groups.append((shape.fill, [shape]))
+    return groups
+
+
+@profiling.profiled('rasterize')
+def render(document, size, colors=None):
+    """size x size の RGBA 配列に描画
+
+    colors は {SVG の色: 描画する色} の対応表（Document.scheme() で作れる）。
+    """
+    vx, vy, vw, vh = document.view_box
+    unit = max(vw, vh) / size
+    # viewBox が正方形でない場合は中央に配置する（preserveAspectRatio の既定の xMidYMid meet）
+    left, top = vx - (max(vw, vh) - vw) / 2, vy - (max(vw, vh) - vh) / 2
+
+    color = np.zeros((size, size, 3), dtype=np.float32)
+    alpha = np.zeros((size, size), dtype=np.float32)
+    for fill, shapes in _groups(document.shapes):
+        fill = (colors or {}).get(fill, fill)
+        # 図形の外接矩形（1px の余白付き）の範囲だけを計算する
+        bounds = np.array([shape.bounds() for shape in shapes])
+        x0 = max(int(np.floor((bounds[:, 0].min() - left) / unit)) - 1, 0)
+        y0 = max(int(np.floor((bounds[:, 1].min() - top) / unit)) - 1, 0)
+        x1 = min(int(np.ceil((bounds[:, 2].max() - left) / unit)) + 1, size)
+        y1 = min(int(np.ceil((bounds[:, 3].max() - top) / unit)) + 1, size)
+        if x0 >= x1 or y0 >= y1:
+            continue
+
+        # 画素の中心の SVG 座標
+        xs = (left + (np.arange(x0, x1, dtype=np.float32) + 0.5) * unit)[None, :]
+        ys = (top + (np.arange(y0, y1, dtype=np.float32) + 0.5) * unit)[:, None]
+        xs, ys = np.broadcast_arrays(xs, ys)
+        distance = shapes[0].distance(xs, ys)
+        for shape in shapes[1:]:
+            np.minimum(distance, shape.distance(xs, ys), out=distance)
+        coverage = np.clip(0.5 - distance / unit, 0, 1).astype(np.float32)
+
+        # 乗算済みアルファで重ねる
+        keep = 1 - coverage
+        region = (slice(y0, y1), slice(x0, x1))
+        color[region] = color[region] * keep[..., None] + coverage[..., None] * np.array(fill, np.float32)
+        alpha[region] = alpha[region] * keep + coverage
+
+    out = np.zeros((size, size, 4), dtype=np.uint8)
+    np.divide(color, alpha[..., None], out=color, where=alpha[..., None] > 0)
+    out[..., :3] = np.rint(np.clip(color, 0, 255))
+    out[..., 3] = np.rint(alpha * 255)
+    return out
+
+
+def scheme_colors(document, scheme):
+    """SCHEMES の名前から色の対応表を作る"""
+    if scheme not in SCHEMES:
+        raise ValueError(f"不明な配色です: {scheme}（{', '.join(SCHEMES)} から選択）")
+    return document.scheme(*SCHEMES[scheme]) if SCHEMES[scheme] else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SVG のアイコンを指定サイズに直接ラスタライズ')
+    parser.add_argument('svg', nargs='?', default=FLASK_SVG, help='SVG ファイル')
+    parser.add_argument('--size', type=int, default=1024, help='一辺のピクセル数')
+    parser.add_argument('--scheme', default='enji_bg', help=f"配色（{', '.join(SCHEMES)}）")
+    parser.add_argument('-o', '--output', required=True, help='出力先の PNG')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'svg'):
+        try:
+            document = load(args.svg)
+            colors = scheme_colors(document, args.scheme)
+        except ValueError as e:
+            parser.error(str(e))
+        write_if_changed(args.output, encode_png(recolor.to_image(render(document, args.size, colors))))
+        print(f"保存しました: {args.output}（{args.size}x{args.size}）")
+
+
+if __name__ == '__main__':
+    main()
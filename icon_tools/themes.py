@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+AvatarColors の全カラーでテーマ別アイコンを一括生成
+
+lib/models/avatar_color.dart の AvatarColors.all からカラーの一覧を読み取り、
+マスター画像の各ピクセルが「ブランドカラー（背景）」と「白（フラスコ）」の
+どちらにどれだけ近いかを 0〜255 の値として一度だけ求める。
+各カラーについては 256 段階の色の表をまとめてブロードキャストで作り、
+画像への反映は表からの取り出し1回で行う。PNG のエンコードは並列に行う。
+
+使い方:
+    python -m icon_tools.themes waselab_icon.png -o build/icon_variants
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+import time
+
+import numpy as np
+
+from icon_tools import palette, profiling, raster, recolor
+from icon_tools.cache import Manifest, encode_png, write_if_changed
+
+AVATAR_COLORS_DART = 'lib/models/avatar_color.dart'
+DEFAULT_OUTPUT_DIR = os.path.join('build', 'icon_variants')
+
+# Flutter の Colors.xxx（マテリアルカラーの 500 番など）
+MATERIAL_COLORS = {
+    'red': 0xFFF44336,
+    'pink': 0xFFE91E63,
+    'purple': 0xFF9C27B0,
+    'deepPurple': 0xFF673AB7,
+    'indigo': 0xFF3F51B5,
+    'blue': 0xFF2196F3,
+    'lightBlue': 0xFF03A9F4,
+    'cyan': 0xFF00BCD4,
+    'teal': 0xFF009688,
+    'green': 0xFF4CAF50,
+    'lightGreen': 0xFF8BC34A,
+    'lime': 0xFFCDDC39,
+    'yellow': 0xFFFFEB3B,
+    'amber': 0xFFFFC107,
+    'orange': 0xFFFF9800,
+    'deepOrange': 0xFFFF5722,
+    'brown': 0xFF795548,
+    'grey': 0xFF9E9E9E,
+    'blueGrey': 0xFF607D8B,
+    'black': 0xFF000000,
+    'black87': 0xDD000000,
+    'white': 0xFFFFFFFF,
+}
+
+# Colors.xxx[shade] のうち avatar_color.dart で使っているもの
+MATERIAL_SHADES = {
+    ('blue', 300): 0xFF64B5F6,
+    ('blue', 600): 0xFF1E88E5,
+    ('blue', 900): 0xFF0D47A1,
+    ('green', 900): 0xFF1B5E20,
+    ('amber', 300): 0xFFFFD54F,
+    ('orange', 900): 0xFFE65100,
+    ('grey', 300): 0xFFE0E0E0,
+    ('grey', 600): 0xFF757575,
+    ('blueGrey', 900): 0xFF263238,
+}
+
+_ENTRY = re.compile(r'AvatarColor\((.*?)\n\s*\),', re.S)
+_COLOR_EXPR = re.compile(r"Color\(0x([0-9A-Fa-f]{8})\)|Colors\.(\w+)(?:\[(\d+)\]!?)?")
+
+
+def _argb_to_rgb(argb):
+    """ARGB の値を白の上に重ねた RGB に変換（black87 などの半透明色のため）"""
+    a = (argb >> 24) & 0xFF
+    rgb = np.array([(argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF], dtype=np.float64)
+    return tuple(int(round(v)) for v in rgb * a / 255 + 255 * (1 - a / 255))
+
+
+def parse_color(expr):
+    """Dart の色の式（Color(0x...), Colors.xxx, Colors.xxx[300]!）を RGB に変換"""
+    match = _COLOR_EXPR.search(expr)
+    if not match:
+        raise ValueError(f"色の式を解釈できません: {expr}")
+    hex_value, name, shade = match.groups()
+    if hex_value:
+        return _argb_to_rgb(int(hex_value, 16))
+    key = (name, int(shade)) if shade else name
+    table = MATERIAL_SHADES if shade else MATERIAL_COLORS
+    if key not in table:
+        raise ValueError(f"未対応のマテリアルカラーです: {match.group(0)}")
+    return _argb_to_rgb(table[key])
+
+
+def load_avatar_colors(path=AVATAR_COLORS_DART):
+    """AvatarColors.all の (id, 名前, RGB) の一覧
+
+    アプリの AvatarColors.getColorValue と同じく、
+    グラデーションのカラーはグラデーションの最初の色を使う。
+    """
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    source = source[source.index('static final List<AvatarColor> all'):]
+
+    colors = []
+    for body in _ENTRY.findall(source):
+        fields = dict(re.findall(r"(\w+):\s*('[^']*'|[^,\n\[]+)", body))
+        expr = fields['color']
+        gradient = re.search(r'gradientColors:\s*\[(.*)', body, re.S)
+        if fields.get('hasGradient', '').strip() == 'true' and gradient:
+            expr = gradient.group(1)
+        colors.append((fields['id'].strip("'"), fields['name'].strip("'"), parse_color(expr)))
+    return colors
+
+
+def blend_levels(pixels, background, foreground):
+    """各ピクセルが background→foreground の線分上のどこにあるかを 0〜255 で返す
+
+    background と foreground が同じ色なら線分がないので、すべて foreground（255）とする。
+    """
+    bg = np.array(background, dtype=np.float32)
+    direction = np.array(foreground, dtype=np.float32) - bg
+    length = float(direction @ direction)
+    if length == 0:
+        return np.full(pixels.shape[:2], 255, dtype=np.uint8)
+    t = (pixels[..., :3].astype(np.float32) - bg) @ (direction / length)
+    return np.rint(np.clip(t, 0, 1) * 255).astype(np.uint8)
+
+
+def color_tables(colors, foreground=recolor.WHITE_COLOR):
+    """各カラーの 256 段階の表 (カラー数, 256, 3) をまとめて作る"""
+    backgrounds = np.array(colors, dtype=np.float32)[:, None, :]
+    ramp = (np.arange(256, dtype=np.float32) / 255)[None, :, None]
+    fg = np.array(foreground, dtype=np.float32)[None, None, :]
+    return np.rint(backgrounds + (fg - backgrounds) * ramp).astype(np.uint8)
+
+
+# ワーカープロセスごとに一度だけ受け取る値
+_levels = None
+_alpha = None
+
+
+def _init_worker(levels, alpha):
+    global _levels, _alpha
+    _levels, _alpha = levels, alpha
+
+
+def _render_variant(path, table):
+    pixels = np.empty(_levels.shape + (4,), dtype=np.uint8)
+    pixels[..., :3] = table[_levels]
+    pixels[..., 3] = _alpha
+    return path, write_if_changed(path, encode_png(recolor.to_image(pixels)))
+
+
+@profiling.profiled('generate')
+def generate(pixels, jobs_by_path, jobs=None):
+    """{出力先: RGB} のカラーごとにアイコンを書き出す"""
+    analysis = palette.analyze(pixels)
+    levels = blend_levels(pixels, analysis.accent[:3], analysis.base or recolor.WHITE_COLOR)
+    alpha = np.ascontiguousarray(pixels[..., 3])
+
+    paths = list(jobs_by_path)
+    tables = color_tables([jobs_by_path[path] for path in paths])
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        _init_worker(levels, alpha)
+        return [_render_variant(path, table) for path, table in zip(paths, tables)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(levels, alpha)) as pool:
+        return list(pool.map(_render_variant, paths, tables))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='AvatarColors の全カラーでアイコンを生成')
+    parser.add_argument('master', nargs='?', default='waselab_icon.png', help='マスター画像')
+    parser.add_argument('-o', '--output-dir', default=DEFAULT_OUTPUT_DIR, help='出力先のディレクトリ')
+    parser.add_argument('--colors', default=AVATAR_COLORS_DART, help='avatar_color.dart のパス')
+    parser.add_argument('-j', '--jobs', type=int, help='並列数（既定: CPU数）')
+    parser.add_argument('--force', action='store_true', help='キャッシュを無視して作り直す')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    with profiling.session(args.profile, 'themes'):
+        start = time.perf_counter()
+        colors = load_avatar_colors(args.colors)
+        manifest = Manifest()
+        keys, targets = {}, {}
+        for color_id, name, rgb in colors:
+            path = os.path.join(args.output_dir, f'{color_id}.png')
+            keys[path] = manifest.key(args.master, {'theme': list(rgb)})
+            if args.force or not manifest.is_fresh(path, keys[path]):
+                targets[path] = rgb
+            if sum((255 - c) ** 2 for c in rgb) < 40 ** 2:
+                print(f"注意: {name}（{color_id}）は白に近く、フラスコが見えにくくなります")
+
+        if targets:
+            results = generate(raster.load(args.master, manifest), targets, args.jobs)
+            for path, _ in results:
+                manifest.record(path, keys[path])
+        manifest.save()
+
+        elapsed = time.perf_counter() - start
+        print(f"{len(colors)} 色のうち {len(targets)} 件を生成しました"
+              f"（{args.output_dir}, {elapsed:.2f} 秒）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+タイル分割による省メモリな色変換・アンチエイリアス
+
+デザインチームから届く 8K の印刷用マスターでは、画像全体を2倍に拡大する
+アンチエイリアスだけで数GBのメモリを使ってしまう。
+ここでは画像をタイルに分け、周囲にのりしろ（halo）を付けて1枚ずつ処理し、
+のりしろを除いた部分を出力先の配列に書き込んでいく。
+作業用のメモリはタイルの大きさだけで決まり、画像全体の大きさには比例しない。
+
+のりしろはカーネルの届く範囲より広く取っているため、
+タイルの境目も含めて画像全体を一度に処理した場合と同じ結果になる。
+"""
+
+from PIL import Image
+import numpy as np
+
+from icon_tools import recolor
+
+DEFAULT_TILE = 512
+
+# LANCZOS の半径（3px）を拡大・縮小の両方で見込んだのりしろ
+ANTIALIAS_HALO = 8
+
+
+def tiles(height, width, tile=DEFAULT_TILE):
+    """(y0, y1, x0, x1) のタイル範囲を行優先で返す"""
+    for y0 in range(0, height, tile):
+        for x0 in range(0, width, tile):
+            yield y0, min(y0 + tile, height), x0, min(x0 + tile, width)
+
+
+def apply(pixels, func, tile=DEFAULT_TILE, halo=0, out=None):
+    """func をタイルごとに適用して out に書き込む
+
+    func は (h, w, 4) の配列を受け取り同じ大きさの配列を返す関数。
+    halo > 0 の場合、func には周囲 halo ピクセルを含めたタイルを渡す。
+    out を省略すると新しい配列を確保する。halo が 0 なら out に pixels 自身を渡して
+    その場で書き換えることもできる。
+    """
+    height, width = pixels.shape[:2]
+    if out is None:
+        out = np.empty_like(pixels)
+    for y0, y1, x0, x1 in tiles(height, width, tile):
+        top, left = max(y0 - halo, 0), max(x0 - halo, 0)
+        bottom, right = min(y1 + halo, height), min(x1 + halo, width)
+        result = func(pixels[top:bottom, left:right])
+        out[y0:y1, x0:x1] = result[y0 - top:y1 - top, x0 - left:x1 - left]
+    return out
+
+
+def supersample(pixels, scale=2):
+    """scale 倍に拡大してから元のサイズに戻すアンチエイリアス（1タイル分）"""
+    img = recolor.to_image(pixels)
+    width, height = img.size
+    img = img.resize((width * scale, height * scale), Image.Resampling.LANCZOS)
+    img = img.resize((width, height), Image.Resampling.LANCZOS)
+    return np.asarray(img)
+
+
+def antialias(pixels, scale=2, tile=DEFAULT_TILE, out=None):
+    """supersample をタイルごとに行う"""
+    return apply(pixels, lambda block: supersample(block, scale), tile, ANTIALIAS_HALO, out)
@@ -1,35 +1,20 @@
 #!/usr/bin/env python3
-from PIL import Image
+from icon_tools.backup import snapshot
+from icon_tools.pipeline import save
+from icon_tools.raster import load
+from icon_tools.recolor import invert
 
-# オリジナルのアイコンを読み込む
-img = Image.open('waselab_icon_original.png')
+# オリジナルのアイコンを読み込み、不透明なピクセルの色を反転
+# 白(255,255,255) -> 赤っぽい色
+# 赤っぽい色 -> 白
+pixels = invert(load('waselab_icon_original.png'))
 
-# RGBA形式に変換
-img = img.convert('RGBA')
-
-# ピクセルデータを取得
-pixels = img.load()
-width, height = img.size
-
-# 各ピクセルの色を反転
-for y in range(height):
-    for x in range(width):
-        r, g, b, a = pixels[x, y]
-        
-        # アルファチャンネルは保持しつつ、色を反転
-        # 白(255,255,255) -> 赤っぽい色
-        # 赤っぽい色 -> 白
-        if a > 0:  # 透明でないピクセルのみ処理
-            # 色を反転
-            pixels[x, y] = (255 - r, 255 - g, 255 - b, a)
-
-# バックアップを保存
-original = Image.open('waselab_icon.png')
-original.save('waselab_icon_before_invert.png')
+# バックアップを保存（再エンコードせず元のバイト列のまま）
+snapshot('waselab_icon.png', 'before_invert')
 
 # 反転した画像を保存
-img.save('waselab_icon.png')
+save(pixels, 'waselab_icon.png')
 
 print("アイコンの色を反転しました。")
-print("バックアップ: waselab_icon_before_invert.png")
-print("反転後: waselab_icon.png")
\ No newline at end of file
+print("バックアップ: python -m icon_tools.backup undo で元に戻せます")
+print("反転後: waselab_icon.png")
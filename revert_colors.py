@@ -1,24 +1,20 @@
 #!/usr/bin/env python3
-from PIL import Image
+from icon_tools.backup import snapshot
+from icon_tools.pipeline import VARIANTS, run, save
+from icon_tools.raster import load
 
 # 高画質の元画像を使用（weselab_icon.png）
-img = Image.open('weselab_icon.png')
+pixels = load('weselab_icon.png')
 
-# RGBA形式に変換
-img = img.convert('RGBA')
+# 右に1ピクセル移動（白背景・えんじフラスコの配色はそのまま）
+final_pixels = run(pixels, VARIANTS['white_bg'])
 
-# 右に1ピクセル移動するための新しい画像を作成
-width, height = img.size
-final_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-final_img.paste(img, (1, 0))
-
-# バックアップを保存
-current = Image.open('waselab_icon.png')
-current.save('waselab_icon_enji_bg.png')
+# えんじ背景版をバックアップ（再エンコードせず元のバイト列のまま）
+snapshot('waselab_icon.png', 'enji_bg')
 
 # 元の配色（白背景・えんじフラスコ）を保存
-final_img.save('waselab_icon.png')
+save(final_pixels, 'waselab_icon.png')
 
 print("背景を白、フラスコをえんじ色に戻しました（右1px移動を維持）。")
-print("えんじ背景版のバックアップ: waselab_icon_enji_bg.png")
-print("白背景版: waselab_icon.png")
\ No newline at end of file
+print("えんじ背景版のバックアップ: python -m icon_tools.backup undo で戻せます")
+print("白背景版: waselab_icon.png")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Google フォームの回答を SQLite に書き出すスクリプト（ページごとのチェックポイントつき）
+
+forms.responses.list を pageToken でページ送りしながら、1ページずつ
+  - responses: 回答1件ごとの行（回答の JSON もそのまま保存する）
+  - answers:   テキストとして取り出せる回答の値（質問 ID・値ごとに1行）
+  - answer_log: answers への追加（sign=1）と、編集された回答の古い値の取り消し（sign=-1）を
+               追記だけする変更の記録（response_stats.py が新しい分だけを集計に使う）
+に書き、同じトランザクションでチェックポイント（次の pageToken）を保存する。
+全件をメモリに持たないので回答が多くても使うメモリは1ページ分で、途中で止まっても
+次の実行はチェックポイントのページから再開する。
+
+取得を最後まで終えると、取得した回答の最後の送信時刻（lastSubmittedTime）を記録し、
+次からは filter でそれ以降に送信・編集された回答だけを取得する。ページ送りの途中に
+届いた回答を取りこぼさないよう、記録する時刻は実行の開始時刻（から CLOCK_SKEW を引いたもの）
+より後にはしない。同じ回答は回答 ID で上書きするので、重なって取得しても行は増えない。
+質問の題名・種類・設定（選択肢や段階）も forms.get から questions に保存する（回答の集計用）。
+
+使い方:
+    python export_responses.py                          # form_urls.txt のフォーム
+    python export_responses.py FORM_ID [FORM_ID ...]
+    python export_responses.py --manifest form_provision.json --full   # 一括作成したすべてのフォームを最初から
+"""
+
+import argparse
+import datetime
+import json
+import sqlite3
+import time
+
+import form_sync
+import forms_client
+import profiling
+from provision_forms import RateLimiter, execute, load_manifest
+
+DEFAULT_DATABASE = 'form_responses.sqlite'
+
+# 1ページの回答数（API の上限は 5000）
+DEFAULT_PAGE_SIZE = 500
+
+# 手元の時計と API の時刻のずれの見込み
+CLOCK_SKEW = datetime.timedelta(minutes=5)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    form_id TEXT NOT NULL,
+    response_id TEXT NOT NULL,
+    create_time TEXT,
+    last_submitted_time TEXT,
+    respondent_email TEXT,
+    total_score REAL,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (form_id, response_id)
+);
+CREATE TABLE IF NOT EXISTS answers (
+    form_id TEXT NOT NULL,
+    response_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    value TEXT,
+    PRIMARY KEY (form_id, response_id, question_id, ordinal)
+);
+CREATE INDEX IF NOT EXISTS answers_question ON answers (form_id, question_id);
+CREATE TABLE IF NOT EXISTS questions (
+    form_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT,
+    kind TEXT,
+    question TEXT,
+    PRIMARY KEY (form_id, question_id)
+);
+CREATE TABLE IF NOT EXISTS answer_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    form_id TEXT NOT NULL,
+    response_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    value TEXT,
+    sign INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    form_id TEXT PRIMARY KEY,
+    since TEXT,
+    page_token TEXT,
+    run_since TEXT,
+    run_started TEXT,
+    run_watermark TEXT,
+    pages INTEGER NOT NULL DEFAULT 0,
+    updated TEXT
+);
+'''
+
+# チェックポイントの列（form_id と updated を除く）
+_CHECKPOINT_FIELDS = ('since', 'page_token', 'run_since', 'run_started', 'run_watermark', 'pages')
+
+
+def connect(path=DEFAULT_DATABASE):
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+def checkpoint(db, form_id):
+    """フォームのチェックポイント（_CHECKPOINT_FIELDS の辞書、なければ None）
+
+    since は次の実行で取得を始める時刻、page_token と run_* は途中で止まった実行の再開用。
+    """
+    row = db.execute(f"SELECT {', '.join(_CHECKPOINT_FIELDS)} FROM checkpoints WHERE form_id = ?",
+                     (form_id,)).fetchone()
+    return None if row is None else dict(zip(_CHECKPOINT_FIELDS, row))
+
+
+def parse_timestamp(value):
+    """RFC 3339 の時刻（'2024-05-01T12:34:56.123456789Z'）を UTC の datetime にする"""
+    value = value.rstrip('Z')
+    seconds, _, fraction = value.partition('.')
+    moment = datetime.datetime.fromisoformat(seconds)
+    return moment.replace(microsecond=int((fraction + '000000')[:6]))
+
+
+def format_timestamp(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _answer_rows(form_id, response):
+    for question_id, answer in response.get('answers', {}).items():
+        values = [a.get('value') for a in answer.get('textAnswers', {}).get('answers', [])]
+        values += [a.get('fileName') for a in answer.get('fileUploadAnswers', {}).get('answers', [])]
+        for ordinal, value in enumerate(values):
+            yield form_id, response['responseId'], question_id, ordinal, value
+
+
+def write_page(db, form_id, responses, state):
+    """1ページ分の回答とチェックポイントを1つのトランザクションで書く"""
+    with db:
+        ids = [(form_id, r['responseId']) for r in responses]
+        # 編集された回答は答えの数が変わることがあるので、古い行を取り消しとして記録して消してから入れ直す
+        db.executemany('INSERT INTO answer_log (form_id, response_id, question_id, ordinal, value, sign) '
+                       'SELECT form_id, response_id, question_id, ordinal, value, -1 FROM answers '
+                       'WHERE form_id = ? AND response_id = ?', ids)
+        db.executemany('DELETE FROM answers WHERE form_id = ? AND response_id = ?', ids)
+        db.executemany(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((form_id, r['responseId'], r.get('createTime'), r.get('lastSubmittedTime'), r.get('respondentEmail'),
+              r.get('totalScore'), json.dumps(r, ensure_ascii=False)) for r in responses))
+        rows = [row for r in responses for row in _answer_rows(form_id, r)]
+        db.executemany('INSERT INTO answers VALUES (?, ?, ?, ?, ?)', rows)
+        db.executemany('INSERT INTO answer_log (form_id, response_id, question_id, ordinal, value, sign) '
+                       'VALUES (?, ?, ?, ?, ?, 1)', rows)
+        db.execute(
+            'INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (form_id,) + tuple(state[field] for field in _CHECKPOINT_FIELDS)
+            + (datetime.datetime.now().isoformat(timespec='seconds'),))
+
+
+def save_questions(db, form_id, form):
+    """forms.get の結果から質問の題名・種類・設定を保存する"""
+    rows = []
+    for position, item in enumerate(form.get('items', [])):
+        question = item.get('questionItem', {}).get('question', {})
+        if question.get('questionId'):
+            rows.append((form_id, question['questionId'], position, item.get('title'), form_sync.kind(item),
+                         json.dumps(question, ensure_ascii=False)))
+    with db:
+        db.execute('DELETE FROM questions WHERE form_id = ?', (form_id,))
+        db.executemany('INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+
+def harvest(service, db, form_id, page_size=DEFAULT_PAGE_SIZE, full=False, limiter=None):
+    """フォームの新しい回答を取得して保存し、(保存した回答数, ページ数) を返す"""
+    limiter = limiter or RateLimiter()
+    state = None if full else checkpoint(db, form_id)
+    if state is None:
+        state = dict.fromkeys(_CHECKPOINT_FIELDS)
+    if not state['page_token']:
+        # 新しい実行: 前回の終わりの時刻以降の回答を取得する
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        state.update(run_since=state['since'], run_started=format_timestamp(now), run_watermark=None, pages=0)
+
+    with profiling.stage('forms.get'):
+        form, _ = execute(service.forms().get(formId=form_id), limiter)
+    save_questions(db, form_id, form)
+
+    saved = pages = 0
+    while True:
+        kwargs = {'formId': form_id, 'pageSize': page_size}
+        if state['run_since']:
+            kwargs['filter'] = f"timestamp >= {state['run_since']}"
+        if state['page_token']:
+            kwargs['pageToken'] = state['page_token']
+        with profiling.stage('responses.list'):
+            page, _ = execute(service.forms().responses().list(**kwargs), limiter)
+        responses = page.get('responses', [])
+        times = [parse_timestamp(r['lastSubmittedTime']) for r in responses if r.get('lastSubmittedTime')]
+        if state['run_watermark']:
+            times.append(parse_timestamp(state['run_watermark']))
+        if times:
+            state['run_watermark'] = format_timestamp(max(times))
+        state['page_token'] = page.get('nextPageToken')
+        state['pages'] += 1
+        if not state['page_token'] and state['run_watermark']:
+            # 最後のページまで保存できたら、次の実行はここまでの送信時刻から
+            limit = parse_timestamp(state['run_started']) - CLOCK_SKEW
+            state['since'] = format_timestamp(min(parse_timestamp(state['run_watermark']), limit))
+        with profiling.stage('write'):
+            write_page(db, form_id, responses, state)
+        saved += len(responses)
+        pages += 1
+        if not state['page_token']:
+            return saved, pages
+
+
+def form_ids(args):
+    """対象のフォーム ID（引数 → マニフェスト → form_urls.txt の順）"""
+    if args.form_ids:
+        return args.form_ids
+    if args.manifest:
+        forms = load_manifest(args.manifest).get('forms', {})
+        return [entry['form_id'] for entry in forms.values() if entry.get('form_id')]
+    from create_google_form import saved_form_id
+    form_id = saved_form_id()
+    return [form_id] if form_id else []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Google フォームの回答を SQLite に書き出す')
+    parser.add_argument('form_ids', nargs='*', metavar='FORM_ID', help='フォームの ID（既定: form_urls.txt）')
+    parser.add_argument('--manifest', help='provision_forms.py のマニフェストにあるフォームをすべて対象にする')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='書き出す SQLite のファイル')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='1ページの回答数（最大 5000）')
+    parser.add_argument('--full', action='store_true', help='チェックポイントを使わず最初から取得する')
+    forms_client.add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    forms_client.configure(args)
+
+    targets = form_ids(args)
+    if not targets:
+        parser.error('フォームの ID を指定してください（form_urls.txt がありません）')
+
+    with profiling.session(args.profile, 'export_responses'):
+        start = time.perf_counter()
+        service = forms_client.build_service(
+            forms_client.get_credentials(forms_client.SCOPES + [forms_client.RESPONSES_SCOPE]))
+        db = connect(args.database)
+        limiter = RateLimiter()
+        failed = 0
+        try:
+            for form_id in targets:
+                try:
+                    saved, pages = harvest(service, db, form_id, args.page_size, args.full, limiter)
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ {form_id}: {e}（次回はチェックポイントから再開します）")
+                    continue
+                print(f"✅ {form_id}: {saved} 件（{pages} ページ）")
+        finally:
+            db.close()
+        print(f"{len(targets) - failed} / {len(targets)} 件のフォームの回答を書き出しました"
+              f"（{time.perf_counter() - start:.1f} 秒）→ {args.database}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Googleフォームの定義ファイル（JSON / YAML）を Forms API のリクエストに変換するコンパイラ
+
+フォームをセクション・質問・選択肢だけの短い定義で書き、
+  - forms.create の本文（タイトル）
+  - batchUpdate の本文（説明の更新と createItem の列）
+に変換する。location.index は先頭から自動で振るので、質問を挿入しても番号を直す必要はない。
+
+定義の例:
+    {
+      "title": "フォームのタイトル",
+      "documentTitle": "ドライブ上のファイル名",
+      "description": "フォームの説明",
+      "sections": [
+        {"questions": [
+          {"title": "お名前", "type": "text", "required": true},
+          {"title": "ご所属", "type": "radio", "options": ["大学", "企業"], "other": true}
+        ]},
+        {"title": "2ページ目の見出し", "description": "（任意）", "questions": [
+          {"title": "満足度", "type": "scale", "low": 1, "high": 5, "lowLabel": "低い", "highLabel": "高い"}
+        ]}
+      ]
+    }
+2つ目以降のセクションは改ページ（pageBreakItem）になる。質問の type は QUESTION_TYPES のいずれか。
+
+変換結果は定義ファイルの内容のハッシュをキーに .form_cache/ に保存し、同じプロセス内では
+ファイルのサイズと更新時刻が変わらない限り読み直しもしない。YAML の定義は PyYAML が
+必要で、YAML を読むときに初めて読み込む。
+
+使い方:
+    python form_spec.py forms/development_consultation.json           # 変換結果を表示
+    python form_spec.py forms/development_consultation.json --check   # 検証だけ行う
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+# 変換結果が変わる修正を入れたら上げる（キャッシュが無効になる）
+COMPILER_VERSION = '1'
+
+DEFAULT_CACHE_DIR = '.form_cache'
+
+# 選択式の質問（type → choiceQuestion.type）
+CHOICE_TYPES = {'radio': 'RADIO', 'checkbox': 'CHECKBOX', 'dropdown': 'DROP_DOWN'}
+
+QUESTION_TYPES = tuple(CHOICE_TYPES) + ('text', 'paragraph', 'scale', 'date', 'time')
+
+# 「その他」の選択肢（"other": true）
+OTHER_OPTION = {'value': 'その他', 'isOther': True}
+
+# 同じプロセス内で変換した結果（パス → (サイズと更新時刻, 変換結果)）
+_compiled = {}
+
+
+class SpecError(ValueError):
+    """定義ファイルの内容が正しくない場合のエラー（どの項目かを含む）"""
+
+
+def _require(condition, where, message):
+    if not condition:
+        raise SpecError(f"{where}: {message}")
+
+
+def _options(question, where):
+    options = []
+    for i, option in enumerate(question.get('options', [])):
+        if isinstance(option, str):
+            option = {'value': option}
+        _require(isinstance(option, dict) and option.get('value'), f'{where}.options[{i}]',
+                 '選択肢は文字列か {"value": ...} で指定してください')
+        options.append(dict(option))
+    if question.get('other'):
+        options.append(dict(OTHER_OPTION))
+    _require(options, where, '選択式の質問には options が必要です')
+    values = [option['value'] for option in options]
+    _require(len(set(values)) == len(values), where, '選択肢が重複しています')
+    return options
+
+
+def _question_body(question, where):
+    kind = question.get('type')
+    _require(kind in QUESTION_TYPES, where, f"type は {', '.join(QUESTION_TYPES)} のいずれかです: {kind!r}")
+    body = {'required': bool(question.get('required', False))}
+    if kind in CHOICE_TYPES:
+        body['choiceQuestion'] = {'type': CHOICE_TYPES[kind], 'options': _options(question, where)}
+    elif kind in ('text', 'paragraph'):
+        body['textQuestion'] = {'paragraph': kind == 'paragraph'}
+    elif kind == 'scale':
+        low, high = question.get('low', 1), question.get('high', 5)
+        _require(low in (0, 1) and isinstance(high, int) and 2 <= high <= 10, where,
+                 'scale の low は 0 か 1、high は 2〜10 です')
+        scale = {'low': low, 'high': high}
+        for label in ('lowLabel', 'highLabel'):
+            if question.get(label):
+                scale[label] = question[label]
+        body['scaleQuestion'] = scale
+    elif kind == 'date':
+        body['dateQuestion'] = {'includeTime': bool(question.get('includeTime', False)),
+                                'includeYear': bool(question.get('includeYear', True))}
+    else:
+        body['timeQuestion'] = {'duration': bool(question.get('duration', False))}
+    return body
+
+
+def _item(title, description, body):
+    item = {'title': title}
+    if description:
+        item['description'] = description
+    item.update(body)
+    return item
+
+
+def compile_spec(spec):
+    """定義（辞書）を検証し、{'create': forms.create の本文, 'batchUpdate': batchUpdate の本文} を返す"""
+    _require(isinstance(spec, dict) and spec.get('title'), 'spec', 'title が必要です')
+    sections = spec.get('sections')
+    _require(isinstance(sections, list) and sections, 'spec', 'sections が必要です')
+
+    info = {'title': spec['title']}
+    if spec.get('documentTitle'):
+        info['documentTitle'] = spec['documentTitle']
+    requests = []
+    if spec.get('description'):
+        requests.append({'updateFormInfo': {'info': {'description': spec['description']},
+                                            'updateMask': 'description'}})
+
+    items = []
+    for s, section in enumerate(sections):
+        where = f'sections[{s}]'
+        _require(isinstance(section, dict), where, 'セクションは辞書で指定してください')
+        if s > 0:
+            _require(section.get('title'), where, '2つ目以降のセクションには title が必要です')
+            items.append(_item(section['title'], section.get('description'), {'pageBreakItem': {}}))
+        for q, question in enumerate(section.get('questions', [])):
+            where_question = f'{where}.questions[{q}]'
+            _require(isinstance(question, dict) and question.get('title'), where_question, 'title が必要です')
+            body = {'questionItem': {'question': _question_body(question, where_question)}}
+            items.append(_item(question['title'], question.get('description'), body))
+
+    # location.index は先頭から順に振る
+    for index, item in enumerate(items):
+        requests.append({'createItem': {'item': item, 'location': {'index': index}}})
+    return {'create': {'info': info}, 'batchUpdate': {'requests': requests}}
+
+
+def parse(data, path):
+    """定義ファイルのバイト列を辞書にする（拡張子が .yaml / .yml なら YAML）"""
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise SpecError(f"{path}: YAML の定義を読むには PyYAML が必要です（pip install pyyaml）")
+        return yaml.safe_load(data)
+    return json.loads(data)
+
+
+def _cache_path(data, cache_dir):
+    digest = hashlib.sha256(data + COMPILER_VERSION.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(cache_dir, f'{digest}.json')
+
+
+def compile_file(path, cache_dir=DEFAULT_CACHE_DIR):
+    """定義ファイルを変換する（結果はキャッシュを共有するので変更しないこと）"""
+    st = os.stat(path)
+    signature = (st.st_size, st.st_mtime_ns)
+    cached = _compiled.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    cache = _cache_path(data, cache_dir) if cache_dir else None
+    if cache and os.path.exists(cache):
+        with open(cache, encoding='utf-8') as f:
+            payload = json.load(f)
+    else:
+        try:
+            payload = compile_spec(parse(data, path))
+        except SpecError as e:
+            raise SpecError(f"{path}: {e}") from None
+        if cache:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary = f'{cache}.{os.getpid()}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temporary, cache)
+    _compiled[path] = (signature, payload)
+    return payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='フォームの定義ファイルを Forms API のリクエストに変換')
+    parser.add_argument('spec', help='定義ファイル（.json / .yaml）')
+    parser.add_argument('--check', action='store_true', help='検証だけ行い、変換結果を表示しない')
+    parser.add_argument('--no-cache', action='store_true', help='キャッシュを使わない')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        payload = compile_file(args.spec, None if args.no_cache else DEFAULT_CACHE_DIR)
+    except (SpecError, json.JSONDecodeError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    elapsed = time.perf_counter() - start
+    items = sum(1 for r in payload['batchUpdate']['requests'] if 'createItem' in r)
+    if not args.check:
+        print(json.dumps(payload, indent=2, ensure_ascii=False))
+    print(f"✅ {args.spec}: {items} 項目（{elapsed * 1000:.1f} ms）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+既存の Google フォームを定義ファイルに合わせてその場で更新する（差分の同期）
+
+定義を変えるたびにフォームを作り直すと、フォームの ID・URL が変わり、古いフォームと
+その回答が置き去りになる。ここでは既存のフォームを forms.get で1回だけ取得し、
+定義（form_spec.py の変換結果）との差分から最小限の
+  updateFormInfo / deleteItem / moveItem / createItem / updateItem
+を作って、1回の batchUpdate で送る。変更がなければリクエストは送らない。
+
+項目の対応付けは、(1) 内容が同じもの、(2) 種類と題名が同じもの、(3) 種類が同じで
+題名が似ているもの、の順に行う。対応する項目は削除・作成ではなく移動・更新にするので、
+題名や選択肢を直しても質問の ID は変わらず、それまでの回答も残る。
+並べ替えは最長増加部分列に含まれない項目だけを移動する。
+送信時には取得したリビジョンを requiredRevisionId に指定し、その間に別の編集が
+入っていた場合は適用しない。
+
+使い方:
+    python form_sync.py FORM_ID                           # 差分を適用
+    python form_sync.py FORM_ID --dry-run                 # 送るリクエストを表示するだけ
+    python form_sync.py FORM_ID --spec forms/development_consultation.json
+"""
+
+import argparse
+import bisect
+import copy
+import difflib
+import json
+
+import form_spec
+import forms_client
+import profiling
+
+# API が付ける ID（比較では無視する）
+_IDS = ('itemId', 'questionId')
+
+# 種類が同じ項目を「題名が似ている」とみなす類似度
+TITLE_SIMILARITY = 0.6
+
+# updateFormInfo で更新できる項目
+INFO_FIELDS = ('title', 'description')
+
+
+def normalize(value):
+    """比較用に ID と既定値（False / 0 / 空文字 / 空リスト）を除く
+
+    Forms API は既定値のフィールドを返さないため、定義の側も同じ形にそろえる。
+    「その他」の選択肢は API が value を返さないので、isOther だけで比べる。
+    """
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            if key in _IDS:
+                continue
+            item = normalize(item)
+            if item is None or item is False or item == 0 or item == '' or item == []:
+                continue
+            out[key] = item
+        if out.get('isOther'):
+            out.pop('value', None)
+        return out
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    return value
+
+
+def kind(item):
+    """項目の種類（質問なら質問の形式まで含める）"""
+    if 'questionItem' in item:
+        question = item['questionItem']['question']
+        for name in ('choiceQuestion', 'textQuestion', 'scaleQuestion', 'dateQuestion', 'timeQuestion'):
+            if name in question:
+                detail = question[name]
+                if name == 'choiceQuestion':
+                    return f"{name}:{detail.get('type')}"
+                if name == 'textQuestion':
+                    return f"{name}:{bool(detail.get('paragraph'))}"
+                return name
+        return 'questionItem'
+    return next((key for key in item if key.endswith('Item')), 'unknown')
+
+
+def match(remote, desired):
+    """desired の各項目に対応する remote の位置（なければ None）のリスト"""
+    pairs = [None] * len(desired)
+    used = set()
+    remote_norm = [normalize(item) for item in remote]
+    desired_norm = [normalize(item) for item in desired]
+
+    def assign(condition):
+        for d, item in enumerate(desired):
+            if pairs[d] is not None:
+                continue
+            for r, other in enumerate(remote):
+                if r not in used and condition(d, item, r, other):
+                    pairs[d] = r
+                    used.add(r)
+                    break
+
+    assign(lambda d, item, r, other: desired_norm[d] == remote_norm[r])
+    assign(lambda d, item, r, other: kind(item) == kind(other) and item.get('title') == other.get('title'))
+    assign(lambda d, item, r, other: kind(item) == kind(other) and difflib.SequenceMatcher(
+        None, item.get('title', ''), other.get('title', '')).ratio() >= TITLE_SIMILARITY)
+    return pairs
+
+
+def _stationary(sequence):
+    """sequence の最長増加部分列に含まれる値の集合"""
+    tails, tail_index, previous = [], [], [None] * len(sequence)
+    for i, value in enumerate(sequence):
+        k = bisect.bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[k] = value
+            tail_index[k] = i
+        previous[i] = tail_index[k - 1] if k else None
+    keep = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        keep.add(sequence[i])
+        i = previous[i]
+    return keep
+
+
+def _updated_item(remote_item, desired_item):
+    """remote の ID を付けた更新後の項目と updateMask"""
+    item = copy.deepcopy(desired_item)
+    item['itemId'] = remote_item['itemId']
+    question_id = remote_item.get('questionItem', {}).get('question', {}).get('questionId')
+    if question_id and 'questionItem' in item:
+        item['questionItem']['question']['questionId'] = question_id
+    old, new = normalize(remote_item), normalize(desired_item)
+    fields = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+    return item, ','.join(fields)
+
+
+def diff(form, payload):
+    """取得したフォーム（forms.get の結果）を payload（form_spec の変換結果）にそろえるリクエストの列"""
+    requests = []
+
+    # フォームの情報（documentTitle は作成後に変更できないので比べない）
+    desired_info = dict(payload['create']['info'])
+    for request in payload['batchUpdate']['requests']:
+        if 'updateFormInfo' in request:
+            desired_info.update(request['updateFormInfo']['info'])
+    changed = [field for field in INFO_FIELDS
+               if (form.get('info', {}).get(field) or '') != (desired_info.get(field) or '')]
+    if changed:
+        info = {field: desired_info.get(field, '') for field in changed}
+        requests.append({'updateFormInfo': {'info': info, 'updateMask': ','.join(changed)}})
+
+    remote = form.get('items', [])
+    desired = [request['createItem']['item'] for request in payload['batchUpdate']['requests']
+               if 'createItem' in request]
+    pairs = match(remote, desired)
+    matched = {r for r in pairs if r is not None}
+
+    # 削除は後ろから（前の項目の位置がずれないように）
+    current = list(range(len(remote)))
+    for r in reversed(range(len(remote))):
+        if r not in matched:
+            requests.append({'deleteItem': {'location': {'index': r}}})
+            current.remove(r)
+
+    # 並べ替え: 最長増加部分列に含まれない項目だけを、直前に来るべき項目の後ろへ移動する
+    order = [r for r in pairs if r is not None]
+    keep = _stationary(order)
+    for position, r in enumerate(order):
+        if r in keep:
+            continue
+        source = current.index(r)
+        current.pop(source)
+        target = current.index(order[position - 1]) + 1 if position else 0
+        current.insert(target, r)
+        if source != target:
+            requests.append({'moveItem': {'originalLocation': {'index': source},
+                                          'newLocation': {'index': target}}})
+
+    # 追加は定義の位置の小さい順（それより前の項目はすべてそろっている）
+    for d, item in enumerate(desired):
+        if pairs[d] is None:
+            requests.append({'createItem': {'item': copy.deepcopy(item), 'location': {'index': d}}})
+
+    # 内容が変わった項目の更新（位置は最終的な並び）
+    for d, item in enumerate(desired):
+        r = pairs[d]
+        if r is not None and normalize(remote[r]) != normalize(item):
+            updated, mask = _updated_item(remote[r], item)
+            requests.append({'updateItem': {'item': updated, 'location': {'index': d}, 'updateMask': mask}})
+    return requests
+
+
+def sync(service, form_id, payload, dry_run=False):
+    """フォームを payload にそろえ、送った（dry_run なら送るはずの）リクエストの列を返す"""
+    with profiling.stage('forms.get'):
+        form = service.forms().get(formId=form_id).execute()
+    with profiling.stage('diff'):
+        requests = diff(form, payload)
+    if requests and not dry_run:
+        body = {'requests': requests}
+        if form.get('revisionId'):
+            body['writeControl'] = {'requiredRevisionId': form['revisionId']}
+        with profiling.stage('forms.batchUpdate'):
+            service.forms().batchUpdate(formId=form_id, body=body).execute()
+    return requests
+
+
+def summarize(requests):
+    """リクエストの種類ごとの件数（例: 'updateItem 1, moveItem 2'）"""
+    counts = {}
+    for request in requests:
+        name = next(iter(request))
+        counts[name] = counts.get(name, 0) + 1
+    return ', '.join(f'{name} {count}' for name, count in counts.items()) or '変更なし'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='既存の Google フォームを定義ファイルに合わせて更新')
+    parser.add_argument('form_id', help='更新するフォームの ID')
+    parser.add_argument('--spec', help='フォームの定義ファイル（既定: 開発相談フォーム）')
+    parser.add_argument('--dry-run', action='store_true', help='送るリクエストを表示するだけで送らない')
+    forms_client.add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    forms_client.configure(args)
+
+    from create_google_form import DEFAULT_SPEC
+    with profiling.session(args.profile, 'form_sync'):
+        payload = form_spec.compile_file(args.spec or DEFAULT_SPEC)
+        requests = sync(forms_client.build_service(), args.form_id, payload, args.dry_run)
+        if args.dry_run:
+            print(json.dumps({'requests': requests}, indent=2, ensure_ascii=False))
+        print(f"{'送るリクエスト' if args.dry_run else '同期しました'}: {summarize(requests)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Forms API のクライアント（認証とサービス）を素早く用意する共通モジュール
+
+  - ディスカバリ文書は discovery/forms.v1.json に同梱したものから build_from_document で
+    組み立てる（ネットワークからの取得もライブラリ内の文書の探索もしない）
+  - google のクライアントライブラリは最初に認証・サービスが必要になったときに読み込む
+    （定義の検証や --dry-run だけなら読み込まない）
+  - token.json のアクセストークンは期限の REFRESH_MARGIN 秒前から更新し、
+    実行の途中で期限が切れないようにする
+  - 認証情報とサービスはプロセス内で1つを共有する
+  - token.json の読み書きは token.json.lock のファイルロックの中で行うので、
+    並行して実行しても更新が競合せず、先に更新した側のトークンをそのまま使う
+  - --base-url（環境変数 FORMS_API_BASE_URL）を指定すると、forms_standin.py などの
+    代わりのサーバに接続する（認証は行わない）
+
+使い方:
+    from forms_client import build_service, get_credentials
+    service = build_service()                 # 認証情報も必要なら用意する
+    service.forms().get(formId=form_id).execute()
+
+    python forms_client.py                    # 認証とサービスの準備にかかる時間を表示
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+import profiling
+
+SCOPES = ['https://www.googleapis.com/auth/forms.body']
+
+# 回答の読み出しに追加で必要なスコープ
+RESPONSES_SCOPE = 'https://www.googleapis.com/auth/forms.responses.readonly'
+
+TOKEN_FILE = 'token.json'
+CLIENT_SECRETS_FILE = 'credentials.json'
+
+# 同梱のディスカバリ文書（requirements.txt で固定した google-api-python-client 2.108.0 に含まれる
+# forms.v1、revision 20231107。ライブラリを更新したらその版のものに差し替える）
+DISCOVERY_DOCUMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'discovery', 'forms.v1.json')
+
+# 接続先を代わりのサーバにする環境変数
+BASE_URL_ENV = 'FORMS_API_BASE_URL'
+
+# 期限までこの秒数を切ったアクセストークンは使う前に更新する
+REFRESH_MARGIN = 600
+
+# プロセス内で共有する認証情報とサービス
+_credentials = None
+_anonymous = None
+_service = None
+_service_credentials = None
+_service_base_url = None
+_base_url = os.environ.get(BASE_URL_ENV) or None
+_lock = threading.Lock()
+
+
+def set_base_url(url):
+    """接続先を url のサーバにする（None で Google の API に戻す）"""
+    global _base_url
+    _base_url = url.rstrip('/') + '/' if url else None
+
+
+def add_argument(parser):
+    """--base-url をパーサに追加する（parse_args の後で configure(args) を呼ぶ）"""
+    parser.add_argument('--base-url', default=os.environ.get(BASE_URL_ENV),
+                        help=f'Forms API の代わりに使うサーバの URL（既定: 環境変数 {BASE_URL_ENV}）')
+
+
+def configure(args):
+    set_base_url(args.base_url)
+
+
+@contextlib.contextmanager
+def token_lock(path=TOKEN_FILE):
+    """path.lock の排他ロック（fcntl のない環境ではロックしない）"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def needs_refresh(creds, margin=REFRESH_MARGIN):
+    """トークンがないか、期限まで margin 秒を切っていれば True"""
+    if not creds.token:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth の expiry はタイムゾーンなしの UTC
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds() < margin
+
+
+def _save_token(creds, path):
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as token:
+        token.write(creds.to_json())
+    os.replace(temporary, path)
+
+
+def _load_credentials(scopes, path, client_secrets):
+    from google.oauth2.credentials import Credentials
+
+    creds = None
+    # トークンファイルが存在する場合は読み込み（ロックの中で読むので、他のプロセスの更新を待って使う）
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            info = json.load(f)
+        granted = info.get('scopes') or []
+        if set(scopes) <= set(granted):
+            creds = Credentials.from_authorized_user_info(info, granted)
+        else:
+            # 足りないスコープは、これまでのスコープと合わせて認証し直す
+            scopes = sorted(set(granted) | set(scopes))
+    if creds and not needs_refresh(creds):
+        return creds
+
+    if creds and creds.refresh_token:
+        from google.auth.transport.requests import Request
+        with profiling.stage('refresh'):
+            creds.refresh(Request())
+    else:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        flow = InstalledAppFlow.from_client_secrets_file(client_secrets, scopes)
+        creds = flow.run_local_server(port=0)
+    # トークンを保存
+    _save_token(creds, path)
+    return creds
+
+
+def get_credentials(scopes=SCOPES, path=TOKEN_FILE, client_secrets=CLIENT_SECRETS_FILE):
+    """token.json の認証情報を返す（期限が近ければ更新・なければ認証して保存する）
+
+    一度用意した認証情報はプロセス内で使い回し、期限が近づいたときとスコープが
+    足りないときだけ読み直す。
+    """
+    global _credentials, _anonymous
+    if _base_url:
+        if _anonymous is None:
+            from google.auth.credentials import AnonymousCredentials
+            _anonymous = AnonymousCredentials()
+        return _anonymous
+    with _lock:
+        if (_credentials is not None and not needs_refresh(_credentials)
+                and set(scopes) <= set(_credentials.scopes or [])):
+            return _credentials
+        with profiling.stage('oauth'), token_lock(path):
+            _credentials = _load_credentials(scopes, path, client_secrets)
+        return _credentials
+
+
+def load_discovery_document(path=DISCOVERY_DOCUMENT, base_url=None):
+    """同梱のディスカバリ文書（base_url を指定するとバッチ HTTP も含めて接続先を置き換える）"""
+    with open(path, encoding='utf-8') as f:
+        document = f.read()
+    if not base_url:
+        return document
+    document = json.loads(document)
+    document['rootUrl'] = document['baseUrl'] = base_url
+    return document
+
+
+def build_service(creds=None):
+    """Forms API のサービスを返す（同梱のディスカバリ文書から組み立て、プロセス内で共有する）"""
+    global _service, _service_credentials, _service_base_url
+    if creds is None:
+        creds = get_credentials()
+    with _lock:
+        if _service is not None and _service_credentials is creds and _service_base_url == _base_url:
+            return _service
+        with profiling.stage('discovery'):
+            from googleapiclient.discovery import build_from_document
+            _service = build_from_document(load_discovery_document(base_url=_base_url), credentials=creds)
+            _service_credentials, _service_base_url = creds, _base_url
+        return _service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Forms API の認証とサービスの準備にかかる時間を表示')
+    add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    with profiling.session(args.profile, 'forms_client'):
+        start = time.perf_counter()
+        creds = get_credentials()
+        authorized = time.perf_counter()
+        build_service(creds)
+        built = time.perf_counter()
+    expiry = creds.expiry.isoformat(timespec='seconds') if getattr(creds, 'expiry', None) else '不明'
+    print(json.dumps({'oauth_ms': round((authorized - start) * 1000, 1),
+                      'discovery_ms': round((built - authorized) * 1000, 1),
+                      'token_expiry': expiry}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Forms API の代わりに使うローカルの HTTP サーバ（オフラインの確認とスループットの計測用）
+
+forms.create / forms.get / forms.batchUpdate / forms.responses.list と、API クライアントの
+バッチ HTTP（/batch の multipart/mixed）を、本物に近い検証つきでメモリ上に実装する。
+  - create では info.title が必須で、項目は指定できない
+  - batchUpdate はすべてのリクエストを検証してから適用する（1つでも誤りがあれば何も変えない）。
+    位置の範囲・項目の種類・選択肢の重複・updateMask・requiredRevisionId を確かめる
+  - get は本物と同じく既定値（false / 0 / 空）のフィールドを省いて返す
+  - 応答の遅延（--latency / --jitter）、429 の注入（--error-rate）、1分あたりの
+    リクエスト数の上限（--quota、超えると 429 と Retry-After）を設定できる
+回答は POST /_standin/forms/<フォームID>/responses?count=N で質問に合わせて作れる。
+GET /_standin/stats でメソッドごとの件数と 429 の数を返す。認証ヘッダは確かめない。
+
+各ツールは --base-url（または環境変数 FORMS_API_BASE_URL）でこのサーバを使う
+（forms_client.py を参照）。bench はサーバを起動して provision_forms.py の一括作成を
+流し、スループットと再試行の回数を表示する。
+
+使い方:
+    python forms_standin.py serve --port 8765 --latency 0.05 --error-rate 0.02
+    python create_google_form.py --base-url http://127.0.0.1:8765/
+    python forms_standin.py bench -n 80 --latency 0.05 --error-rate 0.05 --quota 600
+"""
+
+import argparse
+import copy
+import datetime
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+
+import profiling
+import provision_forms
+
+DEFAULT_PORT = 8765
+
+# 1ページの回答数の既定値と上限（本物と同じ）
+MAX_PAGE_SIZE = 5000
+
+# --quota を超えたときの集計の幅（秒）
+QUOTA_WINDOW = 60.0
+
+ITEM_KINDS = ('questionItem', 'questionGroupItem', 'pageBreakItem', 'textItem', 'imageItem', 'videoItem')
+QUESTION_KINDS = ('choiceQuestion', 'textQuestion', 'scaleQuestion', 'dateQuestion', 'timeQuestion',
+                  'fileUploadQuestion', 'rowQuestion', 'ratingQuestion')
+CHOICE_TYPES = ('RADIO', 'CHECKBOX', 'DROP_DOWN')
+INFO_FIELDS = ('title', 'description')
+
+_FILTER = re.compile(r'^\s*timestamp\s*(>=|>)\s*(\S+)\s*$')
+
+
+class ApiError(Exception):
+    """Forms API と同じ形のエラー応答（code / status / message）"""
+
+    def __init__(self, code, status, message, retry_after=None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+        self.retry_after = retry_after
+
+    def body(self):
+        return {'error': {'code': self.code, 'message': str(self), 'status': self.status}}
+
+
+def _invalid(message):
+    return ApiError(400, 'INVALID_ARGUMENT', message)
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _new_id():
+    return uuid.uuid4().hex[:8]
+
+
+def _prune(value):
+    """既定値のフィールドを省く（本物の API の JSON と同じ形にする）"""
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            item = _prune(item)
+            if item is None or item is False or item == 0 or item == '' or item == []:
+                continue
+            out[key] = item
+        if out.get('isOther'):
+            out.pop('value', None)
+        return out
+    if isinstance(value, list):
+        return [_prune(item) for item in value]
+    return value
+
+
+def _one_of(container, kinds, where):
+    found = [kind for kind in kinds if kind in container]
+    if len(found) != 1:
+        raise _invalid(f"{where}: {' / '.join(kinds)} のいずれか1つを指定してください")
+    return found[0]
+
+
+def validate_item(item, where):
+    """項目の内容を確かめる（誤りがあれば ApiError）"""
+    if not isinstance(item, dict):
+        raise _invalid(f'{where}: item は必須です')
+    kind = _one_of(item, ITEM_KINDS, where)
+    if kind != 'questionItem':
+        return
+    question = item['questionItem'].get('question')
+    if not isinstance(question, dict):
+        raise _invalid(f'{where}.questionItem: question は必須です')
+    question_kind = _one_of(question, QUESTION_KINDS, f'{where}.questionItem.question')
+    body = question[question_kind]
+    if question_kind == 'choiceQuestion':
+        if body.get('type') not in CHOICE_TYPES:
+            raise _invalid(f"{where}: choiceQuestion.type は {', '.join(CHOICE_TYPES)} のいずれかです")
+        options = body.get('options') or []
+        if not options:
+            raise _invalid(f'{where}: choiceQuestion.options は必須です')
+        others = [o for o in options if o.get('isOther')]
+        if others and (len(others) > 1 or body['type'] == 'DROP_DOWN'):
+            raise _invalid(f'{where}: isOther の選択肢は RADIO / CHECKBOX に1つだけ指定できます')
+        values = [o.get('value') for o in options if not o.get('isOther')]
+        if not all(values):
+            raise _invalid(f'{where}: 選択肢の value は必須です')
+        if len(set(values)) != len(values):
+            raise _invalid(f'{where}: 選択肢が重複しています')
+    elif question_kind == 'scaleQuestion':
+        if body.get('low', 0) not in (0, 1) or not 2 <= body.get('high', 0) <= 10:
+            raise _invalid(f'{where}: scaleQuestion の low は 0 か 1、high は 2〜10 です')
+
+
+def _index(location, size, where, allow_end=False):
+    if not isinstance(location, dict) or not isinstance(location.get('index'), int):
+        raise _invalid(f'{where}: location.index は必須です')
+    index = location['index']
+    if not 0 <= index < size + (1 if allow_end else 0):
+        raise _invalid(f'{where}: index {index} が範囲外です（項目数 {size}）')
+    return index
+
+
+def _mask(body, where):
+    mask = body.get('updateMask')
+    if not mask:
+        raise _invalid(f'{where}: updateMask は必須です')
+    return [field.strip() for field in mask.split(',')]
+
+
+class Store:
+    """フォームと回答をメモリに持ち、API の各メソッドを実装する"""
+
+    def __init__(self, seed=None):
+        self.forms = {}
+        self.responses = {}
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+
+    def _form(self, form_id):
+        form = self.forms.get(form_id)
+        if form is None:
+            raise ApiError(404, 'NOT_FOUND', f'Requested entity was not found: {form_id}')
+        return form
+
+    def create(self, body):
+        info = (body or {}).get('info') or {}
+        if not info.get('title'):
+            raise _invalid('info.title は必須です')
+        extra = set(body) - {'info'} | set(info) - {'title', 'documentTitle'}
+        if extra:
+            raise _invalid(f"作成時に指定できるのは info.title と info.documentTitle だけです: {', '.join(sorted(extra))}")
+        form_id = uuid.uuid4().hex
+        form = {
+            'formId': form_id,
+            'info': {'title': info['title'], 'documentTitle': info.get('documentTitle', info['title'])},
+            'settings': {},
+            'revisionId': '00000001',
+            'responderUri': f'https://docs.google.com/forms/d/e/{form_id}/viewform',
+            'items': [],
+        }
+        with self.lock:
+            self.forms[form_id] = form
+            self.responses[form_id] = []
+        return _prune(form)
+
+    def get(self, form_id):
+        with self.lock:
+            return _prune(copy.deepcopy(self._form(form_id)))
+
+    def batch_update(self, form_id, body):
+        requests = (body or {}).get('requests')
+        if not isinstance(requests, list) or not requests:
+            raise _invalid('requests は必須です')
+        with self.lock:
+            form = self._form(form_id)
+            required = (body.get('writeControl') or {}).get('requiredRevisionId')
+            if required and required != form['revisionId']:
+                raise ApiError(400, 'FAILED_PRECONDITION',
+                               f"requiredRevisionId {required} は現在のリビジョン {form['revisionId']} と異なります")
+            # 写しに適用し、すべて成功したときだけ置き換える
+            draft = copy.deepcopy(form)
+            replies = [self._apply(draft, request, f'requests[{i}]') for i, request in enumerate(requests)]
+            draft['revisionId'] = f"{int(form['revisionId']) + 1:08d}"
+            self.forms[form_id] = draft
+            result = {'replies': replies, 'writeControl': {'requiredRevisionId': draft['revisionId']}}
+            if body.get('includeFormInResponse'):
+                result['form'] = _prune(copy.deepcopy(draft))
+            return result
+
+    def _apply(self, form, request, where):
+        if not isinstance(request, dict) or len(request) != 1:
+            raise _invalid(f'{where}: リクエストの種類を1つ指定してください')
+        (name, body), = request.items()
+        where = f'{where}.{name}'
+        items = form['items']
+        if name == 'updateFormInfo':
+            fields = _mask(body, where)
+            fields = list(INFO_FIELDS) if fields == ['*'] else fields
+            for field in fields:
+                if field not in INFO_FIELDS:
+                    raise _invalid(f'{where}: updateMask の {field} は変更できません')
+                form['info'][field] = (body.get('info') or {}).get(field, '')
+            return {}
+        if name == 'updateSettings':
+            _mask(body, where)
+            form['settings'].update(body.get('settings') or {})
+            return {}
+        if name == 'createItem':
+            item = copy.deepcopy(body.get('item'))
+            validate_item(item, where)
+            index = _index(body.get('location'), len(items), where, allow_end=True)
+            ids = {i['itemId'] for i in items}
+            if item.get('itemId') in ids:
+                raise _invalid(f"{where}: itemId {item['itemId']} は使われています")
+            item.setdefault('itemId', _new_id())
+            reply = {'itemId': item['itemId']}
+            if 'questionItem' in item:
+                question = item['questionItem']['question']
+                question.setdefault('questionId', _new_id())
+                reply['questionId'] = [question['questionId']]
+            items.insert(index, item)
+            return {'createItem': reply}
+        if name == 'updateItem':
+            index = _index(body.get('location'), len(items), where)
+            current = items[index]
+            update = body.get('item') or {}
+            if update.get('itemId') not in (None, current['itemId']):
+                raise _invalid(f"{where}: itemId {update['itemId']} は位置 {index} の項目ではありません")
+            fields = _mask(body, where)
+            merged = copy.deepcopy(current)
+            for field in (list(update) if fields == ['*'] else fields):
+                if field == 'itemId':
+                    continue
+                if field in update:
+                    merged[field] = copy.deepcopy(update[field])
+                else:
+                    merged.pop(field, None)
+            validate_item(merged, where)
+            old_question = current.get('questionItem', {}).get('question', {}).get('questionId')
+            if 'questionItem' in merged and old_question:
+                question = merged['questionItem']['question']
+                if question.get('questionId', old_question) != old_question:
+                    raise _invalid(f'{where}: questionId は変更できません')
+                question['questionId'] = old_question
+            items[index] = merged
+            return {}
+        if name == 'moveItem':
+            source = _index(body.get('originalLocation'), len(items), f'{where}.originalLocation')
+            target = _index(body.get('newLocation'), len(items), f'{where}.newLocation')
+            items.insert(target, items.pop(source))
+            return {}
+        if name == 'deleteItem':
+            items.pop(_index(body.get('location'), len(items), where))
+            return {}
+        raise _invalid(f'{where}: 対応していないリクエストです')
+
+    def list_responses(self, form_id, page_size=None, page_token=None, filter=None):
+        size = min(int(page_size or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        if size <= 0:
+            raise _invalid('pageSize は正の数です')
+        since = None
+        if filter:
+            match = _FILTER.match(filter)
+            if not match:
+                raise _invalid(f'対応していない filter です: {filter}')
+            since = match.groups()
+        with self.lock:
+            self._form(form_id)
+            responses = self.responses[form_id]
+            if since:
+                operator, moment = since
+                moment = _normalized_time(moment)
+                responses = [r for r in responses if (_normalized_time(r['lastSubmittedTime']) > moment
+                                                      or operator == '>=' and _normalized_time(r['lastSubmittedTime']) == moment)]
+            try:
+                start = int(page_token or 0)
+            except ValueError:
+                raise _invalid('pageToken が正しくありません')
+            page = copy.deepcopy(responses[start:start + size])
+        result = {'responses': page} if page else {}
+        if start + size < len(responses):
+            result['nextPageToken'] = str(start + size)
+        return result
+
+    def add_responses(self, form_id, count):
+        """フォームの質問に合わせた回答を count 件作る"""
+        with self.lock:
+            form = self._form(form_id)
+            created = [self._random_response(form) for _ in range(count)]
+            self.responses[form_id].extend(created)
+        return {'responses': len(created)}
+
+    def _random_response(self, form):
+        answers = {}
+        for item in form['items']:
+            question = item.get('questionItem', {}).get('question')
+            if not question:
+                continue
+            values = _random_values(question, self.random)
+            if values:
+                answers[question['questionId']] = {
+                    'questionId': question['questionId'],
+                    'textAnswers': {'answers': [{'value': value} for value in values]},
+                }
+        moment = _now()
+        return {'formId': form['formId'], 'responseId': uuid.uuid4().hex, 'createTime': moment,
+                'lastSubmittedTime': moment, 'answers': answers}
+
+
+def _normalized_time(value):
+    """比較用に小数部を9桁にそろえた時刻"""
+    seconds, _, fraction = value.rstrip('Z').partition('.')
+    return f"{seconds}.{(fraction + '0' * 9)[:9]}"
+
+
+def _random_values(question, rng):
+    if 'choiceQuestion' in question:
+        body = question['choiceQuestion']
+        values = [o.get('value', 'その他') for o in body['options']]
+        if body['type'] == 'CHECKBOX':
+            return rng.sample(values, rng.randint(1, len(values)))
+        return [rng.choice(values)]
+    if 'scaleQuestion' in question:
+        body = question['scaleQuestion']
+        return [str(rng.randint(body.get('low', 0), body.get('high', 5)))]
+    if 'dateQuestion' in question:
+        return [f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}']
+    if 'timeQuestion' in question:
+        return [f'{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}']
+    if 'textQuestion' in question:
+        return [f'テスト回答 {rng.randint(1, 1000)}']
+    return []
+
+
+class Faults:
+    """遅延・429 の注入・1分あたりの上限"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, quota=None, retry_after=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.recent = []
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def check(self):
+        """このリクエストを 429 にする場合は ApiError を送出する"""
+        with self.lock:
+            now = time.monotonic()
+            if self.quota:
+                while self.recent and now - self.recent[0] >= QUOTA_WINDOW:
+                    self.recent.pop(0)
+                if len(self.recent) >= self.quota:
+                    wait = QUOTA_WINDOW - (now - self.recent[0])
+                    raise ApiError(429, 'RESOURCE_EXHAUSTED', '1分あたりのリクエスト数の上限を超えました',
+                                   retry_after=max(1, round(wait)))
+                self.recent.append(now)
+            if self.error_rate and self.random.random() < self.error_rate:
+                raise ApiError(429, 'RESOURCE_EXHAUSTED', 'Quota exceeded（注入したエラー）',
+                               retry_after=self.retry_after)
+
+
+class StandIn(ThreadingHTTPServer):
+    """Store と Faults を持つ HTTP サーバ"""
+
+    daemon_threads = True
+
+    def __init__(self, address, store=None, faults=None):
+        super().__init__(address, Handler)
+        self.store = store or Store()
+        self.faults = faults or Faults()
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def dispatch(self, method, path, body, faults=True):
+        """1つの API リクエストを処理し、(ステータス, 応答の辞書, 追加のヘッダ) を返す"""
+        parsed = urllib.parse.urlsplit(path)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        route = parsed.path.rstrip('/')
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, _invalid('本文が JSON ではありません').body(), {}
+        name, call = self._route(method, route, query, data)
+        self.count(name)
+        try:
+            if faults and not name.startswith('_standin'):
+                self.faults.check()
+            return 200, call(), {}
+        except ApiError as error:
+            if error.code == 429:
+                self.count('429')
+            headers = {'Retry-After': str(error.retry_after)} if error.retry_after else {}
+            return error.code, error.body(), headers
+
+    def _route(self, method, route, query, data):
+        store = self.store
+        parts = route.strip('/').split('/')
+        if method == 'POST' and route == '/v1/forms':
+            return 'forms.create', lambda: store.create(data)
+        if len(parts) == 3 and parts[:2] == ['v1', 'forms']:
+            form_id, _, action = parts[2].partition(':')
+            if method == 'GET' and not action:
+                return 'forms.get', lambda: store.get(form_id)
+            if method == 'POST' and action == 'batchUpdate':
+                return 'forms.batchUpdate', lambda: store.batch_update(form_id, data)
+        if method == 'GET' and len(parts) == 4 and parts[:2] == ['v1', 'forms'] and parts[3] == 'responses':
+            return 'forms.responses.list', lambda: store.list_responses(
+                parts[2], query.get('pageSize'), query.get('pageToken'), query.get('filter'))
+        if method == 'POST' and len(parts) == 4 and parts[:2] == ['_standin', 'forms'] and parts[3] == 'responses':
+            return '_standin.responses', lambda: store.add_responses(parts[2], int(query.get('count', 1)))
+        if method == 'GET' and route == '/_standin/stats':
+            return '_standin.stats', lambda: dict(self.stats, forms=len(store.forms))
+
+        def missing():
+            raise ApiError(404, 'NOT_FOUND', f'{method} {route} はありません')
+        return 'not_found', missing
+
+
+def _split_batch(content_type, body):
+    """multipart/mixed のバッチを (Content-ID, メソッド, パス, 本文) の列にする"""
+    message = BytesParser().parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode('ascii') + body)
+    parts = []
+    for part in message.get_payload():
+        payload = part.get_payload(decode=False)
+        head, _, content = payload.replace('\r\n', '\n').partition('\n\n')
+        method, path = head.split('\n', 1)[0].split(' ')[:2]
+        parts.append((part['Content-ID'], method, path, content.encode('utf-8')))
+    return parts
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, content, headers, content_type='application/json; charset=UTF-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _handle(self):
+        server = self.server
+        body = self._body()
+        server.faults.delay()
+        if self.command == 'POST' and self.path.rstrip('/') == '/batch':
+            self._handle_batch(body)
+            return
+        status, data, headers = server.dispatch(self.command, self.path, body)
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), headers)
+
+    def _handle_batch(self, body):
+        server = self.server
+        server.count('batch')
+        boundary = uuid.uuid4().hex
+        chunks = []
+        for content_id, method, path, content in _split_batch(self.headers['Content-Type'], body):
+            status, data, headers = server.dispatch(method, path, content)
+            text = json.dumps(data, ensure_ascii=False)
+            extra = ''.join(f'{key}: {value}\r\n' for key, value in headers.items())
+            response_id = f'<response-{content_id[1:]}' if content_id else ''
+            chunks.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\nContent-ID: {response_id}\r\n\r\n'
+                f'HTTP/1.1 {status} {self.responses.get(status, ("",))[0]}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n{extra}\r\n{text}\r\n')
+        content = (''.join(chunks) + f'--{boundary}--\r\n').encode('utf-8')
+        self._send(200, content, {}, f'multipart/mixed; boundary={boundary}')
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def serve_in_thread(host='127.0.0.1', port=0, **faults):
+    """バックグラウンドのスレッドでサーバを起動して返す（port=0 は空いているポート）"""
+    seed = faults.pop('seed', None)
+    server = StandIn((host, port), Store(seed), Faults(seed=seed, **faults))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench(args):
+    """サーバを起動し、provision_forms の一括作成でスループットと再試行を計測する"""
+    import forms_client
+
+    server = serve_in_thread(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             quota=args.quota, retry_after=args.retry_after, seed=args.seed)
+    forms_client.set_base_url(server.base_url)
+    try:
+        specs = provision_forms.collect_specs(args.templates, [])
+        keys = sorted(specs)
+        jobs = [provision_forms.Job(f'{keys[i % len(keys)]}_{i}', specs[keys[i % len(keys)]])
+                for i in range(args.forms)]
+        credentials = forms_client.get_credentials()
+        provisioner = provision_forms.Provisioner(
+            credentials, forms_client.build_service(credentials), args.jobs, args.batch_size,
+            provision_forms.RateLimiter(args.rate))
+        start = time.perf_counter()
+        with profiling.stage('provision'):
+            provisioner.run(jobs)
+        elapsed = time.perf_counter() - start
+    finally:
+        forms_client.set_base_url(None)
+        server.shutdown()
+    failed = [job for job in jobs if job.error is not None]
+    print(json.dumps({
+        'forms': len(jobs),
+        'failed': len(failed),
+        'elapsed_s': round(elapsed, 3),
+        'forms_per_s': round(len(jobs) / elapsed, 2),
+        'attempts': sum(job.attempts for job in jobs),
+        'final_rate': round(provisioner.limiter.rate, 2),
+        'server': server.stats,
+    }, indent=2, ensure_ascii=False))
+    if failed:
+        raise SystemExit(1)
+
+
+def _add_fault_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.0, help='応答の遅延（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='遅延に加えるばらつきの最大（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='429 を返す割合（0〜1）')
+    parser.add_argument('--quota', type=int, help='1分あたりのリクエスト数の上限（超えると 429）')
+    parser.add_argument('--retry-after', type=int, help='注入した 429 に付ける Retry-After（秒）')
+    parser.add_argument('--seed', type=int, help='乱数の種（同じ値なら同じ順に 429 を返す）')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Forms API の代わりに使うローカルの HTTP サーバ')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serving = commands.add_parser('serve', help='サーバを起動する')
+    serving.add_argument('--host', default='127.0.0.1', help='待ち受けるアドレス')
+    serving.add_argument('--port', type=int, default=DEFAULT_PORT, help='待ち受けるポート')
+    _add_fault_arguments(serving)
+    benching = commands.add_parser('bench', help='サーバを起動して一括作成のスループットを計測する')
+    benching.add_argument('-n', '--forms', type=int, default=40, help='作成するフォームの数')
+    benching.add_argument('--templates', default=provision_forms.SURVEY_TEMPLATES_DART, help='テンプレートの Dart ファイル')
+    benching.add_argument('-j', '--jobs', type=int, default=provision_forms.DEFAULT_JOBS, help='batchUpdate の並列数')
+    benching.add_argument('--batch-size', type=int, default=provision_forms.DEFAULT_BATCH_SIZE,
+                          help='バッチ HTTP 1回にまとめる forms.create の数')
+    benching.add_argument('--rate', type=float, default=provision_forms.DEFAULT_RATE,
+                          help='送信レートの初期値（リクエスト/秒）')
+    _add_fault_arguments(benching)
+    profiling.add_argument(benching)
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        with profiling.session(args.profile, 'forms_standin'):
+            bench(args)
+        return
+
+    server = StandIn((args.host, args.port), Store(args.seed),
+                     Faults(args.latency, args.jitter, args.error_rate, args.quota, args.retry_after, args.seed))
+    print(f"Forms API の代わりのサーバ: {server.base_url}（Ctrl+C で終了）")
+    print(f"  例: FORMS_API_BASE_URL={server.base_url} python create_google_form.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+アンケートテンプレートから Google フォームを一括作成するスクリプト
+
+lib/data/survey_templates.dart の各テンプレート（と --spec で指定した定義ファイル）を
+form_spec.py で変換し、フォームを並列に作成する。
+  - 認証情報と Forms API のサービス（ディスカバリ文書の解析）は1つを共有し、
+    スレッドごとに HTTP 接続だけを分ける（httplib2 はスレッドセーフでないため）
+  - forms.create は API クライアントのバッチ HTTP（1回の HTTP で複数のリクエスト）にまとめる
+  - 作成できたフォームから順に、batchUpdate を上限つきのスレッドプールで並列に送る
+  - 429 / 5xx は指数バックオフ（ジッターつき、Retry-After があればそれに従う）で再試行し、
+    429 を受けたら全体の送信レートを下げる（成功が続くと少しずつ戻す）
+結果はフォームごとの ID・URL・所要時間をマニフェスト（JSON）に書き出す。マニフェストは
+フォームを作成するたびに更新するので、途中で止まっても作成済みのフォームの ID は残り、
+次の実行では作り直さずに内容の設定から続ける（form_sync.py の差分で送るので二重にならない）。
+同じ定義で作成済みのフォームは作り直さない（--force で作り直す）。定義が変わったフォームは
+--sync でその場で更新できる（form_sync.py、フォームの ID と回答はそのまま）。
+
+使い方:
+    python provision_forms.py --dry-run                 # 変換と検証だけ行う
+    python provision_forms.py -j 4                      # すべてのテンプレートから作成
+    python provision_forms.py --only health_check --spec forms/development_consultation.json
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import form_spec
+import forms_client
+import form_sync
+import profiling
+
+SURVEY_TEMPLATES_DART = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                     'lib', 'data', 'survey_templates.dart')
+DEFAULT_MANIFEST = 'form_provision.json'
+
+DEFAULT_JOBS = 4
+
+# バッチ HTTP 1回にまとめる forms.create の数
+DEFAULT_BATCH_SIZE = 10
+
+# 送信レート（リクエスト/秒）の初期値と範囲。429 で半分にし、成功ごとに少しずつ上げる
+DEFAULT_RATE = 5.0
+MIN_RATE = 0.2
+MAX_RATE = 20.0
+RATE_STEP = 0.1
+# 並列に届いた 429 で何度も下げないよう、この秒数の間は1回だけ下げる
+THROTTLE_WINDOW = 1.0
+
+# 再試行するステータスと、バックオフの設定（秒）
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 32.0
+
+# アプリの QuestionType → form_spec の type
+QUESTION_TYPES = {
+    'shortText': 'text',
+    'longText': 'paragraph',
+    'multipleChoice': 'radio',
+    'checkbox': 'checkbox',
+    'scale': 'scale',
+    'date': 'date',
+    'time': 'time',
+}
+
+_STRING = r"'(?:[^'\\]|\\.)*'"
+_FIELD = re.compile(rf"(\w+):\s*({_STRING}|\[[^\]]*\]|[^,\n]+)")
+
+
+def _dart_string(literal):
+    return literal[1:-1].replace("\\'", "'")
+
+
+def _fields(source):
+    return {name: value.strip() for name, value in _FIELD.findall(source)}
+
+
+def load_survey_templates(path=SURVEY_TEMPLATES_DART):
+    """SurveyTemplates.templates を {id: form_spec の定義} にする"""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    source = source[source.index('static const List<SurveyTemplate> templates'):]
+
+    specs = {}
+    for block in source.split('SurveyTemplate(')[1:]:
+        header, _, questions = block.partition('questions:')
+        fields = _fields(header)
+        description = _dart_string(fields['description'])
+        if 'instructions' in fields:
+            description += '\n\n' + _dart_string(fields['instructions'])
+        spec = {
+            'title': _dart_string(fields['title']),
+            'documentTitle': f"わせラボ_{_dart_string(fields['id'])}",
+            'description': description,
+            'sections': [{'questions': [_question(q) for q in questions.split('SurveyQuestion(')[1:]]}],
+        }
+        specs[_dart_string(fields['id'])] = spec
+    return specs
+
+
+def _question(source):
+    fields = _fields(source)
+    kind = fields['type'].split('.')[-1]
+    question = {
+        'title': _dart_string(fields['question']),
+        'type': QUESTION_TYPES[kind],
+        'required': fields.get('required') == 'true',
+    }
+    if 'placeholder' in fields:
+        # Forms API にはプレースホルダーがないため、質問の説明にする
+        question['description'] = _dart_string(fields['placeholder'])
+    if 'options' in fields:
+        question['options'] = [_dart_string(s) for s in re.findall(_STRING, fields['options'])]
+    if kind == 'scale':
+        question['low'] = int(fields.get('scaleMin', 1))
+        question['high'] = int(fields.get('scaleMax', 5))
+        for label, key in (('scaleMinLabel', 'lowLabel'), ('scaleMaxLabel', 'highLabel')):
+            if label in fields:
+                question[key] = _dart_string(fields[label])
+    return question
+
+
+def spec_hash(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class RateLimiter:
+    """全スレッドで共有する送信レートの制限（429 で半分に下げ、成功ごとに少しずつ戻す）"""
+
+    def __init__(self, rate=DEFAULT_RATE):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._throttled = float('-inf')
+        self._lock = threading.Lock()
+
+    def acquire(self, count=1):
+        """count 件分の送信枠が空くまで待つ"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + count / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+    def throttled(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._throttled >= THROTTLE_WINDOW:
+                self._throttled = now
+                self.rate = max(MIN_RATE, self.rate / 2)
+
+    def succeeded(self, count=1):
+        with self._lock:
+            self.rate = min(MAX_RATE, self.rate + RATE_STEP * count)
+
+
+def status_of(error):
+    """HttpError のステータス（HTTP のエラーでなければ None）"""
+    resp = getattr(error, 'resp', None)
+    return int(resp.status) if resp is not None and getattr(resp, 'status', None) else None
+
+
+def is_retryable(error):
+    return status_of(error) in RETRY_STATUSES or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def backoff_delay(attempt, error=None):
+    """attempt 回目（0 始まり）の再試行までの待ち時間（フルジッター、Retry-After を優先）"""
+    resp = getattr(error, 'resp', None)
+    retry_after = resp.get('retry-after') if resp is not None and hasattr(resp, 'get') else None
+    if retry_after:
+        try:
+            return float(retry_after) + random.uniform(0, BACKOFF_BASE)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def execute(request, limiter, http=None):
+    """リクエストを再試行つきで実行し、(レスポンス, 試行回数) を返す"""
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        try:
+            response = request.execute(http=http)
+        except Exception as error:
+            if not is_retryable(error) or attempt == MAX_ATTEMPTS - 1:
+                raise
+            if status_of(error) == 429:
+                limiter.throttled()
+            time.sleep(backoff_delay(attempt, error))
+        else:
+            limiter.succeeded()
+            return response, attempt + 1
+
+
+class Job:
+    """1つのフォームの作成状況"""
+
+    def __init__(self, key, spec):
+        self.key = key
+        self.spec = spec
+        self.hash = spec_hash(spec)
+        self.payload = form_spec.compile_spec(spec)
+        self.form_id = None
+        self.started = None
+        self.create_s = None
+        self.update_s = None
+        self.finished = None
+        self.attempts = 0
+        self.error = None
+        # 前回の実行で作成済みのフォームに、内容の設定から続ける場合は True
+        self.resumed = False
+
+    def status(self):
+        """ok / error / created（作成済みで内容は未設定）/ pending（作成の結果待ち）"""
+        if self.error is not None:
+            return 'error'
+        if self.finished is not None:
+            return 'ok'
+        return 'created' if self.form_id else 'pending'
+
+    def result(self):
+        entry = {
+            'status': self.status(),
+            'title': self.spec['title'],
+            'spec_hash': self.hash,
+            'form_id': self.form_id,
+            'attempts': self.attempts,
+            'create_s': _round(self.create_s),
+            'update_s': _round(self.update_s),
+            'total_s': _round(self.finished - self.started if self.finished else None),
+        }
+        if self.form_id:
+            entry['edit_url'] = f"https://docs.google.com/forms/d/{self.form_id}/edit"
+            entry['responder_url'] = f"https://docs.google.com/forms/d/e/{self.form_id}/viewform"
+        if self.error is not None:
+            entry['error'] = str(self.error)
+        return entry
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+class Provisioner:
+    """認証情報とサービスを共有してフォームを一括作成する"""
+
+    def __init__(self, credentials, service, jobs=DEFAULT_JOBS, batch_size=DEFAULT_BATCH_SIZE,
+                 limiter=None, on_result=None):
+        self.credentials = credentials
+        self.service = service
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.limiter = limiter or RateLimiter()
+        # フォームを作成したとき・内容を設定し終えたときに Job を渡して呼ぶ（ワーカースレッドからも呼ぶ）
+        self.on_result = on_result
+        self._local = threading.local()
+
+    def http(self):
+        """このスレッド専用の認証つき HTTP 接続"""
+        if not hasattr(self._local, 'http'):
+            import google_auth_httplib2
+            import httplib2
+            self._local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return self._local.http
+
+    def _notify(self, job):
+        if self.on_result is not None:
+            self.on_result(job)
+
+    def _update(self, job):
+        """フォームの内容を batchUpdate で設定する（ワーカースレッドで呼ばれる）
+
+        前回の実行で作成済みのフォームは、途中まで設定されている場合があるので、
+        取得したフォームとの差分（form_sync.diff）だけを送る。
+        """
+        start = time.perf_counter()
+        try:
+            body = job.payload['batchUpdate']
+            if job.resumed:
+                form, attempts = execute(self.service.forms().get(formId=job.form_id), self.limiter, self.http())
+                job.attempts += attempts
+                body = {'requests': form_sync.diff(form, job.payload)}
+                if form.get('revisionId'):
+                    body['writeControl'] = {'requiredRevisionId': form['revisionId']}
+            if body['requests']:
+                request = self.service.forms().batchUpdate(formId=job.form_id, body=body)
+                _, attempts = execute(request, self.limiter, self.http())
+                job.attempts += attempts
+        except Exception as error:
+            job.error = error
+        job.finished = time.perf_counter()
+        job.update_s = job.finished - start
+        self._notify(job)
+        return job
+
+    def _create_batch(self, chunk):
+        """chunk の forms.create を1回のバッチ HTTP で送り、再試行が必要なものを返す"""
+        retry = []
+
+        def callback(request_id, response, exception):
+            job = chunk[int(request_id)]
+            job.attempts += 1
+            if exception is None:
+                job.form_id = response['formId']
+                job.create_s = time.perf_counter() - job.started
+            elif is_retryable(exception):
+                retry.append((job, exception))
+            else:
+                job.error = exception
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for i, job in enumerate(chunk):
+            if job.started is None:
+                job.started = time.perf_counter()
+            batch.add(self.service.forms().create(body=job.payload['create']), request_id=str(i))
+        self.limiter.acquire(len(chunk))
+        try:
+            batch.execute(http=self.http())
+        except Exception as error:
+            if not is_retryable(error):
+                raise
+            # バッチ全体が失敗した場合は、結果の届かなかったものを再試行する（これも1回の試行に数える）
+            retry = [(job, error) for job in chunk if job.form_id is None and job.error is None]
+            for job, _ in retry:
+                job.attempts += 1
+        return retry
+
+    def run(self, jobs):
+        """全フォームを作成し、Job の一覧を返す
+
+        forms.create はバッチ HTTP にまとめて送り、作成できたものから
+        batchUpdate をスレッドプールに投入する。form_id が決まっている Job
+        （前回の実行で作成済みのもの）は作成を飛ばして内容の設定から行う。
+        """
+        pending = [job for job in jobs if job.form_id is None]
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            futures = []
+            for job in jobs:
+                if job.form_id is not None:
+                    job.started = time.perf_counter()
+                    futures.append(pool.submit(self._update, job))
+            for attempt in range(MAX_ATTEMPTS):
+                if not pending:
+                    break
+                retry = []
+                for i in range(0, len(pending), self.batch_size):
+                    chunk = pending[i:i + self.batch_size]
+                    with profiling.stage('create_batch'):
+                        failed = self._create_batch(chunk)
+                    retry += failed
+                    self.limiter.succeeded(sum(1 for job in chunk if job.form_id))
+                    for job in chunk:
+                        if job.form_id or job.error is not None:
+                            self._notify(job)
+                    futures += [pool.submit(self._update, job) for job in chunk if job.form_id]
+                if not retry:
+                    break
+                if any(status_of(error) == 429 for _, error in retry):
+                    self.limiter.throttled()
+                if attempt == MAX_ATTEMPTS - 1:
+                    for job, error in retry:
+                        job.error = error
+                        self._notify(job)
+                    break
+                time.sleep(backoff_delay(attempt, retry[0][1]))
+                pending = [job for job, _ in retry]
+            with profiling.stage('update'):
+                for future in futures:
+                    future.result()
+        return jobs
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'forms': {}}
+
+
+def save_manifest(path, manifest):
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(temporary, path)
+
+
+def collect_specs(templates, spec_paths, only=None):
+    """{キー: 定義} を作る（テンプレートは ID、定義ファイルはファイル名をキーにする）"""
+    specs = load_survey_templates(templates) if templates else {}
+    for path in spec_paths:
+        key = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'rb') as f:
+            specs[key] = form_spec.parse(f.read(), path)
+    if only:
+        unknown = sorted(set(only) - set(specs))
+        if unknown:
+            raise form_spec.SpecError(f"定義が見つかりません: {', '.join(unknown)}")
+        specs = {key: specs[key] for key in only}
+    return specs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='アンケートテンプレートから Google フォームを一括作成')
+    parser.add_argument('--templates', default=SURVEY_TEMPLATES_DART,
+                        help="テンプレートの Dart ファイル（'' で使わない）")
+    parser.add_argument('--spec', action='append', default=[], help='追加する定義ファイル（複数指定可）')
+    parser.add_argument('--only', action='append', help='作成するテンプレートの ID（複数指定可）')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS, help='batchUpdate の並列数')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='バッチ HTTP 1回にまとめる forms.create の数')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='送信レートの初期値（リクエスト/秒）')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help='結果のマニフェスト（JSON）')
+    parser.add_argument('--force', action='store_true', help='作成済みのフォームも作り直す')
+    parser.add_argument('--sync', action='store_true', help='定義が変わった作成済みのフォームをその場で更新する')
+    parser.add_argument('--dry-run', action='store_true', help='変換と検証だけ行い、API は呼ばない')
+    forms_client.add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    forms_client.configure(args)
+
+    with profiling.session(args.profile, 'provision_forms'):
+        start = time.perf_counter()
+        try:
+            with profiling.stage('compile_spec'):
+                jobs = [Job(key, spec) for key, spec in collect_specs(args.templates, args.spec, args.only).items()]
+        except (form_spec.SpecError, json.JSONDecodeError) as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+
+        manifest = load_manifest(args.manifest)
+        done = manifest.get('forms', {})
+        stale = [job for job in jobs if done.get(job.key, {}).get('status') == 'ok'
+                 and done[job.key]['spec_hash'] != job.hash]
+        syncing = stale if args.sync and not args.force else []
+        if not args.force:
+            jobs = [job for job in jobs if done.get(job.key, {}).get('status') != 'ok']
+            # 前回の実行で作成までできたフォームは作り直さず、内容の設定から続ける
+            for job in jobs:
+                if done.get(job.key, {}).get('form_id'):
+                    job.form_id, job.resumed = done[job.key]['form_id'], True
+        resumed = sum(job.resumed for job in jobs)
+        print(f"作成するフォーム: {len(jobs) - resumed} 件"
+              + (f"、続きから設定するフォーム: {resumed} 件" if resumed else '')
+              + f"（変換 {(time.perf_counter() - start) * 1000:.1f} ms）")
+        for job in stale:
+            action = '--sync で更新します' if syncing else '--sync で更新、--force で作り直し'
+            print(f"  定義が変更されています（{action}）: {job.key}")
+        if args.dry_run or not (jobs or syncing):
+            return
+
+        lock = threading.Lock()
+
+        def record(job=None):
+            """マニフェストに job の結果を反映して保存する（中断してもフォームの ID が残るように）"""
+            with lock:
+                if job is not None:
+                    done[job.key] = job.result()
+                manifest['forms'] = done
+                manifest['updated'] = datetime.datetime.now().isoformat(timespec='seconds')
+                manifest['elapsed_s'] = round(time.perf_counter() - start, 3)
+                save_manifest(args.manifest, manifest)
+
+        credentials = forms_client.get_credentials()
+        service = forms_client.build_service(credentials)
+        provisioner = Provisioner(credentials, service, args.jobs, args.batch_size, RateLimiter(args.rate),
+                                  on_result=record)
+        if jobs:
+            try:
+                provisioner.run(jobs)
+            finally:
+                # 途中の例外・中断でも、結果の出たフォームはすべて書き出す
+                for job in jobs:
+                    if job.started is not None:
+                        done[job.key] = job.result()
+                record()
+
+        unsynced = []
+        with profiling.stage('sync'):
+            for job in syncing:
+                try:
+                    requests = form_sync.sync(service, done[job.key]['form_id'], job.payload)
+                except Exception as error:
+                    print(f"❌ {job.key}: 同期できませんでした: {error}")
+                    unsynced.append(job)
+                    continue
+                done[job.key]['spec_hash'] = job.hash
+                done[job.key]['synced'] = datetime.datetime.now().isoformat(timespec='seconds')
+                print(f"🔄 {job.key}: {form_sync.summarize(requests)}")
+
+        record()
+
+        failed = [job for job in jobs if job.error is not None]
+        for job in jobs:
+            mark = '❌' if job.error is not None else '✅'
+            print(f"{mark} {job.key}: {job.form_id or job.error}")
+        print(f"{len(jobs) - len(failed)} / {len(jobs)} 件のフォームを作成しました"
+              f"（{manifest['elapsed_s']:.1f} 秒）→ {args.manifest}")
+        if failed or unsynced:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+フォームの回答の集計を、新しい回答の分だけ更新しながら保持するモジュール
+
+export_responses.py が書いた SQLite の answer_log（回答の追加と取り消しの記録）を、
+前回集計した位置（seq）の続きから読み、質問の設定（questions.question）に当てはめて
+質問ごとの集計を NumPy の配列で更新する。
+  - 選択式（RADIO / CHECKBOX / DROP_DOWN）: 選択肢ごとの件数（最後の要素は「その他」と定義にない値）
+  - 均等目盛（scaleQuestion、例:「デザインの重要度」）: 段階ごとの件数と、件数・合計・二乗和
+  - その他の質問: 回答した人数だけ
+編集された回答は古い値の取り消し（sign=-1）と新しい値の追加として届くので、集計は
+足し引きだけで済み、毎回すべての回答を読み直す必要はない（O(新しい回答の数)）。
+選択肢の変更などで質問の設定が変わった場合だけ、その質問を記録から数え直す。
+集計は <データベース>.stats.npz に保存する。
+
+使い方:
+    python response_stats.py                         # 新しい回答を集計に加えて表示
+    python response_stats.py FORM_ID --json          # JSON で表示
+    python response_stats.py --rebuild               # 集計を最初から作り直す
+
+    from response_stats import Stats
+    stats = Stats.load('form_responses.sqlite.stats.npz')
+    stats.update(db)
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from export_responses import DEFAULT_DATABASE, connect
+import profiling
+
+# answer_log を一度に読む行数
+CHUNK_ROWS = 50000
+
+# 選択式の「その他」と、定義にない値をまとめる欄の名前
+OTHER_LABEL = 'その他'
+
+
+def stats_path(database):
+    return f'{database}.stats.npz'
+
+
+def _schema(question):
+    """質問の設定から (集計の種類, 欄の名前, 目盛の最小値) を返す"""
+    if 'choiceQuestion' in question:
+        options = question['choiceQuestion'].get('options', [])
+        return 'choice', [o['value'] for o in options if not o.get('isOther') and 'value' in o] + [OTHER_LABEL], 0
+    if 'scaleQuestion' in question:
+        low, high = question['scaleQuestion'].get('low', 0), question['scaleQuestion'].get('high', 5)
+        return 'scale', [str(v) for v in range(low, high + 1)], low
+    return 'count', [], 0
+
+
+class QuestionStats:
+    """1つの質問の集計
+
+    counts は欄ごとの件数、respondents は回答した人数、
+    moments は目盛の質問の [件数, 合計, 二乗和]。
+    """
+
+    def __init__(self, kind, labels, low=0, counts=None, respondents=0, moments=None):
+        self.kind = kind
+        self.labels = list(labels)
+        self.low = low
+        self.counts = np.zeros(len(self.labels), np.int64) if counts is None else counts
+        self.respondents = int(respondents)
+        self.moments = np.zeros(3, np.float64) if moments is None else moments
+
+    def matches(self, kind, labels, low):
+        """質問の設定（種類・欄・目盛の最小値）がこの集計と同じなら True"""
+        return (kind, list(labels), low) == (self.kind, self.labels, self.low)
+
+    def add(self, values, ordinals, signs):
+        """回答の値（文字列の配列）を sign（1 / -1）の向きで集計に加える"""
+        self.respondents += int(signs[ordinals == 0].sum())
+        if self.kind == 'count' or not len(values):
+            return
+        # 値の種類は少ないので、種類ごとに1回だけ欄を引いてから配列で割り当てる
+        unique, inverse = np.unique(values, return_inverse=True)
+        if self.kind == 'choice':
+            index = {label: i for i, label in enumerate(self.labels[:-1])}
+            lut = np.array([index.get(v, len(self.labels) - 1) for v in unique], np.int64)
+            self.counts += np.bincount(lut[inverse], weights=signs, minlength=len(self.labels)).astype(np.int64)
+            return
+        lut = np.array([_number(v) for v in unique], np.float64)
+        numbers = lut[inverse]
+        valid = ~np.isnan(numbers)
+        numbers, weights = numbers[valid], signs[valid].astype(np.float64)
+        slots = numbers.astype(np.int64) - self.low
+        inside = (slots >= 0) & (slots < len(self.labels))
+        self.counts += np.bincount(slots[inside], weights=weights[inside],
+                                   minlength=len(self.labels)).astype(np.int64)
+        self.moments += [weights.sum(), (weights * numbers).sum(), (weights * numbers * numbers).sum()]
+
+    def summary(self):
+        entry = {'kind': self.kind, 'respondents': self.respondents}
+        if self.kind != 'count':
+            entry['counts'] = dict(zip(self.labels, self.counts.tolist()))
+        if self.kind == 'scale':
+            n, total, squares = self.moments
+            if n > 0:
+                mean = total / n
+                entry['mean'] = round(float(mean), 4)
+                entry['std'] = round(float(np.sqrt(max(squares / n - mean * mean, 0.0))), 4)
+        return entry
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class Stats:
+    """全フォームの質問ごとの集計と、集計済みの answer_log の位置"""
+
+    def __init__(self, cursor=0, questions=None, titles=None):
+        self.cursor = cursor
+        self.questions = questions or {}
+        self.titles = titles or {}
+
+    @classmethod
+    def load(cls, path):
+        """保存した集計を読む（なければ空の集計）"""
+        try:
+            data = np.load(path, allow_pickle=False)
+        except FileNotFoundError:
+            return cls()
+        with data:
+            meta = json.loads(str(data['meta']))
+            questions = {}
+            for key, info in meta['questions'].items():
+                questions[key] = QuestionStats(info['kind'], info['labels'], info['low'], data[f'{key}/counts'],
+                                               info['respondents'], data[f'{key}/moments'])
+            return cls(meta['cursor'], questions, meta['titles'])
+
+    def save(self, path):
+        meta = {'cursor': self.cursor, 'titles': self.titles, 'questions': {
+            key: {'kind': q.kind, 'labels': q.labels, 'low': q.low, 'respondents': q.respondents}
+            for key, q in self.questions.items()}}
+        arrays = {'meta': np.array(json.dumps(meta, ensure_ascii=False))}
+        for key, q in self.questions.items():
+            arrays[f'{key}/counts'] = q.counts
+            arrays[f'{key}/moments'] = q.moments
+        temporary = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(temporary, **arrays)
+        os.replace(temporary, path)
+
+    def _prepare(self, key, schema):
+        """key の集計を質問の設定に合わせる。合わせられず作り直した場合は True"""
+        kind, labels, low = _schema(json.loads(schema)) if schema else ('count', [], 0)
+        current = self.questions.get(key)
+        if current is not None and current.matches(kind, labels, low):
+            return False
+        self.questions[key] = QuestionStats(kind, labels, low)
+        return current is not None
+
+    def update(self, db, chunk_rows=CHUNK_ROWS):
+        """answer_log の新しい行を集計に加え、加えた行数を返す"""
+        schemas = {}
+        for form_id, question_id, title, question in db.execute(
+                'SELECT form_id, question_id, title, question FROM questions'):
+            schemas[f'{form_id}/{question_id}'] = question
+            self.titles[f'{form_id}/{question_id}'] = title
+        # 設定が変わった質問（選択肢の追加など）は、集計済みの位置までを記録から数え直す
+        for key, schema in schemas.items():
+            if self._prepare(key, schema):
+                form_id, question_id = key.split('/', 1)
+                self._add(key, schemas, db.execute(
+                    'SELECT value, ordinal, sign FROM answer_log WHERE form_id = ? AND question_id = ? AND seq <= ?',
+                    (form_id, question_id, self.cursor)).fetchall())
+
+        added = 0
+        cursor = db.execute('SELECT seq, form_id, question_id, value, ordinal, sign FROM answer_log '
+                            'WHERE seq > ? ORDER BY seq', (self.cursor,))
+        while True:
+            with profiling.stage('read'):
+                rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            with profiling.stage('aggregate'):
+                groups = {}
+                for seq, form_id, question_id, value, ordinal, sign in rows:
+                    groups.setdefault(f'{form_id}/{question_id}', []).append((value, ordinal, sign))
+                for key, group in groups.items():
+                    self._add(key, schemas, group)
+            self.cursor = rows[-1][0]
+            added += len(rows)
+        return added
+
+    def _add(self, key, schemas, rows):
+        if key not in self.questions:
+            self._prepare(key, schemas.get(key))
+        if rows:
+            values, ordinals, signs = zip(*rows)
+            self.questions[key].add(np.array([v or '' for v in values]), np.array(ordinals, np.int64),
+                                    np.array(signs, np.int64))
+
+    def report(self, form_ids=None):
+        """{フォームID: {質問ID: 集計の辞書（題名つき）}}"""
+        out = {}
+        for key, q in self.questions.items():
+            form_id, question_id = key.split('/', 1)
+            if form_ids and form_id not in form_ids:
+                continue
+            out.setdefault(form_id, {})[question_id] = dict(title=self.titles.get(key), **q.summary())
+        return out
+
+
+def _print_report(report):
+    for form_id, questions in report.items():
+        print(f"■ {form_id}")
+        for entry in questions.values():
+            print(f"  {entry['title']}（{entry['respondents']} 人）")
+            if 'mean' in entry:
+                print(f"    平均 {entry['mean']:.2f}  標準偏差 {entry['std']:.2f}")
+            total = sum(entry.get('counts', {}).values())
+            for label, count in entry.get('counts', {}).items():
+                share = count / total * 100 if total else 0.0
+                print(f"    {label:<20} {count:>6}  {share:5.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='フォームの回答の集計を新しい回答の分だけ更新して表示')
+    parser.add_argument('form_ids', nargs='*', metavar='FORM_ID', help='表示するフォーム（既定: すべて）')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='export_responses.py の SQLite')
+    parser.add_argument('--rebuild', action='store_true', help='保存した集計を使わず最初から集計する')
+    parser.add_argument('--json', action='store_true', help='JSON で表示する')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.database):
+        parser.error(f"データベースがありません: {args.database}（先に export_responses.py を実行してください）")
+    with profiling.session(args.profile, 'response_stats'):
+        path = stats_path(args.database)
+        stats = Stats() if args.rebuild else Stats.load(path)
+        db = connect(args.database)
+        try:
+            added = stats.update(db)
+        finally:
+            db.close()
+        stats.save(path)
+        report = stats.report(args.form_ids)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        _print_report(report)
+    print(f"新しい回答の値 {added} 件を集計しました → {path}", file=sys.stderr if args.json else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
-from PIL import Image
+from icon_tools.pipeline import run, save
+from icon_tools.raster import load
 
 # オリジナルのアイコンを読み込む
-img = Image.open('waselab_icon_original.png')
+pixels = load('waselab_icon_original.png')
 
-# 右に1ピクセル移動するための新しい画像を作成
-width, height = img.size
-new_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-
-# 画像を右に1ピクセルシフトして貼り付け
-new_img.paste(img, (1, 0))
+# 画像を右に1ピクセルシフト（空いた部分は透明）
+new_pixels = run(pixels, ['shift:dx=1'])
 
 # 新しい画像を保存
-new_img.save('waselab_icon.png')
+save(new_pixels, 'waselab_icon.png')
 
 print("アイコンを1px右に移動しました（5px-4px=1px）。")
-print("調整後: waselab_icon.png")
\ No newline at end of file
+print("調整後: waselab_icon.png")
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SPEC = os.path.join(ROOT, 'scripts', 'forms', 'development_consultation.json')
+
+# icon_tools はパッケージとして、scripts/ のスクリプトはモジュールとして読み込む
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def standin():
+    """forms_standin のサーバを起動し、Forms API の接続先にする"""
+    import forms_client
+    import forms_standin
+
+    server = forms_standin.serve_in_thread(seed=1)
+    forms_client.set_base_url(server.base_url)
+    try:
+        yield server
+    finally:
+        forms_client.set_base_url(None)
+        server.shutdown()
+        server.server_close()
+
+
+def create_form(payload):
+    """form_spec の変換結果からフォームを作り、(サービス, フォーム ID) を返す（standin の中で使う）"""
+    import forms_client
+
+    service = forms_client.build_service()
+    form_id = service.forms().create(body=payload['create']).execute()['formId']
+    service.forms().batchUpdate(formId=form_id, body=payload['batchUpdate']).execute()
+    return service, form_id
@@ -0,0 +1,76 @@
+import pytest
+
+from icon_tools import backup
+from icon_tools.cache import write_if_changed
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write(path, data):
+    # スクリプトと同じく一時ファイルから置き換える（ハードリンクしたバックアップを壊さない）
+    write_if_changed(path, data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_undo_returns_to_previous_snapshot(workdir):
+    write('icon.png', b'v1')
+    backup.snapshot('icon.png')
+    write('icon.png', b'v22')
+    assert backup.undo()['id'] == 1
+    assert read('icon.png') == b'v1'
+
+
+def test_repeated_undo_goes_further_back(workdir):
+    for data in (b'v1', b'v22', b'v333'):
+        write('icon.png', data)
+        backup.snapshot('icon.png')
+    write('icon.png', b'v4444')
+    expected = [b'v333', b'v22', b'v1']
+    for data in expected:
+        backup.undo()
+        assert read('icon.png') == data
+    with pytest.raises(backup.BackupError):
+        backup.undo()
+
+
+def test_undo_after_reaching_an_undone_state_again(workdir):
+    # 一度取り消した内容（v2）に後から戻って保存した場合も、その内容に戻れる
+    write('icon.png', b'v1')
+    backup.snapshot('icon.png')
+    write('icon.png', b'v22')
+    backup.undo()
+    assert read('icon.png') == b'v1'
+    backup.snapshot('icon.png')
+    write('icon.png', b'v22')
+    backup.snapshot('icon.png')
+    write('icon.png', b'v333')
+    backup.undo()
+    assert read('icon.png') == b'v22'
+
+
+def test_restore_can_be_undone(workdir):
+    write('icon.png', b'v1')
+    backup.snapshot('icon.png')
+    write('icon.png', b'v22')
+    backup.snapshot('icon.png')
+    backup.restore(1)
+    assert read('icon.png') == b'v1'
+    backup.undo()
+    assert read('icon.png') == b'v22'
+
+
+def test_restore_refuses_modified_object(workdir):
+    write('icon.png', b'v1')
+    entry = backup.snapshot('icon.png')
+    with open(backup.object_path(entry['sha256']), 'wb') as f:
+        f.write(b'broken')
+    with pytest.raises(backup.BackupError):
+        backup.restore(entry['id'])
@@ -0,0 +1,56 @@
+import copy
+import json
+
+import form_spec
+import form_sync
+from conftest import SPEC, create_form
+
+
+def load_spec():
+    with open(SPEC, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def questions(form):
+    return {item['title']: item['questionItem']['question']['questionId']
+            for item in form['items'] if 'questionItem' in item}
+
+
+def test_unchanged_form_sends_nothing(standin):
+    payload = form_spec.compile_spec(load_spec())
+    service, form_id = create_form(payload)
+    revision = standin.store.forms[form_id]['revisionId']
+
+    assert form_sync.sync(service, form_id, payload) == []
+    assert standin.store.forms[form_id]['revisionId'] == revision
+
+
+def test_edited_spec_keeps_question_ids(standin):
+    spec = load_spec()
+    service, form_id = create_form(form_spec.compile_spec(spec))
+    before = questions(service.forms().get(formId=form_id).execute())
+
+    edited = copy.deepcopy(spec)
+    edited['sections'][2]['questions'][0]['title'] = 'プロジェクト名・サービス名'
+    contact = edited['sections'][1]['questions']
+    contact[2]['options'].append('その他の団体')
+    del contact[6]                                   # 電話番号
+    contact.insert(0, contact.pop(5))                # メールアドレスを先頭へ
+    contact.append({'title': '折り返しの時間帯', 'type': 'text'})
+    payload = form_spec.compile_spec(edited)
+
+    requests = form_sync.sync(service, form_id, payload)
+    kinds = {next(iter(request)) for request in requests}
+    assert kinds == {'deleteItem', 'moveItem', 'createItem', 'updateItem'}
+    assert len(requests) < len(payload['batchUpdate']['requests'])
+
+    form = service.forms().get(formId=form_id).execute()
+    assert form_sync.diff(form, payload) == []
+    after = questions(form)
+    assert [item['title'] for item in form['items']] == [
+        request['createItem']['item']['title'] for request in payload['batchUpdate']['requests']
+        if 'createItem' in request]
+    assert after['プロジェクト名・サービス名'] == before['プロジェクト名・システム名']
+    assert after['ご所属'] == before['ご所属']
+    assert after['メールアドレス'] == before['メールアドレス']
+    assert '電話番号' not in after
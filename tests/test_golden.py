@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from conftest import ROOT
+from icon_tools import bench, palette, pipeline, recolor, reference
+
+
+@pytest.mark.parametrize('transform', list(bench.TRANSFORMS))
+def test_matches_golden(transform):
+    pixels = bench.synthetic_icon(512)
+    expected = recolor.load_rgba(bench.golden_path('synthetic-512', transform))
+    assert bench.compare(pipeline.run(pixels, bench.TRANSFORMS[transform]), expected)['passed']
+
+
+def _crops():
+    # 実際のアイコン（不透明）のフラスコの縁と、合成アイコンの半透明の角
+    yield recolor.load_rgba(os.path.join(ROOT, bench.REAL_ICON))[400:528, 400:528]
+    yield bench.synthetic_icon(256)[:96, :96]
+
+
+@pytest.mark.parametrize('transform', list(bench.TRANSFORMS))
+def test_matches_original_loop_on_crop(transform):
+    for pixels in _crops():
+        expected = reference.run(pixels, transform)
+        assert bench.compare(pipeline.run(pixels, bench.TRANSFORMS[transform]), expected)['passed']
+
+
+def test_default_swap_matches_original_detection():
+    # enji を省略した swap は、元のスクリプトが最初に見つけた色 (152, 26, 44) の代わりに
+    # 最も多い色 (152, 24, 44) を使う。違いはその G の 2 だけ
+    pixels = recolor.load_rgba(os.path.join(ROOT, bench.REAL_ICON))
+    expected = reference.swap(pixels, reference.find_enji(pixels))
+    assert bench.compare(pipeline.run(pixels, ['swap']), expected, tolerance=(0, 2, 0, 0))['passed']
+
+
+def test_default_blend_uses_detected_accent():
+    pixels = recolor.load_rgba(os.path.join(ROOT, bench.REAL_ICON))[300:556, 300:556]
+    expected = reference.swap_hq(pixels, palette.analyze(pixels).accent)
+    assert bench.compare(pipeline.run(pixels, ['blend']), expected)['passed']
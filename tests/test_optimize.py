@@ -0,0 +1,22 @@
+import numpy as np
+
+from icon_tools import bench, optimize, recolor
+from icon_tools.cache import encode_png
+
+
+def test_optimized_png_keeps_pixels():
+    pixels = bench.synthetic_icon(128)
+    data = encode_png(recolor.to_image(pixels))
+    optimized, method = optimize.optimize_bytes(data)
+    assert method and len(optimized) < len(data)
+    assert np.array_equal(optimize.decode(optimized), pixels)
+
+
+def test_search_deflate_tries_every_strategy_and_keeps_smallest():
+    # 値の種類が少ないノイズでは、標準の戦略より Z_RLE などの方が小さくなる
+    rows = np.random.default_rng(0).integers(0, 16, (64, 192), dtype=np.uint8)
+    filtered = {m: optimize.filter_rows(rows, 3, m).tobytes() for m in range(len(optimize.FILTER_NAMES))}
+    tried = optimize.search_deflate(filtered, [0, 1])
+    assert {strategy for _, _, _, strategy in tried} == set(optimize._STRATEGIES)
+    smallest = min(len(idat) for idat in tried.values())
+    assert smallest < len(tried[(0, 9, 9, 'default')])
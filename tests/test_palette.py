@@ -0,0 +1,19 @@
+import numpy as np
+
+from icon_tools import palette
+
+
+def test_accent_is_most_common_exact_color():
+    pixels = np.full((64, 64, 4), 255, np.uint8)
+    # えんじ色のクラスタ: 平均 (148, 26, 45) はどのピクセルにもない
+    pixels[:24, :, :] = (150, 24, 44, 250)
+    pixels[24:40, :, :] = (144, 30, 48, 255)
+    analysis = palette.analyze(pixels)
+    assert analysis.accent == (150, 24, 44, 250)
+    assert analysis.base == (255, 255, 255)
+    assert palette.analyze(pixels, tile=10).accent == analysis.accent
+
+
+def test_accent_of_transparent_image_is_default():
+    analysis = palette.analyze(np.zeros((8, 8, 4), np.uint8))
+    assert analysis.accent == (140, 34, 51)
@@ -0,0 +1,34 @@
+import json
+import threading
+
+import profiling
+
+
+def test_stages_record_peak_memory_across_threads(tmp_path):
+    trace = tmp_path / 'trace.json'
+
+    def worker():
+        with profiling.stage('worker'):
+            data = bytearray(4 * 1024 * 1024)
+            del data
+
+    with profiling.session(str(trace), 'job'):
+        with profiling.stage('outer'):
+            with profiling.stage('inner'):
+                data = bytearray(8 * 1024 * 1024)
+                del data
+            # 子の区間の後に reset_peak されても、外側の区間のピークは残る
+            with profiling.stage('small'):
+                pass
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    stages = json.loads(trace.read_text(encoding='utf-8'))['stages']
+    assert set(stages) == {'job', 'job/outer', 'job/outer/inner', 'job/outer/small', 'job/worker'}
+    assert stages['job/outer/inner']['peak_mb'] >= 8
+    assert stages['job/outer']['peak_mb'] >= 8
+    assert stages['job/outer/small']['peak_mb'] < 1
+    assert stages['job/worker']['peak_mb'] >= 4
+    assert stages['job']['peak_mb'] >= 8
+    assert profiling.stage('after') is profiling._NULL
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+import forms_standin
+import provision_forms
+from conftest import SPEC
+
+
+def run(manifest, base_url):
+    provision_forms.main(['--templates', '', '--spec', SPEC, '--manifest', str(manifest), '--base-url', base_url])
+
+
+def read(manifest):
+    with open(manifest, encoding='utf-8') as f:
+        return json.load(f)['forms']['development_consultation']
+
+
+def test_interrupted_run_resumes_without_duplicates(standin, tmp_path, monkeypatch):
+    manifest = tmp_path / 'form_provision.json'
+
+    def interrupted(self, job):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(provision_forms.Provisioner, '_update', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run(manifest, standin.base_url)
+    entry = read(manifest)
+    assert entry['status'] == 'created'
+    assert list(standin.store.forms) == [entry['form_id']]
+
+    run(manifest, standin.base_url)
+    resumed = read(manifest)
+    assert resumed['status'] == 'ok'
+    assert resumed['form_id'] == entry['form_id']
+    assert len(standin.store.forms) == 1
+    assert standin.store.forms[entry['form_id']]['items']
+
+
+def test_failed_update_is_resumed_by_diff(standin, tmp_path, monkeypatch):
+    manifest = tmp_path / 'form_provision.json'
+    def rejected(form_id, body):
+        raise forms_standin.ApiError(400, 'INVALID_ARGUMENT', '注入したエラー')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(standin.store, 'batch_update', rejected)
+        with pytest.raises(SystemExit):
+            run(manifest, standin.base_url)
+    entry = read(manifest)
+    assert entry['status'] == 'error' and entry['form_id']
+
+    run(manifest, standin.base_url)
+    assert read(manifest)['status'] == 'ok'
+    assert len(standin.store.forms) == 1
+
+
+class _Batch:
+    def __init__(self, callback, failures, rejected=()):
+        self.callback = callback
+        self.failures = failures
+        self.rejected = rejected
+        self.ids = []
+
+    def add(self, request, request_id):
+        self.ids.append(request_id)
+
+    def execute(self, http=None):
+        if self.failures:
+            self.failures.pop()
+            raise ConnectionError('バッチ全体の失敗')
+        for request_id in self.ids:
+            if request_id in self.rejected:
+                self.callback(request_id, None, ValueError('再試行しないエラー'))
+            else:
+                self.callback(request_id, {'formId': f'form-{request_id}'}, None)
+
+
+class _Service:
+    def __init__(self, failures, rejected=()):
+        self.failures = failures
+        self.rejected = rejected
+
+    def new_batch_http_request(self, callback):
+        return _Batch(callback, self.failures, self.rejected)
+
+    def forms(self):
+        return self
+
+    def create(self, body):
+        return body
+
+
+def test_whole_batch_failures_count_as_attempts(monkeypatch):
+    monkeypatch.setattr(provision_forms, 'backoff_delay', lambda attempt, error=None: 0)
+    with open(SPEC, 'rb') as f:
+        spec = provision_forms.form_spec.parse(f.read(), SPEC)
+    jobs = [provision_forms.Job(f'form_{i}', spec) for i in range(3)]
+    provisioner = provision_forms.Provisioner(None, _Service([None, None]), limiter=provision_forms.RateLimiter(1e6))
+    provisioner._local.http = None
+    monkeypatch.setattr(provisioner, '_update', lambda job: job)
+
+    provisioner.run(jobs)
+    assert [job.form_id for job in jobs] == ['form-0', 'form-1', 'form-2']
+    assert [job.attempts for job in jobs] == [3, 3, 3]
+
+
+def test_rate_only_ramps_for_created_forms(monkeypatch):
+    with open(SPEC, 'rb') as f:
+        spec = provision_forms.form_spec.parse(f.read(), SPEC)
+    jobs = [provision_forms.Job(f'form_{i}', spec) for i in range(3)]
+    provisioner = provision_forms.Provisioner(None, _Service([], rejected={'1'}),
+                                              limiter=provision_forms.RateLimiter(1e6))
+    provisioner._local.http = None
+    monkeypatch.setattr(provisioner, '_update', lambda job: job)
+    succeeded = []
+    monkeypatch.setattr(provisioner.limiter, 'succeeded', succeeded.append)
+
+    provisioner.run(jobs)
+    assert [job.form_id for job in jobs] == ['form-0', None, 'form-2']
+    assert isinstance(jobs[1].error, ValueError)
+    assert succeeded == [2]
@@ -0,0 +1,64 @@
+import collections
+import urllib.request
+
+import numpy as np
+
+import export_responses
+import form_spec
+from conftest import SPEC, create_form
+from response_stats import Stats
+
+
+def add_responses(standin, form_id, count):
+    url = f'{standin.base_url}_standin/forms/{form_id}/responses?count={count}'
+    urllib.request.urlopen(urllib.request.Request(url, data=b'', method='POST')).close()
+
+
+def expected(standin, form_id):
+    """スタンドインが持つ回答から直接数えた {質問ID: (回答した人数, 値ごとの件数)}"""
+    respondents, values = collections.Counter(), collections.defaultdict(collections.Counter)
+    for response in standin.store.responses[form_id]:
+        for question_id, answer in response.get('answers', {}).items():
+            respondents[question_id] += 1
+            values[question_id].update(a['value'] for a in answer['textAnswers']['answers'])
+    return respondents, values
+
+
+def check(report, standin, form_id):
+    respondents, values = expected(standin, form_id)
+    assert report.keys() == respondents.keys()
+    for question_id, entry in report.items():
+        assert entry['respondents'] == respondents[question_id]
+        if entry['kind'] != 'count':
+            assert {label: n for label, n in entry['counts'].items() if n} == values[question_id]
+        if entry['kind'] == 'scale':
+            numbers = np.array(list(values[question_id].elements()), np.float64)
+            assert entry['mean'] == round(float(numbers.mean()), 4)
+
+
+def test_export_and_incremental_stats(standin, tmp_path):
+    service, form_id = create_form(form_spec.compile_file(SPEC, cache_dir=None))
+    database = str(tmp_path / 'responses.sqlite')
+    db = export_responses.connect(database)
+    try:
+        add_responses(standin, form_id, 40)
+        assert export_responses.harvest(service, db, form_id, page_size=15) == (40, 3)
+        stats = Stats()
+        assert stats.update(db) > 0
+        check(stats.report()[form_id], standin, form_id)
+
+        # 2回目の取得は CLOCK_SKEW の分だけ前回の回答と重なるが、集計は二重に数えない
+        path = str(tmp_path / 'responses.stats.npz')
+        stats.save(path)
+        add_responses(standin, form_id, 25)
+        saved, _ = export_responses.harvest(service, db, form_id, page_size=15)
+        assert saved >= 25
+        stats = Stats.load(path)
+        stats.update(db)
+        check(stats.report()[form_id], standin, form_id)
+
+        rebuilt = Stats()
+        rebuilt.update(db)
+        assert rebuilt.report() == stats.report()
+    finally:
+        db.close()
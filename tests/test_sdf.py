@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from icon_tools import recolor, sdf
+
+
+@pytest.mark.filterwarnings('error')
+def test_transparent_input_has_no_flask():
+    pixels = np.zeros((32, 32, 4), np.uint8)
+    flask, silhouette = sdf.coverages(pixels)
+    assert not flask.any() and not silhouette.any()
+    out = sdf.render(sdf.field(pixels, cache_dir=None), 16, recolor.ENJI_COLOR, recolor.WHITE_COLOR)
+    assert out.shape == (16, 16, 4) and not out[..., 3].any()
+
+
+def test_flask_coverage_follows_colors():
+    pixels = np.full((4, 4, 4), 255, np.uint8)
+    pixels[..., :3] = recolor.ENJI_COLOR[:3]
+    pixels[1:3, 1:3, :3] = recolor.WHITE_COLOR[:3]
+    flask, silhouette = sdf.coverages(pixels, recolor.ENJI_COLOR, recolor.WHITE_COLOR)
+    assert flask.sum() == 4 and flask[1:3, 1:3].all() and (silhouette == 1).all()
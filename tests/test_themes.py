@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from icon_tools import fit, recolor, themes
+
+
+def test_blend_levels_along_segment():
+    pixels = np.array([[[140, 34, 51, 255], [255, 255, 255, 255], [197, 144, 153, 255]]], np.uint8)
+    assert themes.blend_levels(pixels, recolor.ENJI_COLOR, recolor.WHITE_COLOR).tolist() == [[0, 255, 127]]
+
+
+@pytest.mark.filterwarnings('error')
+def test_blend_levels_same_colors_are_foreground():
+    pixels = np.full((8, 8, 4), 255, np.uint8)
+    levels = themes.blend_levels(pixels, recolor.WHITE_COLOR, recolor.WHITE_COLOR)
+    assert levels.dtype == np.uint8 and (levels == 255).all()
+
+
+@pytest.mark.filterwarnings('error')
+def test_fit_measures_single_color_icon():
+    measurement = fit.measure(np.full((16, 16, 4), 255, np.uint8))
+    assert measurement.centroid == (8.0, 8.0)